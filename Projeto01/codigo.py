@@ -10,6 +10,10 @@ os outros instantes de tempo.
 
 Também integrado ao programa está uma animação do resultado.
 
+Importado como módulo só define a configuração e simulacao(), sem simular
+nem importar o matplotlib; a simulação e a animação rodam quando o arquivo
+é executado como script.
+
 Ilustração da grade (o=corrente x=tensão)
 ++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
 +o|  o   o   o   o   o   o   o   o   o   o   o   o   o  |o       +
@@ -27,10 +31,12 @@ Ilustração da grade (o=corrente x=tensão)
 ++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
 """
 
+import os
+import sys
 import numpy as np
-import matplotlib.pyplot as plt
-import matplotlib.animation as animation
-from graficos import plotAnimations
+import linha
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from comum import cache, autoajuste, exportacao, executor, precisao, instrumentacao, espectro
 
 ######################### CONFIGURACOES DA SIMULACAO ##########################
 #Escolha da carga
@@ -44,6 +50,60 @@ carga = 1
 # 2 - u(t) - u(t - l/10uf)
 fonte = 1
 
+#Modo de armazenamento dos resultados
+# 'completo' - guarda todo o histórico (TIME x LEN), limitado a 2GB
+# 'rolante'  - guarda só os passos atual e anterior, as sondas (fonte, meio
+#              e carga), os instantes dos gráficos estáticos e os quadros da
+#              animação (memória O(LEN), permite linhas/dz muito maiores)
+armazenamento = 'completo'
+
+#Ajuste automático da grade: erro máximo da velocidade de fase (%) ou None
+#   para usar os valores fixos de dt e dz abaixo (ver comum/autoajuste.py).
+#   As duas fontes são descontínuas e o ajuste refina a grade em vez de
+#   engrossá-la (com a fonte 2 até estourar a memória)
+erroFaseMax = None
+
+#Anima enquanto a simulação avança, sem guardar o histórico (a animação
+#   começa no primeiro passo e a memória fica O(LEN); ignora armazenamento)
+animarDurante = False  #(False/True)
+
+#Reaproveita resultados de simulações com os mesmos parâmetros (ver comum/cache.py)
+usarCache = True  #(False/True)
+
+#Threads usadas nas atualizações de linhas longas (1 = serial; abaixo de
+#   executor.LIMIAR pontos a execução é serial de qualquer forma, ver comum/executor.py)
+threads = 1
+
+#Mostra o progresso (passos/s e tempo restante) e o tempo de cada fase do laço
+#   (tensão, corrente, fonte, carga), ver comum/instrumentacao.py
+instrumentar = False  #(False/True)
+
+#Precisão das tensões e correntes: np.float64 ou np.float32 (metade da
+#   memória, permite o dobro de pontos); relatorioPrecisao refaz a simulação
+#   em float64 e mostra o desvio máximo (ver comum/precisao.py)
+dtype = np.float64
+relatorioPrecisao = False  #(False/True)
+
+#Exporta a animação em vez de mostrá-la, renderizando os quadros em paralelo:
+#   arquivo de vídeo ('animacao.mp4', usa o ffmpeg), diretório para os PNGs
+#   de cada quadro ou None para mostrar normalmente (ver comum/exportacao.py)
+exportar = None
+
+#Resposta em frequência: frequências (Hz) em que a impedância de entrada e o
+#   S11 (referência Z0) são calculados por uma DFT acumulada durante a
+#   simulação, sem guardar o histórico (ver comum/espectro.py), ou None para
+#   simular e animar normalmente. Requer a fonte 2 (pulso), o degrau da
+#   fonte 1 não decai e não serve para a transformada
+frequencias = None
+
+#Regime estacionário: tolerância da variação relativa das médias de v e i
+#   em dois tempos de trânsito seguidos para encerrar a simulação antes dos
+#   10 trânsitos (a animação e os gráficos vão só até o passo em que parou,
+#   ver linha.Convergencia; 1e-3 para a carga 1 em 8 trânsitos, por exemplo)
+#   ou None para simular sempre o TIME inteiro. Não se aplica a
+#   animarDurante nem à resposta em frequência
+toleranciaEstacionario = None
+
 ######################### CONFIGURACOES DA ANIMACAO ###########################
 #Tomar media de pontos proximos para reduzir ruido (filtro de média)
 #   pode causar distorções nos pontos extremos.
@@ -66,6 +126,10 @@ intervalo = 100 #ms
 
 assert (carga >= 1 and carga <= 3), "Configuracao de Carga Invalida!"
 assert (fonte >= 1 and fonte <= 2), "Configuracao de Fonte Invalida!"
+assert (armazenamento in ('completo', 'rolante')), "Configuracao de Armazenamento Invalida!"
+assert (frequencias is None or fonte == 2), "A resposta em frequencia requer a fonte 2 (pulso)!"
+assert (toleranciaEstacionario is None or not relatorioPrecisao), \
+    "O relatorio de precisao requer toleranciaEstacionario = None (as duas simulacoes podem parar em passos diferentes)!"
 
 #Impedância característica
 Z0 = 50  #Ohm
@@ -86,6 +150,24 @@ l= 1e0              #m
 dt = 5e-12 #s
 #precisão do comprimento
 dz = 5e-3  #m
+
+#tensão na fonte em função do tempo
+def tensaoFonte(dt, TIME):
+    """
+    Forma de onda da fonte escolhida, amostrada com passo dt
+    """
+    if(fonte == 1):
+        Vs_t = 2*np.ones(TIME) #V
+    else:
+        Vs_t = np.zeros(TIME)
+        Vs_t[0:int(l/(10*uf*dt))] = 1
+    return Vs_t
+
+#troca dz e dt pela grade mais grossa que respeita erroFaseMax
+if(erroFaseMax is not None):
+    grade = autoajuste.ajustarGrade('linha', tensaoFonte(dt, 10*int((l/uf)/dt)), dt, uf, erroFaseMax)
+    dz = grade['dx']
+    dt = grade['dt']
 assert (dt <= dz*(L*C)**(1/2)), "dt deve ser menor que " + str(dz*(L*C)**(1/2)) + " (v = "+str(1/(L*C)**(1/2))+")!"
 
 #comprimento do fio (Quantidade de pontos simulados)
@@ -93,51 +175,114 @@ LEN = int(l/dz) #pontos
 
 #duração da simulação (Número de passos de tempo)
 #tempo suficiente para percorrer 10 vezes a linha de transmissão
-TIME = 10*int((l/uf)/dt) #pontos
+TRANSITO = int((l/uf)/dt) #passos para percorrer a linha uma vez
+TIME = 10*TRANSITO #pontos
 
 #verificação de memória < 2GB (para nao dar problema no PC) 
-memoria = TIME*LEN*8*2
-assert (memoria < 2*(2**30)), "parâmetros consomem muita memoria: " + str(memoria/(2**30)) + "GB"
-
-#tensão na fonte em função do tempo
-if(fonte == 1):
-    Vs_t = 2*np.ones(TIME) #V
+tamanho = np.dtype(dtype).itemsize  #bytes por ponto
+if(animarDurante or frequencias is not None):
+    memoria = (2*LEN+1)*tamanho
+elif(armazenamento == 'completo'):
+    memoria = TIME*LEN*tamanho*2
 else:
-    Vs_t = np.zeros(TIME)
-    Vs_t[0:int(l/(10*uf*dt))] = 1
+    memoria = (TIME//velocidade + 3)*(2*LEN+1)*tamanho
+assert (erroFaseMax is None or memoria < 2*(2**30)), autoajuste.mensagemRefino(erroFaseMax, dz)
+assert (memoria < 2*(2**30)), "parâmetros consomem muita memoria: " + str(memoria/(2**30)) + "GB"
 
-#condições iniciais
-v0 = np.zeros(LEN) #V
-i0 = np.zeros(LEN+1) #A
+Vs_t = tensaoFonte(dt, TIME)
 
 #constantes uteis para a simulação
-C1 = (-2*dt)/(dt*dz*R+2*dz*L)
-C2 = (2*L-dt*R)/(2*L+dt*R)
-C3 = (-2*dt)/(dt*dz*G+2*dz*C)
-C4 = (2*C-dt*G)/(2*C+dt*G)
-
-#array para armazenar e processar os dados
-v = np.zeros((TIME,LEN))
-v[0] = v0
-i = np.zeros((TIME,LEN+1))
-i[0] = i0
-
-#loop principal da simulação
-for n in range(1,TIME): #começa em 1 porque condições iniciais são conhecidas
-    #Para tomar a tensão no ponto anterior ao analisado (fora do vetor para z=0)
-    #desloca-se o vetor para a direita e adiciona a tensão da fonte
-    i[n][1:-1] = C1*( v[n-1][1:] - v[n-1][:-1] ) + C2*i[n-1][1:-1]
-    i[n][0]  = (Vs_t[n-1]-v[n-1][0])/Rs
-    
-    if(carga == 1):
-        i[n][-1] = v[n-1][-1]/Rl
-    elif(carga == 2):
-        i[n][-1] = i[n][-2] #CASO EM CURTO (Rl == 0)
+C1, C2, C3, C4 = linha.constantes(R, L, G, C, dt, dz)
+
+def _simular(*args, **kwargs):
+    """
+    linha.simular() acrescentando o passo em que a convergência parou a
+    simulação (None se não parou), para que ele também venha do cache
+    """
+    convergencia = kwargs.get('convergencia')
+    return linha.simular(*args, **kwargs) + (None if convergencia is None else convergencia.passo,)
+
+def simulacao(dtype=dtype, Rl=Rl, carga=carga):
+    """
+    Função que realiza a simulação com a configuração acima (condições
+    iniciais nulas), reaproveitando o cache se usarCache
+    entradas: dtype, Rl e carga (padrão os da configuração)
+    saídas: i, v e sondas como em linha.simular() e o passo em que a
+            simulação parou no regime estacionário (None se foi até TIME)
+    """
+    args = (Vs_t, LEN, TIME, C1, C2, C3, C4, Rs, Rl, carga)
+    kwargs = {'modo': armazenamento, 'velocidade': velocidade, 'dtype': dtype}
+    if(armazenamento == 'completo'):
+        kwargs['velocidade'] = 1  #não altera o resultado, só o modo rolante
+    if(toleranciaEstacionario is not None):
+        kwargs['convergencia'] = linha.Convergencia(TRANSITO, toleranciaEstacionario)
+    if(usarCache):
+        return cache.memorizar(_simular, args, kwargs,
+                               parametros={'simular': linha.simular,
+                                           'auxiliares': (linha.posicoesSondas, linha.instantesGraficos, linha.coeficientes,
+                                                          linha.coeficientesCarga, linha.Convergencia),
+                                           'R': R, 'L': L, 'G': G, 'C': C, 'l': l, 'dt': dt, 'dz': dz, 'fonte': fonte})
+    return _simular(*args, **kwargs)
+
+def relatorioEstacionario(sondas, passo):
+    """
+    Mostra em que passo a simulação chegou ao regime estacionário (passo
+    devolvido por simulacao()) e o estado atingido (tensões nas sondas e
+    corrente na carga), com os valores esperados em corrente contínua para
+    a fonte 1 numa linha sem perdas
+    """
+    if(passo is not None):
+        print("Regime estacionário no passo %d de %d (%.1f tempos de trânsito, %.0f%% do tempo total)"
+              % (passo, TIME, passo/TRANSITO, 100*passo/TIME))
     else:
-        i[n][-1] = 0        #CASO ABERTO (Rl = inf)
+        print("Regime estacionário não atingido em %d passos (tolerância %g)" % (TIME, toleranciaEstacionario))
+    print("Tensão: fonte %.4g V, meio %.4g V, carga %.4g V; corrente na carga %.4g A"
+          % (sondas['fonte'][0][-1], sondas['meio'][0][-1], sondas['carga'][0][-1], sondas['carga'][1][-1]))
+    if(fonte == 1 and R == 0 and G == 0):
+        Vs = Vs_t[-1]
+        if(carga == 1):
+            Vl, Il = Vs*Rl/(Rs + Rl), Vs/(Rs + Rl)
+        elif(carga == 2):
+            Vl, Il = 0, Vs/Rs
+        else:
+            Vl, Il = Vs, 0
+        print("Esperado em corrente contínua: tensão %.4g V ao longo da linha e corrente %.4g A" % (Vl, Il))
 
-    #Para tomar a corrente no ponto posterior ao analisado (fora do vetor para a=l)
-    #delosca-se o vetor para a esquerda e adiciona a corrente na carga
-    v[n] = C3*( i[n][1:] - i[n][:-1] ) + C4*v[n-1]
+def respostaFrequencia(frequencias, dtype=dtype, Rl=Rl, carga=carga):
+    """
+    Função que calcula a impedância de entrada e o S11 da linha nas
+    frequências dadas (Hz), com memória O(LEN + frequências)
+    saídas: Zin e S11 (complexos, um por frequência)
+    """
+    V, I = linha.espectroEntrada(Vs_t, LEN, TIME, C1, C2, C3, C4, Rs, Rl, carga, frequencias, dt, dtype)
+    Zin = espectro.impedancia(V, I)
+    return Zin, espectro.reflexao(Zin, Z0)
 
-plotAnimations(i, v, LEN, TIME, dz, tomarMedia, velocidade, intervalo)
+if __name__ == "__main__":
+    from graficos import plotAnimations, prepararAnimacao, plotEspectro
+
+    executor.configurar(threads)
+    instrumentacao.configurar(instrumentar)
+
+    if(frequencias is not None):
+        Zin, S11 = respostaFrequencia(frequencias)
+        plotEspectro(frequencias, Zin, S11)
+    elif(animarDurante):
+        #os quadros são entregues pelo gerador enquanto a simulação avança
+        quadros = linha.quadros(Vs_t, LEN, TIME, C1, C2, C3, C4, Rs, Rl, carga,
+                                velocidade=velocidade, instantes=linha.instantesGraficos(TIME), dtype=dtype)
+        plotAnimations(None, None, LEN, TIME, dz, tomarMedia, velocidade, intervalo, quadros=quadros)
+    else:
+        i, v, sondas, passo = simulacao()
+        #a animação e os gráficos vão só até o último passo calculado
+        passos = TIME if passo is None else passo + 1
+        instantes = tuple(min(n, passos - 1) for n in linha.instantesGraficos(TIME)[:2]) + (passos - 1,)
+        if(toleranciaEstacionario is not None):
+            relatorioEstacionario(sondas, passo)
+        if(relatorioPrecisao):
+            precisao.relatorio((i, v, sondas, passo), simulacao)
+        if(exportar):
+            exportacao.exportar(prepararAnimacao, (i, v, LEN, passos, dz, tomarMedia, velocidade), exportar,
+                                kwargs={'instantes': instantes})
+            sys.exit()
+        plotAnimations(i, v, LEN, passos, dz, tomarMedia, velocidade, intervalo, instantes=instantes)
@@ -1,15 +1,26 @@
 import numpy as np
 import matplotlib.pyplot as plt
 import matplotlib.animation as animation
-from matplotlib.pylab import *
 
-def plotAnimations(i, v, LEN, TIME, dz, tomarMedia, velocidade, intervalo):
+def prepararAnimacao(i, v, LEN, TIME, dz, tomarMedia, velocidade, quadros=None, instantes=None):
+    """
+    Monta as figuras (animação e gráficos estáticos) sem mostrá-las (usada
+    por plotAnimations e pela exportação em paralelo da animação, ver
+    comum/exportacao.py); instantes são os passos dos três gráficos
+    estáticos, padrão (TIME//20, TIME//10 + TIME//40, TIME - 1)
+    saídas:
+    anim, funcao, frames, blit - figura da animação, função que desenha
+                                 cada quadro, quadros a desenhar e se usa blit
+    """
     plt.style.use('seaborn-pastel')
+    if(instantes is None):
+        instantes = (TIME//20, TIME//10 + TIME//40, TIME - 1)
+    metade, reflexao, final = instantes
 
     # Cria as figuras
-    estatVolt = figure(num = 1, figsize = (8, 6))
-    estatCurr = figure(num = 2, figsize = (8, 6))
-    anim = figure(num = 0, figsize = (8, 6))
+    estatVolt = plt.figure(num = 1, figsize = (8, 6))
+    estatCurr = plt.figure(num = 2, figsize = (8, 6))
+    anim = plt.figure(num = 0, figsize = (8, 6))
 
     # Nomeia as figuras
     anim.canvas.set_window_title('Animações')
@@ -17,16 +28,16 @@ def plotAnimations(i, v, LEN, TIME, dz, tomarMedia, velocidade, intervalo):
     estatCurr.canvas.set_window_title('Gráficos Estáticos da Corrente')
 
     #Cria os subplots de cada figura
-    voltAnim = subplot2grid((2, 1), (0, 0), fig=anim)
-    currAnim = subplot2grid((2, 1), (1, 0), fig=anim)
+    voltAnim = plt.subplot2grid((2, 1), (0, 0), fig=anim)
+    currAnim = plt.subplot2grid((2, 1), (1, 0), fig=anim)
 
-    voltMiddle = subplot2grid((3, 1), (0, 0), fig=estatVolt)
-    voltEnd = subplot2grid((3, 1), (1, 0), fig=estatVolt)
-    voltEstationary = subplot2grid((3, 1), (2, 0), fig=estatVolt)
+    voltMiddle = plt.subplot2grid((3, 1), (0, 0), fig=estatVolt)
+    voltEnd = plt.subplot2grid((3, 1), (1, 0), fig=estatVolt)
+    voltEstationary = plt.subplot2grid((3, 1), (2, 0), fig=estatVolt)
     
-    currMiddle = subplot2grid((3, 1), (0, 0), fig=estatCurr)
-    currEnd = subplot2grid((3, 1), (1, 0), fig=estatCurr)
-    currEstationary = subplot2grid((3, 1), (2, 0), fig=estatCurr)
+    currMiddle = plt.subplot2grid((3, 1), (0, 0), fig=estatCurr)
+    currEnd = plt.subplot2grid((3, 1), (1, 0), fig=estatCurr)
+    currEstationary = plt.subplot2grid((3, 1), (2, 0), fig=estatCurr)
 
     # Configura os titulos dos subplots
     if(tomarMedia):
@@ -129,29 +140,34 @@ def plotAnimations(i, v, LEN, TIME, dz, tomarMedia, velocidade, intervalo):
     estatVolt.tight_layout()
     estatCurr.tight_layout()
 
+    # Sem o histórico os gráficos começam zerados
+    if(quadros is not None):
+        v = dict.fromkeys((0,) + tuple(instantes), np.zeros(LEN))
+        i = dict.fromkeys((0,) + tuple(instantes), np.zeros(LEN+1))
+
     # Inicializa os gráficos
     if(tomarMedia):
         p011, = voltAnim.plot(np.convolve(v[0], np.ones(5)*(1/5),mode="same"), 'r-')
         p021, = currAnim.plot(np.convolve(i[0], np.ones(5)*(1/5),mode="same"), 'b-')
 
-        p111, = voltMiddle.plot(np.convolve(v[TIME//20], np.ones(5)*(1/5),mode="same"), 'r-')
-        p121, = voltEnd.plot(np.convolve(v[TIME//10 + TIME//40], np.ones(5)*(1/5),mode="same"), 'r-')
-        p131, = voltEstationary.plot(np.convolve(v[TIME - 1], np.ones(5)*(1/5),mode="same"), 'r-')
+        p111, = voltMiddle.plot(np.convolve(v[metade], np.ones(5)*(1/5),mode="same"), 'r-')
+        p121, = voltEnd.plot(np.convolve(v[reflexao], np.ones(5)*(1/5),mode="same"), 'r-')
+        p131, = voltEstationary.plot(np.convolve(v[final], np.ones(5)*(1/5),mode="same"), 'r-')
 
-        p211, = currMiddle.plot(np.convolve(i[TIME//20], np.ones(5)*(1/5),mode="same"), 'b-')
-        p221, = currEnd.plot(np.convolve(i[TIME//10 + TIME//40], np.ones(5)*(1/5),mode="same"), 'b-')
-        p231, = currEstationary.plot(np.convolve(i[TIME - 1], np.ones(5)*(1/5),mode="same"), 'b-')
+        p211, = currMiddle.plot(np.convolve(i[metade], np.ones(5)*(1/5),mode="same"), 'b-')
+        p221, = currEnd.plot(np.convolve(i[reflexao], np.ones(5)*(1/5),mode="same"), 'b-')
+        p231, = currEstationary.plot(np.convolve(i[final], np.ones(5)*(1/5),mode="same"), 'b-')
     else:
         p011, = voltAnim.plot(v[0], 'r-')
         p021, = currAnim.plot(i[0], 'b-')
 
-        p111, = voltMiddle.plot(v[TIME//20], 'r-')
-        p121, = voltEnd.plot(v[TIME//10 + TIME//40], 'r-')
-        p131, = voltEstationary.plot(v[TIME - 1], 'r-')
+        p111, = voltMiddle.plot(v[metade], 'r-')
+        p121, = voltEnd.plot(v[reflexao], 'r-')
+        p131, = voltEstationary.plot(v[final], 'r-')
 
-        p211, = currMiddle.plot(i[TIME//20], 'b-')
-        p221, = currEnd.plot(i[TIME//10 + TIME//40], 'b-')
-        p231, = currEstationary.plot(i[TIME - 1], 'b-')
+        p211, = currMiddle.plot(i[metade], 'b-')
+        p221, = currEnd.plot(i[reflexao], 'b-')
+        p231, = currEstationary.plot(i[final], 'b-')
 
     # Função que atualiza a animação
     def updateData(n):
@@ -164,6 +180,78 @@ def plotAnimations(i, v, LEN, TIME, dz, tomarMedia, velocidade, intervalo):
 
         return p011, p021
 
-    simulation = animation.FuncAnimation(anim, updateData, blit=True, frames=TIME//velocidade, interval=intervalo, repeat=False)
+    # Gráficos estáticos de cada instante (tensão, corrente)
+    estaticos = {metade: (p111, p211),
+                 reflexao: (p121, p221),
+                 final: (p131, p231)}
+
+    def filtro(x):
+        if(tomarMedia):
+            return np.convolve(x, np.ones(5)*(1/5),mode="same")
+        return x.copy()
+
+    # Função que atualiza a animação com um quadro do gerador
+    def updateQuadro(quadro):
+        n, iN, vN = quadro
+        if(n in estaticos):
+            pV, pI = estaticos[n]
+            pV.set_data(tensaoEixoX, filtro(vN))
+            pI.set_data(correnteEixoX, filtro(iN))
+            estatVolt.canvas.draw_idle()
+            estatCurr.canvas.draw_idle()
+        if(n % velocidade == 0):
+            p011.set_data(tensaoEixoX, filtro(vN))
+            p021.set_data(correnteEixoX, filtro(iN))
+
+        return p011, p021
+
+    if(quadros is None):
+        return anim, updateData, TIME//velocidade, True
+    return anim, updateQuadro, quadros, True
+
+def plotAnimations(i, v, LEN, TIME, dz, tomarMedia, velocidade, intervalo, quadros=None, instantes=None):
+    """
+    Anima a tensão e a corrente e mostra os gráficos estáticos, a partir do
+    histórico (i, v) ou, se 'quadros' for dado, de um gerador de (n, i, v)
+    (ver linha.quadros) que deve entregar os passos múltiplos de velocidade
+    e os dos gráficos estáticos; nesse caso a animação começa enquanto a
+    simulação roda e os gráficos estáticos são preenchidos quando a
+    simulação passa pelos seus instantes (padrão os de prepararAnimacao)
+    """
+    anim, funcao, frames, blit = prepararAnimacao(i, v, LEN, TIME, dz, tomarMedia, velocidade, quadros, instantes)
+
+    if(quadros is None):
+        simulation = animation.FuncAnimation(anim, funcao, blit=blit, frames=frames, interval=intervalo, repeat=False)
+    else:
+        simulation = animation.FuncAnimation(anim, funcao, blit=blit, frames=frames, interval=intervalo,
+                                             repeat=False, cache_frame_data=False)
+
+    plt.show()
+
+def plotEspectro(frequencias, Zin, S11):
+    """
+    Mostra o módulo do S11 (dB) e a impedância de entrada em função da
+    frequência (ver codigo.respostaFrequencia)
+    """
+    frequencias = np.asarray(frequencias)
+    fig = plt.figure(num = 3, figsize = (8, 6))
+    fig.canvas.set_window_title('Resposta em Frequência')
+    ganho = plt.subplot2grid((2, 1), (0, 0), fig=fig)
+    impedancia = plt.subplot2grid((2, 1), (1, 0), fig=fig)
+
+    ganho.set_title('Coeficiente de reflexão na entrada (S11)')
+    ganho.plot(frequencias/1e6, 20*np.log10(np.abs(S11)), 'r-')
+    ganho.set_ylabel("|S11| (dB)")
+
+    impedancia.set_title('Impedância de entrada')
+    impedancia.plot(frequencias/1e6, Zin.real, 'b-', label='Re(Zin)')
+    impedancia.plot(frequencias/1e6, Zin.imag, 'g-', label='Im(Zin)')
+    impedancia.set_ylabel("Impedância (Ohm)")
+    impedancia.legend()
+
+    for ax in (ganho, impedancia):
+        ax.set_xlabel("Frequência (MHz)")
+        ax.grid(True)
+    fig.tight_layout()
 
     plt.show()
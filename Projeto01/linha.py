@@ -0,0 +1,441 @@
+"""
+Laço principal da simulação da linha de transmissão (equações do
+telegrafista), separado do script de configuração e da animação.
+
+Há dois modos de armazenamento:
+    'completo' - guarda todo o histórico v[n], i[n] (TIME x LEN), como no
+                 código original;
+    'rolante'  - guarda somente a linha atual e a anterior (memória O(LEN)),
+                 registrando apenas as sondas, os instantes pedidos e um
+                 quadro a cada 'velocidade' passos para a animação.
+
+simularLote() avança vários cenários (cargas, fontes) no mesmo laço e
+quadros() é um gerador que entrega os quadros enquanto a simulação avança.
+
+Todas as funções aceitam dtype (np.float64 ou np.float32, metade da
+memória e da banda); as tensões, correntes e constantes C1-C4 são criadas
+nessa precisão (ver comum/precisao.py para o desvio em relação a float64).
+
+Em simular() e quadros() as atualizações de i e v são feitas por trechos
+da linha com comum/executor.py, que pode dividi-las entre threads em
+linhas longas (ver executor.configurar()).
+
+Com comum/instrumentacao.py ligado, os laços medem o tempo de cada fase
+(v como E, i como H, fonte, carga como contorno e registro das sondas e
+quadros) e mostram o progresso.
+
+Com convergencia (ver Convergencia), simular() para assim que a linha
+chega ao regime estacionário: os arrays e as sondas devolvidos têm só os
+passos realmente calculados e o passo em que a simulação parou fica em
+convergencia.passo.
+
+espectroEntrada() acumula a DFT da tensão e da corrente na entrada da linha
+durante a simulação (ver comum/espectro.py), sem guardar o histórico.
+"""
+
+import os
+import sys
+import numpy as np
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from comum import executor, instrumentacao, espectro
+
+def instantesGraficos(TIME):
+    """
+    Retorna os passos de tempo usados nos gráficos estáticos
+    (metade da linha, após uma reflexão e regime estacionário)
+    """
+    return (TIME//20, TIME//10 + TIME//40, TIME - 1)
+
+def posicoesSondas(LEN):
+    """
+    Retorna as sondas nomeadas (fonte, meio e carga) como
+    nome: (índice na grade de tensão, índice na grade de corrente)
+    """
+    return {'fonte': (0, 0),
+            'meio': (LEN//2, LEN//2),
+            'carga': (LEN - 1, LEN)}
+
+def constantes(R, L, G, C, dt, dz):
+    """
+    Calcula as constantes C1, C2, C3 e C4 da atualização
+    """
+    C1 = (-2*dt)/(dt*dz*R+2*dz*L)
+    C2 = (2*L-dt*R)/(2*L+dt*R)
+    C3 = (-2*dt)/(dt*dz*G+2*dz*C)
+    C4 = (2*C-dt*G)/(2*C+dt*G)
+    return C1, C2, C3, C4
+
+def coeficientes(dtype, *valores):
+    """
+    Converte as constantes da atualização para a precisão das tensões e
+    correntes, para que as operações não sejam promovidas para float64
+    """
+    return [np.asarray(valor, dtype=dtype) for valor in valores]
+
+class Convergencia:
+    """
+    Critério de regime estacionário para simular(): as médias de v e i em
+    janelas de 'passos' passos (um tempo de trânsito da linha, por exemplo)
+    são comparadas com as da janela anterior e a linha é considerada
+    estabilizada quando, em 'confirmacoes' janelas seguidas, a fonte ficou
+    constante e a maior variação das médias ficou abaixo de 'tolerancia'
+    vezes o maior valor absoluto já visto nas médias. A média na janela
+    filtra a oscilação espúria que a dispersão da grade deixa atrás das
+    frentes de onda, que numa linha sem perdas quase não decai. Depois da
+    simulação, passo é o passo em que ela parou (None se não parou)
+    """
+    def __init__(self, passos, tolerancia=1e-4, confirmacoes=1):
+        assert passos >= 1, "O intervalo entre os testes deve ter pelo menos um passo"
+        self.passos = passos
+        self.tolerancia = tolerancia
+        self.confirmacoes = confirmacoes
+
+    def __repr__(self):
+        # Usado na chave do cache (ver comum/cache.py)
+        return ("Convergencia(passos=%r, tolerancia=%r, confirmacoes=%r)"
+                % (self.passos, self.tolerancia, self.confirmacoes))
+
+    def iniciar(self, i, v):
+        """
+        Zera as somas da janela (o estado inicial não entra na média)
+        """
+        self.soma = [np.zeros(i.shape), np.zeros(v.shape)]
+        self.anterior = None
+        self.escala = [0, 0]
+        self.seguidos = 0
+        self.passo = None
+
+    def verificar(self, n, i, v, Vs_t):
+        """
+        Acumula o passo n na janela e testa ao fim de cada janela
+        saídas: True se a linha chegou ao regime estacionário
+        """
+        self.soma[0] += i
+        self.soma[1] += v
+        if(n % self.passos != 0):
+            return False
+        medias = [soma/self.passos for soma in self.soma]
+        for soma in self.soma:
+            soma[:] = 0
+        estavel = self.anterior is not None and np.ptp(Vs_t[max(n-2*self.passos, 0):n+1]) == 0
+        for k, media in enumerate(medias):
+            self.escala[k] = max(self.escala[k], np.max(np.abs(media)))
+            if(self.anterior is not None):
+                variacao = np.max(np.abs(media - self.anterior[k]))
+                estavel = estavel and variacao <= self.tolerancia*self.escala[k]
+        self.anterior = medias
+        self.seguidos = self.seguidos + 1 if estavel else 0
+        return self.seguidos >= self.confirmacoes
+
+def simular(Vs_t, LEN, TIME, C1, C2, C3, C4, Rs, Rl, carga,
+            modo='completo', sondas=None, instantes=None, velocidade=1, dtype=np.float64,
+            convergencia=None):
+    """
+    Função que realiza o loop principal da simulação
+    entradas:
+    Vs_t - tensão da fonte em função do tempo (TIME pontos)
+    LEN, TIME - número de pontos no espaço e no tempo
+    C1, C2, C3, C4 - constantes da atualização (ver constantes())
+    Rs, Rl - resistência da fonte e da carga
+    carga - 1 (Rl), 2 (curto) ou 3 (aberto)
+    modo - 'completo' ou 'rolante'
+    sondas - dicionário nome: (índice de v, índice de i), padrão posicoesSondas()
+    instantes - passos de tempo a guardar no modo rolante, padrão instantesGraficos()
+    velocidade - no modo rolante guarda um quadro a cada 'velocidade' passos
+    dtype - precisão das tensões e correntes (np.float64 ou np.float32)
+    convergencia - Convergencia para parar no regime estacionário (None = até TIME)
+    saídas:
+    i, v - no modo completo arrays (TIME, LEN+1) e (TIME, LEN); no modo
+           rolante dicionários passo: linha, indexáveis como os arrays nos
+           passos guardados (e no passo final, se a convergência parou)
+    registro - dicionário nome: (tensão no tempo, corrente no tempo)
+    Se a convergência parar no passo n, os arrays e as sondas terminam em n
+    (n+1 passos em vez de TIME)
+    """
+    assert modo in ('completo', 'rolante'), "Modo de armazenamento inválido!"
+    if(sondas is None):
+        sondas = posicoesSondas(LEN)
+    if(instantes is None):
+        instantes = instantesGraficos(TIME)
+
+    C1, C2, C3, C4 = coeficientes(dtype, C1, C2, C3, C4)
+    idxV = [pos[0] for pos in sondas.values()]
+    idxI = [pos[1] for pos in sondas.values()]
+    sondaV = np.zeros((len(sondas), TIME), dtype=dtype)
+    sondaI = np.zeros((len(sondas), TIME), dtype=dtype)
+
+    if(modo == 'completo'):
+        v = np.zeros((TIME, LEN), dtype=dtype)
+        i = np.zeros((TIME, LEN+1), dtype=dtype)
+    else:
+        # Quadros da animação e instantes dos gráficos estáticos
+        guardar = set(range(0, (TIME//velocidade)*velocidade, velocidade))
+        guardar.update(n for n in instantes if 0 <= n < TIME)
+        vGuardado = {}
+        iGuardado = {}
+        # Somente o passo anterior e o atual ficam na memória
+        vAnt = np.zeros(LEN, dtype=dtype)
+        iAnt = np.zeros(LEN+1, dtype=dtype)
+        vAt = np.zeros(LEN, dtype=dtype)
+        iAt = np.zeros(LEN+1, dtype=dtype)
+        if(0 in guardar):
+            vGuardado[0] = vAnt.copy()
+            iGuardado[0] = iAnt.copy()
+    if(convergencia is not None):
+        convergencia.iniciar(i[0] if modo == 'completo' else iAnt, v[0] if modo == 'completo' else vAnt)
+
+    #Atualizações dos trechos [a, b) dos pontos internos da corrente e da tensão
+    def passoI(a, b):
+        iAt[1+a:1+b] = C1*( vAnt[1+a:1+b] - vAnt[a:b] ) + C2*iAnt[1+a:1+b]
+
+    def passoV(a, b):
+        vAt[a:b] = C3*( iAt[a+1:b+1] - iAt[a:b] ) + C4*vAnt[a:b]
+
+    medidor = instrumentacao.medidor(TIME-1, 'linha', 2*LEN+1)
+    for n in range(1, TIME): #começa em 1 porque condições iniciais são conhecidas
+        if(medidor):
+            medidor.inicio()
+        if(modo == 'completo'):
+            vAnt, iAnt, vAt, iAt = v[n-1], i[n-1], v[n], i[n]
+
+        #Para tomar a tensão no ponto anterior ao analisado (fora do vetor para z=0)
+        #desloca-se o vetor para a direita e adiciona a tensão da fonte
+        executor.executar(passoI, LEN-1)  #iAt[1:-1] = C1*( vAnt[1:] - vAnt[:-1] ) + C2*iAnt[1:-1]
+        if(medidor):
+            medidor.fase('H')
+        iAt[0] = (Vs_t[n-1]-vAnt[0])/Rs
+        if(medidor):
+            medidor.fase('fonte')
+
+        if(carga == 1):
+            iAt[-1] = vAnt[-1]/Rl
+        elif(carga == 2):
+            iAt[-1] = iAt[-2] #CASO EM CURTO (Rl == 0)
+        else:
+            iAt[-1] = 0       #CASO ABERTO (Rl = inf)
+        if(medidor):
+            medidor.fase('contorno')
+
+        #Para tomar a corrente no ponto posterior ao analisado (fora do vetor para a=l)
+        #delosca-se o vetor para a esquerda e adiciona a corrente na carga
+        executor.executar(passoV, LEN)  #vAt[:] = C3*( iAt[1:] - iAt[:-1] ) + C4*vAnt
+        if(medidor):
+            medidor.fase('E')
+
+        sondaV[:, n] = vAt[idxV]
+        sondaI[:, n] = iAt[idxI]
+
+        # Regime estacionário: o passo n é o último calculado
+        parar = convergencia is not None and convergencia.verificar(n, iAt, vAt, Vs_t)
+
+        if(modo == 'rolante'):
+            if(n in guardar or parar):
+                vGuardado[n] = vAt.copy()
+                iGuardado[n] = iAt.copy()
+            # Troca os buffers (o atual vira o anterior)
+            vAnt, vAt = vAt, vAnt
+            iAnt, iAt = iAt, iAnt
+        if(medidor):
+            medidor.fase('registro')
+            medidor.passo(n, i=iAnt if modo == 'rolante' else iAt, v=vAnt if modo == 'rolante' else vAt)
+        if(parar):
+            # Só os passos calculados são devolvidos
+            convergencia.passo = n
+            sondaV = sondaV[:, :n+1]
+            sondaI = sondaI[:, :n+1]
+            if(modo == 'completo'):
+                v = v[:n+1]
+                i = i[:n+1]
+            break
+    if(medidor):
+        medidor.fim()
+
+    registro = {nome: (sondaV[k], sondaI[k]) for k, nome in enumerate(sondas)}
+
+    if(modo == 'completo'):
+        return i, v, registro
+    return iGuardado, vGuardado, registro
+
+def coeficientesCarga(Rl):
+    """
+    Converte as resistências de carga em coeficientes da condição de contorno
+    i[-1] = a*v[-1] + b*i[-2], permitindo tratar todas as cargas com uma só
+    expressão vetorizada
+    entradas:
+    Rl - array de resistências da carga (0 = curto, np.inf = aberto)
+    saídas:
+    a, b - arrays com os coeficientes de cada cenário
+    """
+    Rl = np.asarray(Rl, dtype=float)
+    curto = (Rl == 0)
+    a = np.zeros(Rl.shape)
+    finita = ~curto & np.isfinite(Rl)
+    a[finita] = 1/Rl[finita]
+    b = curto.astype(float)
+    return a, b
+
+def simularLote(Vs_t, LEN, TIME, C1, C2, C3, C4, Rs, Rl,
+                modo='rolante', sondas=None, instantes=None, velocidade=1, dtype=np.float64):
+    """
+    Simula K cenários (cargas, resistências de fonte e fontes diferentes) ao
+    mesmo tempo, empilhados no primeiro eixo dos arrays, de modo que cada
+    passo de tempo avança todos os cenários com uma única expressão
+    entradas:
+    Vs_t - tensões da fonte, array (K, TIME) ou (TIME,) comum a todos
+    LEN, TIME - número de pontos no espaço e no tempo
+    C1, C2, C3, C4 - constantes da atualização (ver constantes())
+    Rs, Rl - resistências da fonte e da carga, escalares ou arrays (K,)
+             (Rl = 0 para curto e Rl = np.inf para aberto)
+    modo, sondas, instantes, velocidade, dtype - como em simular()
+    saídas:
+    i, v - no modo completo arrays (K, TIME, LEN+1) e (K, TIME, LEN); no modo
+           rolante dicionários passo: array (K, LEN+1) ou (K, LEN)
+    registro - dicionário nome: (tensão (K, TIME), corrente (K, TIME))
+    """
+    assert modo in ('completo', 'rolante'), "Modo de armazenamento inválido!"
+    if(sondas is None):
+        sondas = posicoesSondas(LEN)
+    if(instantes is None):
+        instantes = instantesGraficos(TIME)
+
+    Vs_t = np.atleast_2d(Vs_t)
+    Rs = np.atleast_1d(np.asarray(Rs, dtype=float))
+    Rl = np.atleast_1d(np.asarray(Rl, dtype=float))
+    K = max(len(Vs_t), len(Rs), len(Rl))
+    Vs_t = np.broadcast_to(Vs_t, (K, TIME))
+    # Coeficientes das bordas de cada cenário (vetores (K,))
+    gs = np.broadcast_to(1/Rs, (K,))
+    a, b = coeficientesCarga(np.broadcast_to(Rl, (K,)))
+    C1, C2, C3, C4, gs, a, b = coeficientes(dtype, C1, C2, C3, C4, gs, a, b)
+
+    idxV = [pos[0] for pos in sondas.values()]
+    idxI = [pos[1] for pos in sondas.values()]
+    sondaV = np.zeros((len(sondas), K, TIME), dtype=dtype)
+    sondaI = np.zeros((len(sondas), K, TIME), dtype=dtype)
+
+    if(modo == 'completo'):
+        v = np.zeros((K, TIME, LEN), dtype=dtype)
+        i = np.zeros((K, TIME, LEN+1), dtype=dtype)
+    else:
+        guardar = set(range(0, (TIME//velocidade)*velocidade, velocidade))
+        guardar.update(n for n in instantes if 0 <= n < TIME)
+        vGuardado = {}
+        iGuardado = {}
+        vAnt = np.zeros((K, LEN), dtype=dtype)
+        iAnt = np.zeros((K, LEN+1), dtype=dtype)
+        vAt = np.zeros((K, LEN), dtype=dtype)
+        iAt = np.zeros((K, LEN+1), dtype=dtype)
+        if(0 in guardar):
+            vGuardado[0] = vAnt.copy()
+            iGuardado[0] = iAnt.copy()
+
+    medidor = instrumentacao.medidor(TIME-1, 'linha (%d cenários)' % K, K*(2*LEN+1))
+    for n in range(1, TIME):
+        if(medidor):
+            medidor.inicio()
+        if(modo == 'completo'):
+            vAnt, iAnt, vAt, iAt = v[:, n-1], i[:, n-1], v[:, n], i[:, n]
+
+        iAt[:, 1:-1] = C1*( vAnt[:, 1:] - vAnt[:, :-1] ) + C2*iAnt[:, 1:-1]
+        if(medidor):
+            medidor.fase('H')
+        iAt[:, 0] = (Vs_t[:, n-1]-vAnt[:, 0])*gs
+        if(medidor):
+            medidor.fase('fonte')
+        # Carga resistiva, curto e aberto numa só expressão
+        iAt[:, -1] = a*vAnt[:, -1] + b*iAt[:, -2]
+        if(medidor):
+            medidor.fase('contorno')
+
+        vAt[:] = C3*( iAt[:, 1:] - iAt[:, :-1] ) + C4*vAnt
+        if(medidor):
+            medidor.fase('E')
+
+        sondaV[:, :, n] = vAt[:, idxV].T
+        sondaI[:, :, n] = iAt[:, idxI].T
+
+        if(modo == 'rolante'):
+            if(n in guardar):
+                vGuardado[n] = vAt.copy()
+                iGuardado[n] = iAt.copy()
+            vAnt, vAt = vAt, vAnt
+            iAnt, iAt = iAt, iAnt
+        if(medidor):
+            medidor.fase('registro')
+            medidor.passo(n, i=iAnt if modo == 'rolante' else iAt, v=vAnt if modo == 'rolante' else vAt)
+    if(medidor):
+        medidor.fim()
+
+    registro = {nome: (sondaV[k], sondaI[k]) for k, nome in enumerate(sondas)}
+
+    if(modo == 'completo'):
+        return i, v, registro
+    return iGuardado, vGuardado, registro
+
+def quadros(Vs_t, LEN, TIME, C1, C2, C3, C4, Rs, Rl, carga, velocidade=1, instantes=(), dtype=np.float64):
+    """
+    Gerador que avança a simulação e entrega (n, i, v) a cada 'velocidade'
+    passos e nos passos listados em 'instantes', guardando só o passo atual
+    (a animação pode começar antes do fim da simulação)
+    entradas como em simular()
+    Os arrays entregues são os da própria simulação: copie-os para guardar.
+    """
+    instantes = set(instantes)
+    C1, C2, C3, C4 = coeficientes(dtype, C1, C2, C3, C4)
+    # Condições iniciais, as atualizações podem ser feitas no próprio array
+    # porque cada ponto só depende dos valores anteriores no mesmo índice
+    v = np.zeros(LEN, dtype=dtype)
+    i = np.zeros(LEN+1, dtype=dtype)
+    yield 0, i, v
+
+    #Atualizações dos trechos [a, b) (como em simular())
+    def passoI(a, b):
+        i[1+a:1+b] = C1*( v[1+a:1+b] - v[a:b] ) + C2*i[1+a:1+b]
+
+    def passoV(a, b):
+        v[a:b] = C3*( i[a+1:b+1] - i[a:b] ) + C4*v[a:b]
+
+    medidor = instrumentacao.medidor(TIME-1, 'linha', 2*LEN+1)
+    for n in range(1, TIME):
+        if(medidor):
+            medidor.inicio()
+        executor.executar(passoI, LEN-1)
+        if(medidor):
+            medidor.fase('H')
+        i[0] = (Vs_t[n-1]-v[0])/Rs
+        if(medidor):
+            medidor.fase('fonte')
+
+        if(carga == 1):
+            i[-1] = v[-1]/Rl
+        elif(carga == 2):
+            i[-1] = i[-2] #CASO EM CURTO (Rl == 0)
+        else:
+            i[-1] = 0     #CASO ABERTO (Rl = inf)
+        if(medidor):
+            medidor.fase('contorno')
+
+        executor.executar(passoV, LEN)
+        if(medidor):
+            medidor.fase('E')
+            medidor.passo(n, i=i, v=v)
+
+        if(n % velocidade == 0 or n in instantes):
+            yield n, i, v
+    if(medidor):
+        medidor.fim()
+
+def espectroEntrada(Vs_t, LEN, TIME, C1, C2, C3, C4, Rs, Rl, carga, frequencias, dt, dtype=np.float64):
+    """
+    Função que simula a linha acumulando a DFT da tensão e da corrente na
+    entrada, no ponto de v[0] (i é a média de i[0] e i[1], meio passo antes)
+    entradas como em simular(), mais as frequências (Hz) e o passo dt
+    saídas:
+    V, I - transformadas da tensão e da corrente (complexas, uma por frequência)
+    """
+    monitores = [espectro.Monitor(frequencias, dt, 'v', 0),
+                 espectro.Monitor(frequencias, dt, 'i', slice(0, 2), -0.5)]
+    espectro.acumular(quadros(Vs_t, LEN, TIME, C1, C2, C3, C4, Rs, Rl, carga, dtype=dtype),
+                      monitores, ('i', 'v'))
+    V, I = [monitor.resultado() for monitor in monitores]
+    return V, I.mean(axis=1)
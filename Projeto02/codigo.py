@@ -2,12 +2,19 @@
 Esse programa realiza uma simualação segundo a equação de onda pelo
 método da FDTD, em particular para uma onda elétromagnética e
 considerando um fenômeno de refração/reflexão
+
+Importado como módulo só define a configuração, calculo() e simulacao(),
+sem simular nem importar o matplotlib; a simulação e os gráficos rodam
+quando o arquivo é executado como script.
 """
 
+import os
+import sys
 import numpy as np
 from scipy.constants import c
-import matplotlib.pyplot as plt
-import matplotlib.ticker as ticker
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from comum import cache, autoajuste, precisao, instrumentacao, materiais
+import onda
 ########### Configurações da simulação #########
 L = 1               # Comprimento do espaço em metros
 T = 1*L/c           # Tempo da simulação em segundos
@@ -16,6 +23,7 @@ S_REFRAC = 0.25     # "Fator de courrant" do segundo meio
 TRANSICAO = 1       # Ponto a partir do qual começa o segundo meio
 DX = 5e-3           # Precisão do comprimento   
 LEN = int(L/DX)     # Quantidade de pontos do espaço simulados (automático)
+ORDEM = 2           # Ordem da diferença espacial: 2 ou 4 (FDTD(2,4), estável até S = sqrt(3)/2, ver onda.py)
 
 #Configuracoes do grafico1
 YMin = None
@@ -24,22 +32,20 @@ plotarS1 = False    # Plotar um outro gráfico pontilhado para S = 1
 
 #Comfiguracoes do grafico2 [ variando o n (TIME) ]
 plotGrafico2 = True    # Define se o grafico variando o n sera plotado (as configuracoes do grafico 1 sera ignoradas)
+usarCache = True    # Reaproveita resultados já calculados (ver comum/cache.py)
+erroFaseMax = None  # Erro máximo da velocidade de fase (%) para ajustar DX automaticamente (None = fixo);
+                    # com o pulso retangular de campoFonte() o ajuste refina a grade (ver comum/autoajuste.py)
+dtype = np.float64  # Precisão do campo (np.float32 usa metade da memória)
+relatorioPrecisao = False   # Mostra o desvio máximo do resultado em relação a float64 (ver comum/precisao.py)
+instrumentar = False    # Mostra o progresso e o tempo de cada fase do laço (ver comum/instrumentacao.py)
+janelaAtiva = True  # Calcula só os pontos já alcançados pela onda (resultado idêntico, ver onda.py)
 # As constantes ligadas ao tempo são determinadas por S
 #################################################
 
-def calculo(S=S, S_REFRAC=S_REFRAC):
+def campoFonte(DT, TIME):
     """
-    Função que realiza loop principal da simulação
+    Campo imposto na borda esquerda em função do tempo, amostrado com passo DT
     """
-    # Constantes importantes para a simulação
-    DT = S*DX/c         # passo de tempo
-    TIME = int(T/DT)    # duração da simulação (Número de passos de tempo)
-    # Verificação de memória < 2GB (para nao dar problema no PC)
-    memoria = TIME*LEN*8
-    assert (memoria < 2*(2**30)), ("parâmetros consomem muita memoria: "
-                                   + str(memoria/(2**30)) + "GB")
-
-    # Campo na fonte em função do tempo
     # Pulso retangular
     #E_t = np.zeros(TIME)    # V/m
     #E_t[0:int(0.2*(L/c)/DT)] = 1
@@ -50,119 +56,198 @@ def calculo(S=S, S_REFRAC=S_REFRAC):
     pulso = np.linspace(-3.3, 3.3, num=comprimento)
     pulso = np.exp(-(pulso)**2)
     E_t[:comprimento] = pulso
+    return E_t
+
+# Troca DX pela grade mais grossa que respeita erroFaseMax nos dois meios
+# (no segundo meio a velocidade, e portanto o comprimento de onda, é
+# S_REFRAC/S vezes a do primeiro)
+if(erroFaseMax is not None):
+    DT = S*DX/c
+    DX = min(autoajuste.ajustarGrade('onda' if ORDEM == 2 else 'onda4', campoFonte(DT, int(T/DT)), DT, c*Smeio/S,
+                                     erroFaseMax, S=Smeio)['dx']
+             for Smeio in (S, S_REFRAC))
+    LEN = int(L/DX)
+
+def calculo(S=S, S_REFRAC=S_REFRAC, tempo=None, estado=None, dtype=dtype, TRANSICAO=TRANSICAO, ordem=ORDEM):
+    """
+    Função que realiza loop principal da simulação
+    entradas:
+    tempo - instante final da simulação (padrão T)
+    estado - estado retornado por uma chamada anterior, para continuar a
+             simulação a partir dele em vez de recomeçar de t = 0
+    dtype - precisão do campo (np.float64 ou np.float32)
+    TRANSICAO - posição relativa do início do segundo meio
+    ordem - ordem da diferença espacial (2 ou 4)
+    saídas:
+    E - campo nos passos calculados nesta chamada
+    estado - duas últimas linhas de E, o índice do passo e os parâmetros
+             (ordem, precisão), para continuar
+    """
+    if(tempo is None):
+        tempo = T
+    # Constantes importantes para a simulação
+    DT = S*DX/c         # passo de tempo
+    TIME = int(tempo/DT)    # duração da simulação (Número de passos de tempo)
+    # Passo a partir do qual a simulação continua (0 se começar do zero)
+    if(estado is None):
+        inicio = 0
+    else:
+        assert estado['S'] == (S, S_REFRAC, TRANSICAO), "O estado pertence a outra simulação"
+        assert (estado['ordem'], estado['dtype']) == (ordem, np.dtype(dtype).str), \
+            "O estado foi calculado com outra ordem ou outra precisão"
+        inicio = estado['n']
+    assert TIME > inicio + 1, "O tempo pedido deve ser maior que o do estado"
+
+    # Verificação de memória < 2GB (para nao dar problema no PC)
+    memoria = (TIME-inicio+1)*LEN*np.dtype(dtype).itemsize
+    assert (erroFaseMax is None or memoria < 2*(2**30)), autoajuste.mensagemRefino(erroFaseMax, DX)
+    assert (memoria < 2*(2**30)), ("parâmetros consomem muita memoria: "
+                                   + str(memoria/(2**30)) + "GB")
+
+    # Campo na fonte em função do tempo
+    E_t = campoFonte(DT, TIME)    # V/m
 
-    # Condições iniciais
-    E0 = np.zeros(LEN+2)  # V/m
+    # Condições iniciais (campo em repouso até t = 0)
+    E0 = np.zeros(LEN+2, dtype=dtype)  # V/m
 
     # Array para armazenar e processar os dados
-    E = np.empty((TIME, LEN+2))  # +2 para comportar condições de contorno
-    E[0] = E0
-    E[:, 0] = E_t
+    # A linha k corresponde ao passo inicio-1+k, as duas primeiras linhas são
+    # as condições iniciais ou as duas últimas do estado anterior
+    E = np.empty((TIME-inicio+1, LEN+2), dtype=dtype)  # +2 para comportar condições de contorno
+    if(estado is None):
+        E[0] = E0
+        E[1] = E0
+        E[1, 0] = E_t[0]
+    else:
+        E[:2] = estado['E']
+    E[2:, 0] = E_t[inicio+1:]
 
     QUEBRA = int((TRANSICAO*LEN-2)+1)
+    # Mapa do fator de Courant nos pontos 1..LEN, com o segundo meio a partir
+    # de QUEBRA (ver comum/materiais.py)
+    meio = materiais.Mapa(LEN, S=S).pintar(slice(max(QUEBRA-1, 0), None), S=S_REFRAC)
 
-    # Loop principal da simulação
-    for n in range(1, TIME):  # começa em 1 porque condições iniciais são conhecidas
-        # Cálculo do campo elétrico antes da mudança de meio
-        E[n][1:QUEBRA] = ((S**2)*(E[n-1, 2:QUEBRA+1] + E[n-1, :QUEBRA-1] - 2*E[n-1, 1:QUEBRA])
-                          + 2*E[n-1][1:QUEBRA] - E[n-2][1:QUEBRA])
-        # Cálculo do campo elétrico depois da mudança de meio
-        E[n][QUEBRA:-1] = ((S_REFRAC**2)*(E[n-1, QUEBRA+1:] + E[n-1, QUEBRA-1:-2] - 2*E[n-1, QUEBRA:-1])
-                           + 2*E[n-1][QUEBRA:-1] - E[n-2][QUEBRA:-1])
-        # Condição de contorno na borda final
-        E[n, -1] = E[n, -2]
-
-    return E
-
-##### Plot do gráfico #####
-# Configura a figura
-fig, plotPulsos = plt.subplots()
-fig.canvas.set_window_title('Figura')
-fig.suptitle('Propagação do Pulso', fontsize=16)
-
-# Plota os dados
-#Verifica se existe uma interface (dois meios distintos)
-if(not plotGrafico2):
-    if(TRANSICAO == 1): 
-        if(plotarS1):
-            plotPulsos.plot(calculo(S=1, S_REFRAC=1)[-1],
-                            '--', color='black', label='S = 1')
-        plotPulsos.plot(calculo()[-1], color='C0', label='S = ' + str(S))
-        # Legenda
-        plt.legend()
-    else:
-        plt.axvline(x=TRANSICAO*LEN, linestyle = '--' ,color = 'black')
-        plotPulsos.plot(calculo()[-1], color='C0')
+    # Loop principal da simulação (ver onda.py)
+    onda.meioVariavel(E, materiais.quadradoCourant(meio, dtype), janela=janelaAtiva, ordem=ordem)
+
+    estado = {'E': E[-2:].copy(), 'n': TIME-1, 'S': (S, S_REFRAC, TRANSICAO),
+              'ordem': ordem, 'dtype': np.dtype(dtype).str}
+    if(inicio == 0):
+        return E[1:], estado
+    return E[2:], estado
+
+def simulacao(**kwargs):
+    """
+    Chama calculo() passando pelo cache, a chave inclui os parâmetros
+    globais usados por calculo()
+    """
+    if(not usarCache):
+        return calculo(**kwargs)
+    return cache.memorizar(calculo, kwargs=kwargs,
+                           parametros={'L': L, 'T': T, 'DX': DX, 'campoFonte': campoFonte, 'dtype': dtype, 'TRANSICAO': TRANSICAO, 'ORDEM': ORDEM, 'laco': onda.meioVariavel,
+                                       'meio': materiais.quadradoCourant})
+
+if __name__ == "__main__":
+    import matplotlib.pyplot as plt
+    import matplotlib.ticker as ticker
+
+    instrumentacao.configurar(instrumentar)
+
+    if(relatorioPrecisao):
+        precisao.relatorio(simulacao(), calculo)
+
+    ##### Plot do gráfico #####
+    # Configura a figura
+    fig, plotPulsos = plt.subplots()
+    fig.canvas.set_window_title('Figura')
+    fig.suptitle('Propagação do Pulso', fontsize=16)
+
+    # Plota os dados
+    #Verifica se existe uma interface (dois meios distintos)
+    if(not plotGrafico2):
+        if(TRANSICAO == 1): 
+            if(plotarS1):
+                plotPulsos.plot(simulacao(S=1, S_REFRAC=1)[0][-1],
+                                '--', color='black', label='S = 1')
+            plotPulsos.plot(simulacao()[0][-1], color='C0', label='S = ' + str(S))
+            # Legenda
+            plt.legend()
+        else:
+            plt.axvline(x=TRANSICAO*LEN, linestyle = '--' ,color = 'black')
+            plotPulsos.plot(simulacao()[0][-1], color='C0')
     
-    # Seta os limites para o eixo x
-    plotPulsos.set_xlim(0, LEN)
+        # Seta os limites para o eixo x
+        plotPulsos.set_xlim(0, LEN)
 
-    # Seta os limites para o eixo y
-    if(YMin != None and YMax != None):
-        plotPulsos.set_ylim(YMin, YMax)
+        # Seta os limites para o eixo y
+        if(YMin != None and YMax != None):
+            plotPulsos.set_ylim(YMin, YMax)
     
-    # Seta os ticks
-    plotPulsos.xaxis.set_tick_params(which="major", top=True, direction="in")
-    plotPulsos.xaxis.set_tick_params(which="minor", top=True, direction="in")
-    plotPulsos.xaxis.set_major_locator(ticker.AutoLocator())
-    plotPulsos.xaxis.set_minor_locator(ticker.AutoMinorLocator())
-
-    plotPulsos.yaxis.set_tick_params(which="major", right=True, direction="in")
-    plotPulsos.yaxis.set_tick_params(which="minor", right=True, direction="in")
-    plotPulsos.yaxis.set_major_locator(ticker.AutoLocator())
-    plotPulsos.yaxis.set_minor_locator(ticker.AutoMinorLocator())
-
-    #Nomeia os eixos
-    plotPulsos.set_xlabel('Coordenada i na Grade')
-    plotPulsos.set_ylabel('Função de Onda u(i)')
-
-else: #Caso a escolha seja plotar o grafico com TIME variando
-    fig2, plotPulsos2 = plt.subplots()
-    fig2.canvas.set_window_title('Figura')
-    fig.suptitle('Propagação do Pulso Variando o TIME (S = ' + str(S) + ')', fontsize=12)
-    fig2.suptitle('Propagação do Pulso Variando o TIME com Foco no Início (S = ' + str(S) + ')', fontsize=12)
-    T = 1.205*L/c
-    plotPulsos.plot(calculo()[-1], color='black', label='TIME = ' + str(int(T/(S*DX/c))))
-    plotPulsos2.plot(calculo()[-1], color='black', label='TIME = ' + str(int(T/(S*DX/c))))
-    T = (T*c/L + 0.0495)*L/c #Incrementa o T (para incrementar o TIME)
-    plotPulsos.plot(calculo()[-1], color='gray', label='TIME = ' + str(int(T/(S*DX/c))))
-    plotPulsos2.plot(calculo()[-1], color='gray', label='TIME = ' + str(int(T/(S*DX/c))))
-    T = (T*c/L + 0.0495)*L/c #Incrementa o T (para incrementar o TIME)
-    plotPulsos.plot(calculo()[-1], color='silver', label='TIME = ' + str(int(T/(S*DX/c))))
-    plotPulsos2.plot(calculo()[-1], color='silver', label='TIME = ' + str(int(T/(S*DX/c))))
-    plotPulsos.legend()
-    plotPulsos2.legend()
-
-    # Seta os limites para o eixo x
-    plotPulsos.set_xlim(0, LEN)
-    plotPulsos2.set_xlim(0, LEN/10)
-
-    # Seta os limites para o eixo y
-    plotPulsos2.set_ylim(-0.05, 0.05)
-
-    # Seta os ticks
-    plotPulsos.xaxis.set_tick_params(which="major", top=True, direction="in")
-    plotPulsos.xaxis.set_tick_params(which="minor", top=True, direction="in")
-    plotPulsos.xaxis.set_major_locator(ticker.AutoLocator())
-    plotPulsos.xaxis.set_minor_locator(ticker.AutoMinorLocator())
-    plotPulsos2.xaxis.set_tick_params(which="major", top=True, direction="in")
-    plotPulsos2.xaxis.set_tick_params(which="minor", top=True, direction="in")
-    plotPulsos2.xaxis.set_major_locator(ticker.AutoLocator())
-    plotPulsos2.xaxis.set_minor_locator(ticker.AutoMinorLocator())
-
-    plotPulsos.yaxis.set_tick_params(which="major", right=True, direction="in")
-    plotPulsos.yaxis.set_tick_params(which="minor", right=True, direction="in")
-    plotPulsos.yaxis.set_major_locator(ticker.AutoLocator())
-    plotPulsos.yaxis.set_minor_locator(ticker.AutoMinorLocator())
-    plotPulsos2.yaxis.set_tick_params(which="major", right=True, direction="in")
-    plotPulsos2.yaxis.set_tick_params(which="minor", right=True, direction="in")
-    plotPulsos2.yaxis.set_major_locator(ticker.AutoLocator())
-    plotPulsos2.yaxis.set_minor_locator(ticker.AutoMinorLocator())
-
-    #Nomeia os eixos
-    plotPulsos.set_xlabel('Coordenada i na Grade')
-    plotPulsos.set_ylabel('Função de Onda u(i)')
-    plotPulsos2.set_xlabel('Coordenada i na Grade')
-    plotPulsos2.set_ylabel('Função de Onda u(i)')
-
-plt.show()
+        # Seta os ticks
+        plotPulsos.xaxis.set_tick_params(which="major", top=True, direction="in")
+        plotPulsos.xaxis.set_tick_params(which="minor", top=True, direction="in")
+        plotPulsos.xaxis.set_major_locator(ticker.AutoLocator())
+        plotPulsos.xaxis.set_minor_locator(ticker.AutoMinorLocator())
+
+        plotPulsos.yaxis.set_tick_params(which="major", right=True, direction="in")
+        plotPulsos.yaxis.set_tick_params(which="minor", right=True, direction="in")
+        plotPulsos.yaxis.set_major_locator(ticker.AutoLocator())
+        plotPulsos.yaxis.set_minor_locator(ticker.AutoMinorLocator())
+
+        #Nomeia os eixos
+        plotPulsos.set_xlabel('Coordenada i na Grade')
+        plotPulsos.set_ylabel('Função de Onda u(i)')
+
+    else: #Caso a escolha seja plotar o grafico com TIME variando
+        fig2, plotPulsos2 = plt.subplots()
+        fig2.canvas.set_window_title('Figura')
+        fig.suptitle('Propagação do Pulso Variando o TIME (S = ' + str(S) + ')', fontsize=12)
+        fig2.suptitle('Propagação do Pulso Variando o TIME com Foco no Início (S = ' + str(S) + ')', fontsize=12)
+        T = 1.205*L/c
+        E, estado = simulacao()
+        plotPulsos.plot(E[-1], color='black', label='TIME = ' + str(int(T/(S*DX/c))))
+        plotPulsos2.plot(E[-1], color='black', label='TIME = ' + str(int(T/(S*DX/c))))
+        T = (T*c/L + 0.0495)*L/c #Incrementa o T (para incrementar o TIME)
+        E, estado = simulacao(estado=estado) # Continua do T anterior
+        plotPulsos.plot(E[-1], color='gray', label='TIME = ' + str(int(T/(S*DX/c))))
+        plotPulsos2.plot(E[-1], color='gray', label='TIME = ' + str(int(T/(S*DX/c))))
+        T = (T*c/L + 0.0495)*L/c #Incrementa o T (para incrementar o TIME)
+        E, estado = simulacao(estado=estado) # Continua do T anterior
+        plotPulsos.plot(E[-1], color='silver', label='TIME = ' + str(int(T/(S*DX/c))))
+        plotPulsos2.plot(E[-1], color='silver', label='TIME = ' + str(int(T/(S*DX/c))))
+        plotPulsos.legend()
+        plotPulsos2.legend()
+
+        # Seta os limites para o eixo x
+        plotPulsos.set_xlim(0, LEN)
+        plotPulsos2.set_xlim(0, LEN/10)
+
+        # Seta os limites para o eixo y
+        plotPulsos2.set_ylim(-0.05, 0.05)
+
+        # Seta os ticks
+        plotPulsos.xaxis.set_tick_params(which="major", top=True, direction="in")
+        plotPulsos.xaxis.set_tick_params(which="minor", top=True, direction="in")
+        plotPulsos.xaxis.set_major_locator(ticker.AutoLocator())
+        plotPulsos.xaxis.set_minor_locator(ticker.AutoMinorLocator())
+        plotPulsos2.xaxis.set_tick_params(which="major", top=True, direction="in")
+        plotPulsos2.xaxis.set_tick_params(which="minor", top=True, direction="in")
+        plotPulsos2.xaxis.set_major_locator(ticker.AutoLocator())
+        plotPulsos2.xaxis.set_minor_locator(ticker.AutoMinorLocator())
+
+        plotPulsos.yaxis.set_tick_params(which="major", right=True, direction="in")
+        plotPulsos.yaxis.set_tick_params(which="minor", right=True, direction="in")
+        plotPulsos.yaxis.set_major_locator(ticker.AutoLocator())
+        plotPulsos.yaxis.set_minor_locator(ticker.AutoMinorLocator())
+        plotPulsos2.yaxis.set_tick_params(which="major", right=True, direction="in")
+        plotPulsos2.yaxis.set_tick_params(which="minor", right=True, direction="in")
+        plotPulsos2.yaxis.set_major_locator(ticker.AutoLocator())
+        plotPulsos2.yaxis.set_minor_locator(ticker.AutoMinorLocator())
+
+        #Nomeia os eixos
+        plotPulsos.set_xlabel('Coordenada i na Grade')
+        plotPulsos.set_ylabel('Função de Onda u(i)')
+        plotPulsos2.set_xlabel('Coordenada i na Grade')
+        plotPulsos2.set_ylabel('Função de Onda u(i)')
+
+    plt.show()
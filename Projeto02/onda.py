@@ -0,0 +1,94 @@
+"""
+Laços principais da equação de onda de segunda ordem (FDTD), separados
+dos scripts de configuração e dos gráficos.
+
+O laço avança um array E (passos, LEN+2) no próprio lugar: as duas
+primeiras linhas (condições iniciais ou estado anterior) e a coluna 0
+(campo imposto na borda esquerda) já devem estar preenchidas.
+
+Com comum/instrumentacao.py ligado, o laço mede o tempo da atualização
+de E e da borda final e mostra o progresso.
+
+Com janela=True só são calculados os pontos que a onda já pode ter
+alcançado: o estêncil anda um ponto por passo (qualquer que seja S), então
+partindo da borda esquerda e do que já é não nulo nas duas primeiras
+linhas, o resto da linha é só zerado. O resultado é idêntico, bit a bit,
+ao da linha inteira.
+
+Com ordem=4, meioVariavel() usa o laplaciano de quarta ordem
+(-E[i+2] + 16*E[i+1] - 30*E[i] + 16*E[i-1] - E[i-2])/12 (FDTD(2,4)) nos
+pontos 2..LEN-1 e o de segunda ordem nos pontos 1 e LEN, vizinhos das
+bordas; o estêncil anda dois pontos por passo, o limite de estabilidade
+cai para S = sqrt(3)/2 e o erro de fase cai bem mais rápido com a
+densidade da grade (ver comum/dispersao.py).
+
+meioVariavel() recebe o quadrado do fator de Courant em cada ponto (um
+mapa de comum/materiais.py) e faz a atualização numa única expressão,
+qualquer que seja o número de interfaces (os dois meios de codigo.py e o
+ponto diferente de um_ponto.py são só mapas diferentes).
+"""
+
+import os
+import sys
+import numpy as np
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from comum import instrumentacao
+
+def alcanceInicial(E, janela):
+    """
+    Primeiro índice a partir do qual as duas primeiras linhas de E são
+    nulas (pelo menos 1, a fonte), ou o fim da linha sem janela
+    """
+    if(not janela):
+        return E.shape[1]
+    naoNulos = np.flatnonzero(np.any(E[:2] != 0, axis=0))
+    return max(1, naoNulos[-1] + 1 if len(naoNulos) else 0)
+
+def meioVariavel(E, S2, janela=False, ordem=2):
+    """
+    Função que realiza o loop principal com o meio dado por um mapa
+    entradas:
+    E - array (passos, LEN+2) a preencher a partir da linha 2
+    S2 - quadrado do fator de Courant nos pontos 1..LEN (array com LEN
+         valores, ver comum/materiais.py, ou constante)
+    janela - calcula só os pontos já alcançados pela onda (ver acima)
+    ordem - ordem da diferença espacial, 2 ou 4 (ver acima)
+    """
+    assert ordem in (2, 4), "Ordem inválida!"
+    S2 = np.broadcast_to(S2, (E.shape[1]-2,))
+    LEN = E.shape[1]-2
+    # As linhas n-1 e n-2 só podem ser não nulas nos pontos [0, alcance)
+    alcance = alcanceInicial(E, janela)
+    medidor = instrumentacao.medidor(len(E)-1, 'onda (mapa)', E.shape[1]-2, primeiro=2)
+    for n in range(2, len(E)):  # começa em 2 porque as duas primeiras linhas são conhecidas
+        if(medidor):
+            medidor.inicio()
+        fim = min(alcance+ordem//2, E.shape[1]-1)
+        if(ordem == 4):
+            # Pontos 2..LEN-1 com o laplaciano de cinco pontos e os pontos 1
+            # e LEN, vizinhos das bordas, com o de três
+            m = min(fim, LEN)
+            E[n][2:m] = (S2[1:m-1]*(16*(E[n-1, 3:m+1] + E[n-1, 1:m-1]) - (E[n-1, 4:m+2] + E[n-1, :m-2])
+                                    - 30*E[n-1, 2:m])/12
+                         + 2*E[n-1][2:m] - E[n-2][2:m])
+            for i in {1, LEN}:
+                if(i < fim):
+                    E[n][i] = (S2[i-1]*(E[n-1, i+1] + E[n-1, i-1] - 2*E[n-1, i])
+                               + 2*E[n-1][i] - E[n-2][i])
+        else:
+            # Cálculo do campo elétrico com o S² de cada ponto
+            E[n][1:fim] = (S2[:fim-1]*(E[n-1, 2:fim+1] + E[n-1, :fim-1] - 2*E[n-1, 1:fim])
+                           + 2*E[n-1][1:fim] - E[n-2][1:fim])
+        # Pontos ainda não alcançados
+        E[n][fim:-1] = 0
+        alcance = fim
+        if(medidor):
+            medidor.fase('E')
+        # Condição de contorno na borda final
+        E[n, -1] = E[n, -2]
+        if(medidor):
+            medidor.fase('contorno')
+            medidor.passo(n, E=E[n])
+    if(medidor):
+        medidor.fim()
+    return E
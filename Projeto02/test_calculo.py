@@ -0,0 +1,37 @@
+"""
+Testes da continuação das simulações de codigo.py e um_ponto.py:
+continuar a partir do estado dá o mesmo resultado, bit a bit, que simular
+de uma vez, e um estado de outra configuração é recusado.
+"""
+
+import numpy as np
+import pytest
+import codigo
+import um_ponto
+
+@pytest.mark.parametrize('dtype', [np.float64, np.float32])
+@pytest.mark.parametrize('ordem', [2, 4])
+def test_continuar_codigo(ordem, dtype):
+    # S abaixo do limite da quarta ordem
+    opcoes = {'S': 0.8, 'ordem': ordem, 'dtype': dtype}
+    inteiro, _ = codigo.calculo(tempo=3*codigo.T, **opcoes)
+    inicio, estado = codigo.calculo(tempo=2*codigo.T, **opcoes)
+    resto, _ = codigo.calculo(tempo=3*codigo.T, estado=estado, **opcoes)
+    assert np.array_equal(np.concatenate([inicio, resto]), inteiro)
+
+@pytest.mark.parametrize('dtype', [np.float64, np.float32])
+def test_continuar_um_ponto(dtype):
+    inteiro, _ = um_ponto.calculo(tempo=1.5*um_ponto.T, dtype=dtype)
+    inicio, estado = um_ponto.calculo(dtype=dtype)
+    resto, _ = um_ponto.calculo(tempo=1.5*um_ponto.T, estado=estado, dtype=dtype)
+    assert np.array_equal(np.concatenate([inicio, resto]), inteiro)
+
+def test_estado_de_outra_configuracao():
+    _, estado = codigo.calculo(S=0.8, tempo=2*codigo.T)
+    with pytest.raises(AssertionError):
+        codigo.calculo(S=0.8, tempo=3*codigo.T, estado=estado, ordem=4)
+    with pytest.raises(AssertionError):
+        codigo.calculo(S=0.8, tempo=3*codigo.T, estado=estado, dtype=np.float32)
+    _, estado = um_ponto.calculo()
+    with pytest.raises(AssertionError):
+        um_ponto.calculo(tempo=1.5*um_ponto.T, estado=estado, dtype=np.float32)
@@ -0,0 +1,36 @@
+"""
+Testes do laço da equação de onda (onda.py): a janela ativa dá o mesmo
+resultado, bit a bit, que a linha inteira, também partindo de um estado e
+com o laplaciano de quarta ordem.
+"""
+
+import numpy as np
+import pytest
+import onda
+from comum import materiais
+
+LEN, TIME = 60, 150
+
+def _campo():
+    """
+    Array E com as condições iniciais nulas e um pulso gaussiano na borda
+    """
+    E = np.zeros((TIME, LEN+2))
+    E[1:, 0] = np.exp(-((np.arange(TIME-1) - 15)/5.0)**2)
+    return E
+
+def _meio(S=0.8, S_REFRAC=0.4):
+    # Dois meios, como em codigo.py
+    meio = materiais.Mapa(LEN, S=S).pintar(slice(LEN//2, None), S=S_REFRAC)
+    return materiais.quadradoCourant(meio)
+
+@pytest.mark.parametrize('ordem', [2, 4])
+def test_janela_identica(ordem):
+    inteiro = onda.meioVariavel(_campo(), _meio(), ordem=ordem)
+    assert np.array_equal(onda.meioVariavel(_campo(), _meio(), janela=True, ordem=ordem), inteiro)
+
+    # Partindo das duas linhas de um passo intermediário, com a onda ainda
+    # longe da borda final
+    parte = _campo()[40:]
+    parte[:2] = inteiro[40:42]
+    assert np.array_equal(onda.meioVariavel(parte, _meio(), janela=True, ordem=ordem), inteiro[40:])
@@ -2,12 +2,19 @@
 Esse programa realiza uma simualação segundo a equação de onda pelo
 método da FDTD, em particular para uma onda elétromagnética e
 considerando um fenômeno de refração/reflexão
+
+Importado como módulo só define a configuração, calculo() e simulacao(),
+sem simular nem importar o matplotlib; a simulação e os gráficos rodam
+quando o arquivo é executado como script.
 """
 
+import os
+import sys
 import numpy as np
 from scipy.constants import c
-import matplotlib.pyplot as plt
-import matplotlib.ticker as ticker
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from comum import cache, autoajuste, precisao, instrumentacao, materiais
+import onda
 # Configurações da simulação
 L = 1               # Comprimento do espaço em metros
 T = 1.105*L/c       # Tempo da simulação em segundos
@@ -16,23 +23,18 @@ S_DIFF = 1.075      # "Fator de courrant" do ponto diferente
 DIFF_POS = 0.45     # Posição do ponto diferente
 DX = 5e-3           # Precisão do comprimento
 LEN = int(L/DX)     # Quantidade de pontos do espaço simulados (automático)
+usarCache = True    # Reaproveita resultados já calculados (ver comum/cache.py)
+erroFaseMax = None  # Erro máximo da velocidade de fase (%) para ajustar DX automaticamente (None = fixo);
+                    # com o pulso retangular de campoFonte() o ajuste refina a grade (ver comum/autoajuste.py)
+dtype = np.float64  # Precisão do campo (np.float32 usa metade da memória)
+relatorioPrecisao = False   # Mostra o desvio máximo do resultado em relação a float64 (ver comum/precisao.py)
+instrumentar = False    # Mostra o progresso e o tempo de cada fase do laço (ver comum/instrumentacao.py)
 # As constantes ligadas ao tempo são determinadas por S
 
-def calculo(S=S, S_DIFF=S_DIFF):
+def campoFonte(DT, TIME):
     """
-    Função que realiza loop principal da simulação
+    Campo imposto na borda esquerda em função do tempo, amostrado com passo DT
     """
-
-    # Constantes importantes para a simulação
-    DT = S*DX/c         # passo de tempo
-    TIME = int(T/DT)    # duração da simulação (Número de passos de tempo)
-
-    # Verificação de memória < 2GB (para nao dar problema no PC)
-    memoria = TIME*LEN*8
-    assert (memoria < 2*(2**30)), ("parâmetros consomem muita memoria: "
-                                   + str(memoria/(2**30)) + "GB")
-
-    # Campo na fonte em função do tempo
     # Pulso retangular
     #E_t = np.zeros(TIME)    # V/m
     #E_t[0:int(0.2*(L/c)/DT)] = 1
@@ -44,80 +46,154 @@ def calculo(S=S, S_DIFF=S_DIFF):
     pulso = np.linspace(-6, 6, num=comprimento)
     pulso = np.exp(-(pulso)**2)
     E_t[:comprimento] = pulso
+    return E_t
+
+# Troca DX pela grade mais grossa que respeita erroFaseMax
+if(erroFaseMax is not None):
+    DT = S*DX/c
+    DX = autoajuste.ajustarGrade('onda', campoFonte(DT, int(T/DT)), DT, c,
+                                 erroFaseMax, S=S)['dx']
+    LEN = int(L/DX)
 
-    # Condições iniciais
-    E0 = np.zeros(LEN+2)  # V/m
+def calculo(S=S, S_DIFF=S_DIFF, tempo=None, estado=None, dtype=dtype, DIFF_POS=DIFF_POS):
+    """
+    Função que realiza loop principal da simulação
+    entradas:
+    tempo - instante final da simulação (padrão T)
+    estado - estado retornado por uma chamada anterior, para continuar a
+             simulação a partir dele em vez de recomeçar de t = 0
+    dtype - precisão do campo (np.float64 ou np.float32)
+    DIFF_POS - posição relativa do ponto diferente
+    saídas:
+    E - campo nos passos calculados nesta chamada
+    estado - duas últimas linhas de E, o índice do passo e a precisão,
+             para continuar
+    """
+    if(tempo is None):
+        tempo = T
+
+    # Constantes importantes para a simulação
+    DT = S*DX/c         # passo de tempo
+    TIME = int(tempo/DT)    # duração da simulação (Número de passos de tempo)
+
+    # Passo a partir do qual a simulação continua (0 se começar do zero)
+    if(estado is None):
+        inicio = 0
+    else:
+        assert estado['S'] == (S, S_DIFF, DIFF_POS), "O estado pertence a outra simulação"
+        assert estado['dtype'] == np.dtype(dtype).str, "O estado foi calculado com outra precisão"
+        inicio = estado['n']
+    assert TIME > inicio + 1, "O tempo pedido deve ser maior que o do estado"
+
+    # Verificação de memória < 2GB (para nao dar problema no PC)
+    memoria = (TIME-inicio+1)*LEN*np.dtype(dtype).itemsize
+    assert (erroFaseMax is None or memoria < 2*(2**30)), autoajuste.mensagemRefino(erroFaseMax, DX)
+    assert (memoria < 2*(2**30)), ("parâmetros consomem muita memoria: "
+                                   + str(memoria/(2**30)) + "GB")
+
+    # Campo na fonte em função do tempo
+    E_t = campoFonte(DT, TIME)    # V/m
+
+    # Condições iniciais (campo em repouso até t = 0)
+    E0 = np.zeros(LEN+2, dtype=dtype)  # V/m
 
     # Array para armazenar e processar os dados
-    E = np.empty((TIME, LEN+2))  # +2 para comportar condições de contorno
-    E[0] = E0
-    E[:, 0] = E_t
+    # A linha k corresponde ao passo inicio-1+k, as duas primeiras linhas são
+    # as condições iniciais ou as duas últimas do estado anterior
+    E = np.empty((TIME-inicio+1, LEN+2), dtype=dtype)  # +2 para comportar condições de contorno
+    if(estado is None):
+        E[0] = E0
+        E[1] = E0
+        E[1, 0] = E_t[0]
+    else:
+        E[:2] = estado['E']
+    E[2:, 0] = E_t[inicio+1:]
 
     DIFF_IDX = int((DIFF_POS*LEN-2)+2)
+    assert 1 <= DIFF_IDX <= LEN, "O ponto diferente deve estar dentro da grade"
+    # Mapa do fator de Courant nos pontos 1..LEN, com S_DIFF em DIFF_IDX
+    # (ver comum/materiais.py)
+    meio = materiais.Mapa(LEN, S=S).pintar(DIFF_IDX-1, S=S_DIFF)
+
+    # Loop principal da simulação (ver onda.py)
+    onda.meioVariavel(E, materiais.quadradoCourant(meio, dtype))
+
+    estado = {'E': E[-2:].copy(), 'n': TIME-1, 'S': (S, S_DIFF, DIFF_POS), 'dtype': np.dtype(dtype).str}
+    if(inicio == 0):
+        return E[1:], estado
+    return E[2:], estado
 
-    # Loop principal da simulação
-    for n in range(1, TIME):  # começa em 1 porque condições iniciais são conhecidas
-        # Cálculo do campo elétrico antes da mudança de meio
-        E[n][1:-1] = ((S**2)*(E[n-1, 2:] + E[n-1, :-2] - 2*E[n-1, 1:-1])
-                      + 2*E[n-1][1:-1] - E[n-2][1:-1])
-        # Ponto com S diferente
-        E[n][DIFF_IDX] = ((S_DIFF**2)*(E[n-1, DIFF_IDX+1] + E[n-1, DIFF_IDX-1] - 2*E[n-1, DIFF_IDX])
-                          + 2*E[n-1][DIFF_IDX] - E[n-2][DIFF_IDX])
-
-        # Condição de contorno na borda final
-        E[n, -1] = E[n, -2]
-
-    return E
-
-
-##### Plot do gráfico #####
-fig, plotPulsos = plt.subplots()
-fig.canvas.set_window_title('Figura')
-fig.suptitle('Propagação do Pulso', fontsize=16)
-
-fig2, plotPulsos2 = plt.subplots()
-fig2.canvas.set_window_title('Figura')
-fig.suptitle('Propagação do Pulso com S diferente em i = ' + str(int((DIFF_POS*LEN-2)+2)), fontsize=12)
-fig2.suptitle('Propagação do Pulso com S diferente em i = ' + str(int((DIFF_POS*LEN-2)+2)) + ' com Foco no ponto', fontsize=12)
-
-plotPulsos.plot(calculo()[-1], color='C2', label='TIME = ' + str(int(T/(S*DX/c))))
-plotPulsos2.plot(calculo()[-1], color='C2', label='TIME = ' + str(int(T/(S*DX/c))))
-T = (T*c/L + 0.0495)*L/c #Incrementa o T (para incrementar o TIME)
-plotPulsos.plot(calculo()[-1], color='C1', label='TIME = ' + str(int(T/(S*DX/c))))
-plotPulsos2.plot(calculo()[-1], color='C1', label='TIME = ' + str(int(T/(S*DX/c))))
-plotPulsos2.legend()
-plotPulsos.legend()
-
-# Seta os limites para o eixo x
-plotPulsos.set_xlim(0, LEN)
-plotPulsos2.set_xlim(LEN*DIFF_POS - LEN/5, LEN*DIFF_POS + LEN/5)
-
-# Seta os limites para o eixo y
-plotPulsos2.set_ylim(-1, 1)
-
-# Seta os ticks
-plotPulsos.xaxis.set_tick_params(which="major", top=True, direction="in")
-plotPulsos.xaxis.set_tick_params(which="minor", top=True, direction="in")
-plotPulsos.xaxis.set_major_locator(ticker.AutoLocator())
-plotPulsos.xaxis.set_minor_locator(ticker.AutoMinorLocator())
-plotPulsos2.xaxis.set_tick_params(which="major", top=True, direction="in")
-plotPulsos2.xaxis.set_tick_params(which="minor", top=True, direction="in")
-plotPulsos2.xaxis.set_major_locator(ticker.AutoLocator())
-plotPulsos2.xaxis.set_minor_locator(ticker.AutoMinorLocator())
-
-plotPulsos.yaxis.set_tick_params(which="major", right=True, direction="in")
-plotPulsos.yaxis.set_tick_params(which="minor", right=True, direction="in")
-plotPulsos.yaxis.set_major_locator(ticker.AutoLocator())
-plotPulsos.yaxis.set_minor_locator(ticker.AutoMinorLocator())
-plotPulsos2.yaxis.set_tick_params(which="major", right=True, direction="in")
-plotPulsos2.yaxis.set_tick_params(which="minor", right=True, direction="in")
-plotPulsos2.yaxis.set_major_locator(ticker.AutoLocator())
-plotPulsos2.yaxis.set_minor_locator(ticker.AutoMinorLocator())
-
-#Nomeia os eixos
-plotPulsos.set_xlabel('Coordenada i na Grade')
-plotPulsos.set_ylabel('Função de Onda u(i)')
-plotPulsos2.set_xlabel('Coordenada i na Grade')
-plotPulsos2.set_ylabel('Função de Onda u(i)')
-
-plt.show()
\ No newline at end of file
+
+def simulacao(**kwargs):
+    """
+    Chama calculo() passando pelo cache, a chave inclui os parâmetros
+    globais usados por calculo()
+    """
+    if(not usarCache):
+        return calculo(**kwargs)
+    return cache.memorizar(calculo, kwargs=kwargs,
+                           parametros={'L': L, 'T': T, 'DX': DX, 'campoFonte': campoFonte, 'dtype': dtype, 'DIFF_POS': DIFF_POS, 'laco': onda.meioVariavel,
+                                       'meio': materiais.quadradoCourant})
+
+if __name__ == "__main__":
+    import matplotlib.pyplot as plt
+    import matplotlib.ticker as ticker
+
+    instrumentacao.configurar(instrumentar)
+
+    if(relatorioPrecisao):
+        precisao.relatorio(simulacao(), calculo)
+
+    ##### Plot do gráfico #####
+    fig, plotPulsos = plt.subplots()
+    fig.canvas.set_window_title('Figura')
+    fig.suptitle('Propagação do Pulso', fontsize=16)
+
+    fig2, plotPulsos2 = plt.subplots()
+    fig2.canvas.set_window_title('Figura')
+    fig.suptitle('Propagação do Pulso com S diferente em i = ' + str(int((DIFF_POS*LEN-2)+2)), fontsize=12)
+    fig2.suptitle('Propagação do Pulso com S diferente em i = ' + str(int((DIFF_POS*LEN-2)+2)) + ' com Foco no ponto', fontsize=12)
+
+    E, estado = simulacao()
+    plotPulsos.plot(E[-1], color='C2', label='TIME = ' + str(int(T/(S*DX/c))))
+    plotPulsos2.plot(E[-1], color='C2', label='TIME = ' + str(int(T/(S*DX/c))))
+    T = (T*c/L + 0.0495)*L/c #Incrementa o T (para incrementar o TIME)
+    E, estado = simulacao(estado=estado) # Continua do T anterior
+    plotPulsos.plot(E[-1], color='C1', label='TIME = ' + str(int(T/(S*DX/c))))
+    plotPulsos2.plot(E[-1], color='C1', label='TIME = ' + str(int(T/(S*DX/c))))
+    plotPulsos2.legend()
+    plotPulsos.legend()
+
+    # Seta os limites para o eixo x
+    plotPulsos.set_xlim(0, LEN)
+    plotPulsos2.set_xlim(LEN*DIFF_POS - LEN/5, LEN*DIFF_POS + LEN/5)
+
+    # Seta os limites para o eixo y
+    plotPulsos2.set_ylim(-1, 1)
+
+    # Seta os ticks
+    plotPulsos.xaxis.set_tick_params(which="major", top=True, direction="in")
+    plotPulsos.xaxis.set_tick_params(which="minor", top=True, direction="in")
+    plotPulsos.xaxis.set_major_locator(ticker.AutoLocator())
+    plotPulsos.xaxis.set_minor_locator(ticker.AutoMinorLocator())
+    plotPulsos2.xaxis.set_tick_params(which="major", top=True, direction="in")
+    plotPulsos2.xaxis.set_tick_params(which="minor", top=True, direction="in")
+    plotPulsos2.xaxis.set_major_locator(ticker.AutoLocator())
+    plotPulsos2.xaxis.set_minor_locator(ticker.AutoMinorLocator())
+
+    plotPulsos.yaxis.set_tick_params(which="major", right=True, direction="in")
+    plotPulsos.yaxis.set_tick_params(which="minor", right=True, direction="in")
+    plotPulsos.yaxis.set_major_locator(ticker.AutoLocator())
+    plotPulsos.yaxis.set_minor_locator(ticker.AutoMinorLocator())
+    plotPulsos2.yaxis.set_tick_params(which="major", right=True, direction="in")
+    plotPulsos2.yaxis.set_tick_params(which="minor", right=True, direction="in")
+    plotPulsos2.yaxis.set_major_locator(ticker.AutoLocator())
+    plotPulsos2.yaxis.set_minor_locator(ticker.AutoMinorLocator())
+
+    #Nomeia os eixos
+    plotPulsos.set_xlabel('Coordenada i na Grade')
+    plotPulsos.set_ylabel('Função de Onda u(i)')
+    plotPulsos2.set_xlabel('Coordenada i na Grade')
+    plotPulsos2.set_ylabel('Função de Onda u(i)')
+
+    plt.show()
\ No newline at end of file
@@ -0,0 +1,166 @@
+"""
+Algoritmo ADI-FDTD (direções alternadas implícitas) para o caso 2D TM,
+com a mesma interface e os mesmos campos de yee.quadros2D(): Ez (LEN+1,
+LEN+1), Hx (LEN+1, LEN) e Hy (LEN, LEN+1), paredes condutoras e a fonte
+imposta no centro.
+
+Cada passo é dividido em dois meios passos de dt/2:
+    1. Ez implícito na direção das linhas (acoplado a Hy), Hx explícito
+    2. Ez implícito na direção das colunas (acoplado a Hx), Hy explícito
+Substituindo o H implícito na equação de Ez, cada meio passo vira um
+sistema tridiagonal por coluna (ou por linha) da grade, resolvido pelo
+algoritmo de Thomas vetorizado sobre todas as colunas de uma vez
+(fatorar() e resolver()). As matrizes não mudam com o tempo, então a
+fatoração é feita uma só vez e cada passo custa só as duas varreduras.
+
+O esquema é incondicionalmente estável: o passo de tempo pode passar do
+limite do CFL (dt = dx/(sqrt(2)*c)) e fica limitado só pela precisão,
+já que o erro da velocidade de fase cresce com dt (ver
+comum/dispersao.py, dispersaoADI()):
+    tan²(w*dt/2) = X² + Y² + X²*Y²,   X = S*sin(kx*dx/2), Y = S*sin(ky*dx/2)
+
+CA, CB, DA e DB são as constantes de um meio passo (as mesmas expressões
+de Yee com dt/2), constantes ou mapas de comum/materiais.py. A fonte é uma
+condição de Dirichlet nos sistemas (linha identidade no ponto central),
+com a média de Ez_t[n-1] e Ez_t[n] no primeiro meio passo.
+"""
+
+import os
+import sys
+import numpy as np
+import yee
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from comum import instrumentacao
+
+def fatorar(inferior, diagonal, superior):
+    """
+    Fatoração de Thomas de sistemas tridiagonais independentes, um por
+    coluna dos arrays (N, M) (inferior[0] e superior[-1] são ignorados)
+    saídas: inferior, inversos dos pivôs e superior dividido pelos pivôs
+    """
+    inverso = np.empty_like(diagonal)
+    modificado = np.empty_like(diagonal)
+    inverso[0] = 1/diagonal[0]
+    modificado[0] = superior[0]*inverso[0]
+    for i in range(1, len(diagonal)):
+        inverso[i] = 1/(diagonal[i] - inferior[i]*modificado[i-1])
+        modificado[i] = superior[i]*inverso[i]
+    modificado[-1] = 0
+    return inferior, inverso, modificado
+
+def resolver(fatores, d, rascunho):
+    """
+    Resolve os sistemas fatorados no próprio array d (N, M), com
+    rascunho (M,) para não alocar arrays a cada linha
+    """
+    inferior, inverso, modificado = fatores
+    d[0] *= inverso[0]
+    for i in range(1, len(d)):
+        np.multiply(inferior[i], d[i-1], out=rascunho)
+        d[i] -= rascunho
+        d[i] *= inverso[i]
+    for i in range(len(d)-2, -1, -1):
+        np.multiply(modificado[i], d[i+1], out=rascunho)
+        d[i] -= rascunho
+    return d
+
+def _sistema(CB, DB, fonte):
+    """
+    Fatora os sistemas de Ez (pontos internos) na direção do eixo 0:
+    (1 + CB*(DB[i] + DB[i-1]))*Ez[i] - CB*DB[i-1]*Ez[i-1] - CB*DB[i]*Ez[i+1]
+    com DB (LEN, LEN-1) nos pontos de H entre os pontos de Ez e a linha
+    identidade no ponto da fonte
+    """
+    inferior = -CB*DB[:-1]
+    superior = -CB*DB[1:]
+    diagonal = 1 - inferior - superior
+    inferior[fonte] = superior[fonte] = 0
+    diagonal[fonte] = 1
+    return fatorar(inferior, diagonal, superior)
+
+def quadros2D(Ez_t, CA, CB, DA, DB, LEN, TIME, k=1, dtype=np.float64):
+    """
+    Gerador do caso 2D pelo ADI-FDTD
+    entradas como em yee.quadros2D(), com CA, CB, DA e DB de meio passo
+    saídas (a cada quadro):
+    n, Ez, Hx, Hy - passo de tempo e campos nesse passo
+    """
+    (DAx, DAy), (DBx, DBy) = yee.porCampo(DA), yee.porCampo(DB)
+    CA, CB, DAx, DAy, DBx, DBy = yee.coeficientes(dtype, CA, CB, DAx, DAy, DBx, DBy)
+    interno = (LEN-1, LEN-1)
+    centro = int(LEN/2)
+    fonte = (centro-1, centro-1)    # ponto da fonte entre os internos
+    # Sistemas dos dois meios passos, calculados uma só vez: no primeiro ao
+    # longo das linhas (acoplado a Hy), no segundo ao longo das colunas
+    # (acoplado a Hx, resolvido sobre os arrays transpostos)
+    CBi = np.broadcast_to(CB, interno)
+    sistemaLinhas = _sistema(CBi, np.broadcast_to(DBy, (LEN, LEN+1))[:, 1:-1], fonte)
+    sistemaColunas = _sistema(CBi.T, np.broadcast_to(DBx, (LEN+1, LEN))[1:-1].T, fonte)
+
+    # Condições iniciais (Ez nulo nas bordas)
+    Ez = np.zeros((LEN+1, LEN+1), dtype=dtype)
+    Hx = np.zeros((LEN+1, LEN), dtype=dtype)
+    Hy = np.zeros((LEN, LEN+1), dtype=dtype)
+    # Rascunhos: lado direito dos sistemas (e a sua versão transposta),
+    # rotacionais e diferenças de Ez
+    d = np.empty(interno, dtype=dtype)
+    dT = np.empty(interno, dtype=dtype)
+    rot = np.empty(interno, dtype=dtype)
+    difX = np.empty((LEN+1, LEN), dtype=dtype)
+    difY = np.empty((LEN, LEN+1), dtype=dtype)
+    rascunho = np.empty(LEN-1, dtype=dtype)
+    yield 0, Ez, Hx, Hy
+
+    def ladoDireito():
+        """
+        d = CA*Ez + CB*((Hy[i] - Hy[i-1]) - (Hx[j] - Hx[j-1])) nos pontos internos
+        """
+        yee.diferenca(Hy[1:, 1:-1], Hy[:-1, 1:-1], d)
+        np.subtract(d, yee.diferenca(Hx[1:-1, 1:], Hx[1:-1, :-1], rot), out=d)
+        np.multiply(d, CB, out=d)
+        np.add(d, np.multiply(Ez[1:-1, 1:-1], CA, out=rot), out=d)
+
+    def passoHx():
+        # Hx = DA*Hx - DB*(Ez[:, 1:] - Ez[:, :-1])
+        yee.atualizar(Hx, DAx, DBx, yee.diferenca(Ez[:, 1:], Ez[:, :-1], difX), subtrair=True)
+
+    def passoHy():
+        # Hy = DA*Hy + DB*(Ez[1:] - Ez[:-1])
+        yee.atualizar(Hy, DAy, DBy, yee.diferenca(Ez[1:], Ez[:-1], difY))
+
+    medidor = instrumentacao.medidor(TIME-1, 'ADI 2D', (LEN+1)**2 + 2*LEN*(LEN+1))
+    for n in range(1, TIME):
+        if(medidor):
+            medidor.inicio()
+        # Primeiro meio passo: Hy*DA entra no lado direito e o resto de Hy
+        # (DB vezes a diferença do novo Ez) fica implícito
+        Hy *= DAy
+        ladoDireito()
+        passoHx()
+        d[fonte] = (Ez_t[n-1] + Ez_t[n])/2
+        Ez[1:-1, 1:-1] = resolver(sistemaLinhas, d, rascunho)
+        Hy += np.multiply(yee.diferenca(Ez[1:], Ez[:-1], difY), DBy, out=difY)
+        if(medidor):
+            medidor.fase('meio passo 1')
+        # Segundo meio passo: o mesmo com os papéis de Hx e Hy trocados
+        Hx *= DAx
+        ladoDireito()
+        passoHy()
+        d[fonte] = Ez_t[n]
+        np.copyto(dT, d.T)
+        Ez[1:-1, 1:-1] = resolver(sistemaColunas, dT, rascunho).T
+        Hx -= np.multiply(yee.diferenca(Ez[:, 1:], Ez[:, :-1], difX), DBx, out=difX)
+        if(medidor):
+            medidor.fase('meio passo 2')
+            medidor.passo(n, Ez=Ez, Hx=Hx, Hy=Hy)
+        if(n % k == 0):
+            yield n, Ez, Hx, Hy
+    if(medidor):
+        medidor.fim()
+
+def simular2D(Ez_t, CA, CB, DA, DB, LEN, TIME, dtype=np.float64):
+    """
+    Função que realiza o loop principal do caso 2D pelo ADI-FDTD
+    saídas: Ez (TIME, LEN+1, LEN+1), Hx (TIME, LEN+1, LEN) e Hy (TIME, LEN, LEN+1)
+    """
+    return yee.historico(quadros2D(Ez_t, CA, CB, DA, DB, LEN, TIME, dtype=dtype), TIME)
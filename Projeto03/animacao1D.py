@@ -1,9 +1,26 @@
 import numpy as np
 import matplotlib.pyplot as plt
 import matplotlib.animation as animation
-from matplotlib.pylab import *
 
-def plotAnimations(Ez, Hy, EzLen, HyLen, LEN, l, TIME, velocidade = 5, intervalo = 20):
+def ajustarLimites(ax, dados, margem = 0.2):
+    """
+    Aumenta os limites do eixo y se os dados passarem deles
+    """
+    dmin = np.amin(dados)
+    dmax = np.amax(dados)
+    ymin, ymax = ax.get_ylim()
+    if(dmin < ymin or dmax > ymax):
+        faixa = max(dmax - dmin, ymax - ymin)
+        ax.set_ylim(min(ymin, dmin - margem*faixa), max(ymax, dmax + margem*faixa))
+
+def prepararAnimacao(Ez, Hy, EzLen, HyLen, LEN, l, TIME, velocidade = 5, quadros = None):
+    """
+    Monta a figura da animação sem mostrá-la (usada por plotAnimations e
+    pela exportação em paralelo, ver comum/exportacao.py)
+    saídas:
+    anim, funcao, frames, blit - figura, função que desenha cada quadro,
+                                 quadros a desenhar e se usa blit
+    """
     plt.style.use('seaborn-pastel')
 
     # Cria as figuras
@@ -21,12 +38,13 @@ def plotAnimations(Ez, Hy, EzLen, HyLen, LEN, l, TIME, velocidade = 5, intervalo
     HAnim.set_title('Componente y do Campo H')
 
     # Seta os limites para o eixo y
-    HyYmax = np.amax(Hy)
-    HyYmin = np.amin(Hy)
-    EzYmax = np.amax(Ez)
-    EzYmin = np.amin(Ez)
-    EAnim.set_ylim(EzYmin - 0.2*(EzYmax - EzYmin),EzYmax + 0.2*(EzYmax - EzYmin))
-    HAnim.set_ylim(HyYmin - 0.2*(HyYmax - HyYmin),HyYmax + 0.2*(HyYmax - HyYmin))
+    if(quadros is None):
+        HyYmax = np.amax(Hy)
+        HyYmin = np.amin(Hy)
+        EzYmax = np.amax(Ez)
+        EzYmin = np.amin(Ez)
+        EAnim.set_ylim(EzYmin - 0.2*(EzYmax - EzYmin),EzYmax + 0.2*(EzYmax - EzYmin))
+        HAnim.set_ylim(HyYmin - 0.2*(HyYmax - HyYmin),HyYmax + 0.2*(HyYmax - HyYmin))
 
     # Seta os limites para o eixo x
     EAnim.set_xlim(0, EzLen)
@@ -54,8 +72,12 @@ def plotAnimations(Ez, Hy, EzLen, HyLen, LEN, l, TIME, velocidade = 5, intervalo
     anim.tight_layout()
 
     # Inicializa os gráficos
-    p011, = EAnim.plot(Ez[0], 'r-')
-    p021, = HAnim.plot(Hy[0], 'b-')
+    if(quadros is None):
+        p011, = EAnim.plot(Ez[0], 'r-')
+        p021, = HAnim.plot(Hy[0], 'b-')
+    else:
+        p011, = EAnim.plot(np.zeros(EzLen), 'r-')
+        p021, = HAnim.plot(np.zeros(HyLen), 'b-')
     
     # Função que atualiza a animação
     def updateData(n):
@@ -64,6 +86,34 @@ def plotAnimations(Ez, Hy, EzLen, HyLen, LEN, l, TIME, velocidade = 5, intervalo
 
         return p011, p021
 
-    animation.FuncAnimation(anim, updateData, blit=True, frames=TIME//velocidade, interval=intervalo, repeat=False)
+    # Função que atualiza a animação com um quadro do gerador
+    def updateQuadro(quadro):
+        n, EzN, HyN = quadro
+        p011.set_data(EzEixoX, EzN)
+        p021.set_data(HyEixoX, HyN)
+        ajustarLimites(EAnim, EzN)
+        ajustarLimites(HAnim, HyN)
+
+        return p011, p021
+
+    if(quadros is None):
+        return anim, updateData, TIME//velocidade, True
+    # blit=False para redesenhar os eixos quando os limites mudam
+    return anim, updateQuadro, quadros, False
+
+def plotAnimations(Ez, Hy, EzLen, HyLen, LEN, l, TIME, velocidade = 5, intervalo = 20, quadros = None):
+    """
+    Anima Ez e Hy a partir do histórico completo (Ez, Hy) ou, se 'quadros'
+    for dado, a partir de um gerador de (n, Ez, Hy) (ver yee.quadros1D), o
+    que começa a animação enquanto a simulação ainda roda; nesse caso Ez e
+    Hy são ignorados e os limites do eixo y crescem conforme os quadros chegam
+    """
+    anim, funcao, frames, blit = prepararAnimacao(Ez, Hy, EzLen, HyLen, LEN, l, TIME, velocidade, quadros)
+
+    if(quadros is None):
+        simulation = animation.FuncAnimation(anim, funcao, blit=blit, frames=frames, interval=intervalo, repeat=False)
+    else:
+        simulation = animation.FuncAnimation(anim, funcao, blit=blit, frames=frames, interval=intervalo,
+                                             repeat=False, cache_frame_data=False)
 
     plt.show()
\ No newline at end of file
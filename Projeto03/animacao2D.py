@@ -1,54 +1,132 @@
 import numpy as np
 import matplotlib.pyplot as plt
 import matplotlib.animation as animation
-from matplotlib.pylab import *
 import mpl_toolkits.mplot3d.axes3d as p3
 
-def plotAnimations(Ez, LEN, TIME, AnimZmin, AnimZmax, velocidade = 2, intervalo = 10):
+def eixos(forma, LEN):
+    """
+    Malha X, Y para um campo com a forma dada (mesma escala de -LEN a LEN
+    usada originalmente para a grade de 101x101 pontos)
+    """
+    x = np.linspace(-LEN, LEN, forma[1])
+    y = np.linspace(-LEN, LEN, forma[0])
+    return np.meshgrid(x, y)
+
+def passoAmostragem(forma, resolucao):
+    """
+    Passo da subamostragem para que a superfície tenha no máximo
+    'resolucao' pontos por eixo (nível de detalhe da animação 3D)
+    """
+    return max(1, int(np.ceil(max(forma)/resolucao)))
+
+def prepararAnimacao(Ez, LEN, TIME, AnimZmin, AnimZmax, velocidade = 2, quadros = None,
+                     modo = 'superficie', resolucao = 80):
+    """
+    Monta a figura da animação sem mostrá-la (usada por plotAnimations e
+    pela exportação em paralelo, ver comum/exportacao.py)
+    saídas:
+    fig, updateData, frames, blit - figura, função que desenha cada quadro,
+                                    quadros a desenhar e se usa blit
+    """
+    assert modo in ('mapa', 'superficie'), "Modo de animação inválido!"
     plt.style.use('seaborn-pastel')
+
+    # Primeiro quadro (define a forma da grade)
+    if(quadros is None):
+        Z = Ez[0]
+    else:
+        quadros = iter(quadros)
+        n, Z, *_ = next(quadros)
+        Z = Z.copy()
+
     # Cria a figura
     fig = plt.figure('Animações')
-    anim = p3.Axes3D(fig)
-    anim = plt.axes(projection='3d')
 
     # Nomeia a figura
     fig.suptitle('Animação da Componente z do Campo E', fontsize=12)
 
-    # Seta os limites para o eixo z
-    if(AnimZmax != None):
-            anim.set_zlim3d(AnimZmin, AnimZmax)
+    if(modo == 'mapa'):
+        anim = fig.add_subplot()
 
-    # Nomeia os eixos
-    anim.set_xlabel("x")
-    anim.set_ylabel("y")
-    anim.set_zlabel("V/m")
+        # Limites das cores (simétricos, como nos gráficos estáticos)
+        if(AnimZmax != None):
+            vmin, vmax = AnimZmin, AnimZmax
+        elif(quadros is None):
+            vmax = np.max(np.abs(Ez))
+            vmin = -vmax
+        else:
+            vmin, vmax = -1, 1
+
+        # Inicializa o gráfico
+        imagem = anim.imshow(Z, cmap='seismic', vmin=vmin, vmax=vmax, animated=True)
+        fig.colorbar(imagem, ax=anim, label="V/m")
+
+        # Nomeia os eixos
+        anim.set_xlabel("x")
+        anim.set_ylabel("y")
 
-    # Vetores utilizados como eixo X e Y e Z
-    x = np.linspace(-100, 100, 101)
-    y = np.linspace(-100, 100, 101)
-    X, Y = np.meshgrid(x, y)
-    Z = Ez[0]
+        # Função que atualiza a animação, só troca os dados da imagem
+        def updateData(quadro):
+            # Com o gerador cada quadro já traz (n, Ez, Hx, Hy)
+            Z = Ez[quadro*velocidade] if quadros is None else quadro[1]
+            imagem.set_data(Z)
+            return imagem,
 
-    # Inicializa os gráficos
-    line = anim.plot_surface(X, Y, Z, cmap='seismic')
+        blit = True
+    else:
+        anim = fig.add_subplot(projection='3d')
 
-    # Função que atualiza a animação
-    def updateData(n):
-        anim.clear()
-        line = anim.plot_surface(X, Y, Ez[n*velocidade],rcount = 80 , ccount = 80, cmap='seismic')
+        # Seta os limites para o eixo z
         if(AnimZmax != None):
             anim.set_zlim3d(AnimZmin, AnimZmax)
-        
+
         # Nomeia os eixos
         anim.set_xlabel("x")
         anim.set_ylabel("y")
         anim.set_zlabel("V/m")
-        
-        return line , anim
 
-    simulation = animation.FuncAnimation(fig, updateData,  blit=False, frames=TIME//velocidade, interval=intervalo, repeat=False)
+        # Vetores utilizados como eixo X e Y, derivados da grade real e
+        # subamostrados para o nível de detalhe pedido
+        passo = passoAmostragem(Z.shape, resolucao)
+        X, Y = eixos(Z.shape, LEN)
+        X = X[::passo, ::passo]
+        Y = Y[::passo, ::passo]
 
-    plt.show()
+        # Inicializa os gráficos
+        superficie = [anim.plot_surface(X, Y, Z[::passo, ::passo], rstride=1, cstride=1, cmap='seismic')]
+
+        # Função que atualiza a animação, troca só a superfície (os eixos,
+        # limites e nomes continuam os mesmos)
+        def updateData(quadro):
+            # Com o gerador cada quadro já traz (n, Ez, Hx, Hy)
+            Z = Ez[quadro*velocidade] if quadros is None else quadro[1]
+            superficie[0].remove()
+            superficie[0] = anim.plot_surface(X, Y, Z[::passo, ::passo], rstride=1, cstride=1, cmap='seismic')
+            return superficie[0],
 
-    
+        blit = False
 
+    frames = TIME//velocidade if quadros is None else quadros
+    return fig, updateData, frames, blit
+
+def plotAnimations(Ez, LEN, TIME, AnimZmin, AnimZmax, velocidade = 2, intervalo = 10, quadros = None,
+                   modo = 'superficie', resolucao = 80):
+    """
+    Anima Ez a partir do histórico completo ou, se 'quadros' for dado, a
+    partir de um gerador de (n, Ez, Hx, Hy) (ver yee.quadros2D), o que começa
+    a animação enquanto a simulação ainda roda (Ez é ignorado nesse caso)
+    modo - 'mapa': mapa de cores (imshow) persistente, só os dados são
+                   trocados a cada quadro (com blit), rápido para grades grandes
+           'superficie': superfície 3D subamostrada para no máximo
+                   'resolucao' pontos por eixo
+    """
+    fig, updateData, frames, blit = prepararAnimacao(Ez, LEN, TIME, AnimZmin, AnimZmax, velocidade,
+                                                     quadros, modo, resolucao)
+
+    if(quadros is None):
+        simulation = animation.FuncAnimation(fig, updateData,  blit=blit, frames=frames, interval=intervalo, repeat=False)
+    else:
+        simulation = animation.FuncAnimation(fig, updateData,  blit=blit, frames=frames, interval=intervalo,
+                                             repeat=False, cache_frame_data=False)
+
+    plt.show()
@@ -1,12 +1,20 @@
 """
 Esse programa realiza a simulação de uma onda eletromagnética 1D por meio
 do algoritmo de Yee adaptado para uma dimensão
+
+Importado como módulo só define a configuração e simulacao(), sem
+simular nem importar o matplotlib; a simulação e os gráficos rodam quando
+o arquivo é executado como script.
 """
 
+import os
+import sys
 import numpy as np
 from scipy.constants import c, mu_0, epsilon_0
-import matplotlib.pyplot as plt
-import animacao1D
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from comum import cache, autoajuste, exportacao, executor, precisao, instrumentacao, espectro, materiais
+import yee
+import pml
 
 l = 1e0                 # Comprimento do espaço em metros
 T = 1.5*(l/c)           # Tempo da simulação em segundos
@@ -14,11 +22,47 @@ SIGMA = 0               # Condutividade do meio
 SIGMA_STAR = 0          # Perda magnética equivalente
 EPSILON = epsilon_0     # Permissividade elétrica do meio
 MU = mu_0               # Permeabilidade magnética do meio
+animarDurante = False   # Anima enquanto simula (sem histórico nem gráficos estáticos)
+usarCache = True        # Reaproveita resultados já calculados (ver comum/cache.py)
+erroFaseMax = None      # Erro máximo da velocidade de fase (%) para o ajuste automático de dx e dt (None = fixos);
+                        # com a fonte descontínua o ajuste refina a grade (ver comum/autoajuste.py)
+dtype = np.float64      # Precisão dos campos (np.float32 usa metade da memória)
+relatorioPrecisao = False   # Mostra o desvio máximo do resultado em relação a float64 (ver comum/precisao.py)
+threads = 1             # Threads das atualizações por faixas (1 = serial, ver comum/executor.py)
+instrumentar = False    # Mostra o progresso e o tempo de cada fase do laço (ver comum/instrumentacao.py)
+janelaAtiva = True      # Atualiza só a região já alcançada pela onda (resultado idêntico, ver yee.py)
+exportar = None         # Exporta a animação em paralelo ('animacao.mp4' ou diretório de PNGs, ver comum/exportacao.py)
+frequencias = None      # Frequências (Hz) do espectro de Ez por DFT acumulada, sem histórico (ver comum/espectro.py)
+pontoEspectro = 0.5     # Posição relativa do ponto do espectro de Ez
+meioHeterogeneo = False # Usa o mapa de materiais de meio() em vez do meio homogêneo (ver comum/materiais.py)
+contorno = 'parede'     # Borda direita: 'parede' (condutora), 'mur' (ABC de Mur) ou 'cpml' (camada absorvente, ver pml.py)
+espessuraPML = 20       # Células da CPML
+grauPML = 3             # Grau do perfil de condutividade da CPML
+ordem = 2               # Ordem das diferenças espaciais: 2 ou 4 (FDTD(2,4), com S <= 6/7 e sem CPML, ver yee.py)
 
 #precisão do comprimento
 dx = 1e-3  # m
 dt = dx/c  # s
 
+def campoFonte(dt, TIME):
+    """
+    Campo imposto na borda esquerda em função do tempo, amostrado com passo dt
+    """
+    # Pulso retangular
+    Ez_t = np.zeros(TIME)
+    Ez_t[0:int(0.4*(l/c)/dt)] = 1
+    return Ez_t
+
+# Troca dx e dt pela grade mais grossa que respeita erroFaseMax (ver comum/autoajuste.py)
+esquema = 'yee1D' if ordem == 2 else 'yee1D4'
+if(erroFaseMax is not None):
+    grade = autoajuste.ajustarGrade(esquema, campoFonte(dt, int(T/dt)), dt, c, erroFaseMax)
+    dx = grade['dx']
+    dt = grade['dt']
+elif(ordem == 4):
+    # Limite de estabilidade do estêncil de quarta ordem
+    dt = min(dt, autoajuste.courantMaximo(esquema)*dx/c)
+
 #comprimento do fio (Quantidade de pontos simulados)
 LEN = int(l/dx) #pontos
 
@@ -26,82 +70,160 @@ LEN = int(l/dx) #pontos
 TIME = int(T/dt) #pontos
 
 #verificação de memória < 2GB (para nao dar problema no PC)
-memoria = TIME*LEN*8*2
+semHistorico = animarDurante or frequencias is not None
+memoria = (1 if semHistorico else TIME)*LEN*np.dtype(dtype).itemsize*2 # só o passo atual sem histórico
+assert (erroFaseMax is None or memoria < 2*(2**30)), autoajuste.mensagemRefino(erroFaseMax, dx)
 assert (memoria < 2*(2**30)), "parâmetros consomem muita memoria: " + str(memoria/(2**30)) + "GB"
 
-# Campo na borda esquerda
-# Pulso retangular
-Ez_t = np.zeros(TIME)
-Ez_t[0:int(0.4*(l/c)/dt)] = 1
-
-# Condições iniciais
-Ez0 = np.zeros(LEN+1)
-Hy0 = np.zeros(LEN)
+assert contorno in ('parede', 'mur', 'cpml'), "Contorno inválido!"
+assert contorno != 'cpml' or not meioHeterogeneo, "A CPML exige o meio homogêneo!"
+assert contorno != 'cpml' or ordem == 2, "A CPML exige as diferenças de segunda ordem!"
+
+Ez_t = campoFonte(dt, TIME)
+
+def meio(SIGMA=SIGMA, SIGMA_STAR=SIGMA_STAR):
+    """
+    Mapa de materiais por célula usado com meioHeterogeneo, com as perdas
+    dadas no meio de fundo; as regiões são pintadas aqui (por padrão um
+    dielétrico com EPSILON quatro vezes maior na segunda metade)
+    """
+    mapa = materiais.Mapa(LEN, EPSILON=EPSILON, MU=MU, SIGMA=SIGMA, SIGMA_STAR=SIGMA_STAR)
+    return mapa.pintar(slice(LEN//2, None), EPSILON=4*EPSILON)
+
+def constantes(SIGMA, SIGMA_STAR):
+    """
+    Constantes CA, CB, DA e DB da atualização para as perdas dadas (mapas
+    por ponto calculados uma só vez a partir de meio() se meioHeterogeneo)
+    """
+    if(meioHeterogeneo):
+        return materiais.coeficientesYee(meio(SIGMA, SIGMA_STAR), dt, dx, usarCache)
+    CA = (1-((SIGMA*dt)/(2*EPSILON)))/(1+(SIGMA*dt)/(2*EPSILON))
+    CB = (dt/(EPSILON*dx))/(1+(SIGMA*dt)/(2*EPSILON))
+    DA = (1-((SIGMA_STAR*dt)/(2*MU)))/(1+(SIGMA_STAR*dt)/(2*MU))
+    DB = (dt/(MU*dx))/(1+(SIGMA_STAR*dt)/(2*MU))
+    return CA, CB, DA, DB
 
 # Constantes uteis para a simulação
-CA = (1-((SIGMA*dt)/(2*EPSILON)))/(1+(SIGMA*dt)/(2*EPSILON))
-CB = (dt/(EPSILON*dx))/(1+(SIGMA*dt)/(2*EPSILON))
-DA = (1-((SIGMA_STAR*dt)/(2*MU)))/(1+(SIGMA_STAR*dt)/(2*MU))
-DB = (dt/(MU*dx))/(1+(SIGMA_STAR*dt)/(2*MU))
-
-# Arrays para armazenar e processar os dados
-Ez = np.empty((TIME, LEN+1))
-Ez[0] = Ez0     # Condição inicial
-Ez[:, 0] = Ez_t # Fonte na borda esquerca
-Ez[:, -1] = 0   # Condição de contorno na borda direita
-
-Hy = np.empty((TIME, LEN))
-Hy[0] = Hy0     # Condição inicial
-
-print(CA, CB, DA, DB)
-
-# Loop principal da simulação
-for n in range(1, TIME): # Começa em 1 porque condições iniciais são conhecidas
-    Ez[n][1:-1] = CA*Ez[n-1][1:-1] + CB*(Hy[n-1][1:]-Hy[n-1][:-1])
-    Hy[n] = DA*Hy[n-1] + DB*(Ez[n][1:] - Ez[n][:-1])
-
-###### Plot dos Graficos ######
-fig1, ax1 = plt.subplots()
-fig1_2, ax1_2 = plt.subplots()
-fig2, ax2 = plt.subplots()
-fig2_2, ax2_2 = plt.subplots()
-fig1.canvas.set_window_title('Ez_Antes')
-fig1.suptitle('Componente z do Campo E (antes de chegar ao final da grid)', fontsize=12)
-fig1_2.canvas.set_window_title('Ez_Depois')
-fig1_2.suptitle('Componente z do Campo E (depois de chegar ao final da grid)', fontsize=12)
-fig2.canvas.set_window_title('Hy_Antes')
-fig2.suptitle('Componente y do Campo H (antes de chegar ao final da grid)', fontsize=12)
-fig2_2.canvas.set_window_title('Hy_Depois')
-fig2_2.suptitle('Componente y do Campo H (depois de chegar ao final da grid)', fontsize=12)
-
-#Plota Ez
-ax1.plot(np.linspace(0, l, num=LEN+1), Ez[int(TIME*0.6)], 'r-')
-ax1.set_xlabel('Comprimento (m)')
-ax1.set_ylabel('Campo Elétrico (V/m)')
-ax1_2.plot(np.linspace(0, l, num=LEN+1), Ez[-1], 'r-')
-ax1_2.set_xlabel('Comprimento (m)')
-ax1_2.set_ylabel('Campo Elétrico (V/m)')
-ymax = 1.2*np.maximum(np.amax(Ez[int(TIME*0.6)]), np.amax(Ez[-1]))
-ymin = 1.2*np.minimum(np.amin(Ez[int(TIME*0.6)]), np.amin(Ez[-1]))
-ax1.set_ylim(ymin - 0.4*(ymax - ymin), ymax + 0.4*(ymax - ymin))
-ax1_2.set_ylim(ymin - 0.4*(ymax - ymin), ymax + 0.4*(ymax - ymin))
-
-#Plota Hy
-ax2.plot(np.linspace(0, l, num=LEN), Hy[int(TIME*0.6)], 'b-')
-ax2.set_xlabel('Comprimento (m)')
-ax2.set_ylabel('Campo Magnético (Tesla)')
-ax2_2.plot(np.linspace(0, l, num=LEN), Hy[-1], 'b-')
-ax2_2.set_xlabel('Comprimento (m)')
-ax2_2.set_ylabel('Campo Magnético (Tesla)')
-ymax = np.maximum(np.amax(Hy[int(TIME*0.6)]), np.amax(Hy[-1]))
-ymin = np.minimum(np.amin(Hy[int(TIME*0.6)]), np.amin(Hy[-1]))
-ax2.set_ylim(ymin - 0.4*(ymax - ymin), ymax + 0.4*(ymax - ymin))
-ax2_2.set_ylim(ymin - 0.4*(ymax - ymin), ymax + 0.4*(ymax - ymin))
-
-ax2.ticklabel_format(style='sci', axis='y', scilimits=(0,0))
-ax2_2.ticklabel_format(style='sci', axis='y', scilimits=(0,0))
-
-plt.show()
-
-#Animacao
-animacao1D.plotAnimations(Ez, Hy, len(Ez[0]), len(Hy[0]), LEN, l, TIME)
+CA, CB, DA, DB = constantes(SIGMA, SIGMA_STAR)
+
+def bordas():
+    """
+    Argumentos mur e cpml dos geradores para o contorno escolhido (ver pml.py)
+    """
+    if(contorno == 'mur'):
+        return {'mur': pml.coeficienteMur(dt/(np.sqrt(MU*EPSILON)*dx))}
+    if(contorno == 'cpml'):
+        return {'cpml': pml.CPML(espessuraPML, dt, dx, EPSILON, MU, grauPML)}
+    return {}
+
+def simulacao(dtype=dtype, SIGMA=SIGMA, SIGMA_STAR=SIGMA_STAR):
+    """
+    Função que realiza a simulação com a configuração acima, reaproveitando
+    o cache se usarCache
+    entradas: dtype, SIGMA e SIGMA_STAR (padrão os da configuração)
+    saídas: Ez (TIME, LEN+1) e Hy (TIME, LEN)
+    """
+    CA, CB, DA, DB = constantes(SIGMA, SIGMA_STAR)
+    if(usarCache):
+        return cache.memorizar(yee.simular1D, (Ez_t, CA, CB, DA, DB, LEN, TIME),
+                               {'dtype': dtype, 'janela': janelaAtiva, 'ordem': ordem, **bordas()},
+                               parametros={'quadros': yee.quadros1D,
+                                           'pml': (pml.coeficienteMur, pml.CPML, pml.Camada, pml._corrigir),
+                                           'nucleos': (yee.diferenca, yee.diferenca4, yee.atualizar, yee.trecho)})
+    return yee.simular1D(Ez_t, CA, CB, DA, DB, LEN, TIME, dtype=dtype, janela=janelaAtiva, ordem=ordem, **bordas())
+
+def espectroEz(frequencias, ponto=pontoEspectro, dtype=dtype):
+    """
+    Função que acumula a DFT de Ez no ponto dado (posição relativa) durante
+    a simulação, com memória O(LEN + frequências)
+    saídas: Ez(f) (complexo, um por frequência)
+    """
+    monitor = espectro.Monitor(frequencias, dt, 'Ez', int(round(ponto*LEN)))
+    espectro.acumular(yee.quadros1D(Ez_t, CA, CB, DA, DB, LEN, TIME, dtype=dtype, janela=janelaAtiva,
+                                    ordem=ordem, **bordas()),
+                      [monitor], ('Ez', 'Hy'))
+    return monitor.resultado()
+
+if __name__ == "__main__":
+    import matplotlib.pyplot as plt
+    import animacao1D
+
+    print(CA, CB, DA, DB)
+
+    executor.configurar(threads)
+    instrumentacao.configurar(instrumentar)
+
+    if(animarDurante):
+        # Anima os quadros enquanto a simulação avança, sem guardar o histórico
+        animacao1D.plotAnimations(None, None, LEN+1, LEN, LEN, l, TIME,
+                                  quadros=yee.quadros1D(Ez_t, CA, CB, DA, DB, LEN, TIME, k=5, dtype=dtype,
+                                                        janela=janelaAtiva, ordem=ordem, **bordas()))
+        sys.exit()
+
+    if(frequencias is not None):
+        # Espectro de Ez num ponto, sem guardar o histórico
+        frequencias = np.asarray(frequencias)
+        fig, ax = plt.subplots()
+        fig.canvas.set_window_title('Espectro_Ez')
+        fig.suptitle('Espectro da componente z do Campo E em z = %g m' % (pontoEspectro*l), fontsize=12)
+        ax.plot(frequencias/1e6, np.abs(espectroEz(frequencias)), 'r-')
+        ax.set_xlabel('Frequência (MHz)')
+        ax.set_ylabel('|Ez(f)| (V/m/Hz)')
+        ax.grid(True)
+        plt.show()
+        sys.exit()
+
+    Ez, Hy = simulacao()
+
+    if(relatorioPrecisao):
+        precisao.relatorio((Ez, Hy), yee.simular1D, (Ez_t, CA, CB, DA, DB, LEN, TIME), {'ordem': ordem, **bordas()})
+
+    if(exportar):
+        exportacao.exportar(animacao1D.prepararAnimacao, (Ez, Hy, len(Ez[0]), len(Hy[0]), LEN, l, TIME), exportar)
+        sys.exit()
+
+    ###### Plot dos Graficos ######
+    fig1, ax1 = plt.subplots()
+    fig1_2, ax1_2 = plt.subplots()
+    fig2, ax2 = plt.subplots()
+    fig2_2, ax2_2 = plt.subplots()
+    fig1.canvas.set_window_title('Ez_Antes')
+    fig1.suptitle('Componente z do Campo E (antes de chegar ao final da grid)', fontsize=12)
+    fig1_2.canvas.set_window_title('Ez_Depois')
+    fig1_2.suptitle('Componente z do Campo E (depois de chegar ao final da grid)', fontsize=12)
+    fig2.canvas.set_window_title('Hy_Antes')
+    fig2.suptitle('Componente y do Campo H (antes de chegar ao final da grid)', fontsize=12)
+    fig2_2.canvas.set_window_title('Hy_Depois')
+    fig2_2.suptitle('Componente y do Campo H (depois de chegar ao final da grid)', fontsize=12)
+
+    #Plota Ez
+    ax1.plot(np.linspace(0, l, num=LEN+1), Ez[int(TIME*0.6)], 'r-')
+    ax1.set_xlabel('Comprimento (m)')
+    ax1.set_ylabel('Campo Elétrico (V/m)')
+    ax1_2.plot(np.linspace(0, l, num=LEN+1), Ez[-1], 'r-')
+    ax1_2.set_xlabel('Comprimento (m)')
+    ax1_2.set_ylabel('Campo Elétrico (V/m)')
+    ymax = 1.2*np.maximum(np.amax(Ez[int(TIME*0.6)]), np.amax(Ez[-1]))
+    ymin = 1.2*np.minimum(np.amin(Ez[int(TIME*0.6)]), np.amin(Ez[-1]))
+    ax1.set_ylim(ymin - 0.4*(ymax - ymin), ymax + 0.4*(ymax - ymin))
+    ax1_2.set_ylim(ymin - 0.4*(ymax - ymin), ymax + 0.4*(ymax - ymin))
+
+    #Plota Hy
+    ax2.plot(np.linspace(0, l, num=LEN), Hy[int(TIME*0.6)], 'b-')
+    ax2.set_xlabel('Comprimento (m)')
+    ax2.set_ylabel('Campo Magnético (Tesla)')
+    ax2_2.plot(np.linspace(0, l, num=LEN), Hy[-1], 'b-')
+    ax2_2.set_xlabel('Comprimento (m)')
+    ax2_2.set_ylabel('Campo Magnético (Tesla)')
+    ymax = np.maximum(np.amax(Hy[int(TIME*0.6)]), np.amax(Hy[-1]))
+    ymin = np.minimum(np.amin(Hy[int(TIME*0.6)]), np.amin(Hy[-1]))
+    ax2.set_ylim(ymin - 0.4*(ymax - ymin), ymax + 0.4*(ymax - ymin))
+    ax2_2.set_ylim(ymin - 0.4*(ymax - ymin), ymax + 0.4*(ymax - ymin))
+
+    ax2.ticklabel_format(style='sci', axis='y', scilimits=(0,0))
+    ax2_2.ticklabel_format(style='sci', axis='y', scilimits=(0,0))
+
+    plt.show()
+
+    #Animacao
+    animacao1D.plotAnimations(Ez, Hy, len(Ez[0]), len(Hy[0]), LEN, l, TIME)
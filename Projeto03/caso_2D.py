@@ -1,12 +1,23 @@
 """
 Esse programa realiza a simulação de uma onda eletromagnética 2D por meio
-do algoritmo de Yee adaptado para duas dimensões
+do algoritmo de Yee adaptado para duas dimensões (ou do ADI-FDTD, com
+passos de tempo acima do limite do CFL, ver adi.py)
+
+Importado como módulo só define a configuração e simulacao(), sem
+simular nem importar o matplotlib; a simulação e os gráficos rodam quando
+o arquivo é executado como script.
 """
 
+import os
+import sys
 import numpy as np
 from scipy.constants import c, mu_0, epsilon_0
-import matplotlib.pyplot as plt
-import animacao2D
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from comum import cache, autoajuste, exportacao, executor, precisao, instrumentacao, materiais
+import yee
+import yee_paralelo
+import pml
+import adi
 
 l = 1e0                 # Comprimento do espaço em metros
 T = np.sqrt(2)*0.5*(l/c)# Tempo da simulação em segundos
@@ -16,156 +27,296 @@ EPSILON = epsilon_0     # Permissividade elétrica do meio
 MU = mu_0               # Permeabilidade magnética do meio
 AnimZmax = 0.8            # Valor mínimo do eixo Z da animação (deixe como None para não fixar limite algum)
 AnimZmin = -0.8           # Valor máximo do eixo Z da animação
+modoAnimacao = 'mapa'     # 'mapa' (mapa de cores rápido) ou 'superficie' (3D subamostrado)
+animarDurante = False   # Anima enquanto simula (sem histórico nem gráficos estáticos)
+usarCache = True        # Reaproveita resultados já calculados (ver comum/cache.py)
+erroFaseMax = None      # Erro máximo da velocidade de fase (%) para o ajuste automático de dx e dt (None = fixos);
+                        # com o pulso retangular o ajuste refina a grade (dx 1e-2 -> 1.4e-3 com 1%, ver comum/autoajuste.py)
+processos = 1           # Processos da simulação (faixas de linhas em paralelo, ver yee_paralelo.py)
+dtype = np.float64      # Precisão dos campos (np.float32 usa metade da memória)
+relatorioPrecisao = False   # Mostra o desvio máximo do resultado em relação a float64 (ver comum/precisao.py)
+threads = 1             # Threads das atualizações por faixas (1 = serial, ver comum/executor.py)
+instrumentar = False    # Mostra o progresso e o tempo de cada fase do laço (ver comum/instrumentacao.py)
+janelaAtiva = True      # Atualiza só a região já alcançada pela onda, com processos = 1 (resultado idêntico, ver yee.py)
+meioHeterogeneo = False # Usa o mapa de materiais de meio() em vez do meio homogêneo (ver comum/materiais.py)
+contorno = 'parede'     # Paredes: 'parede' (condutoras) ou 'cpml' (camada absorvente, com processos = 1, ver pml.py)
+espessuraPML = 10       # Células da CPML
+grauPML = 3             # Grau do perfil de condutividade da CPML
+motor = 'yee'           # 'yee' ou 'adi' (ADI-FDTD incondicionalmente estável, com processos = 1 e paredes condutoras, ver adi.py)
+ordem = 2               # Ordem das diferenças espaciais do Yee: 2 ou 4 (FDTD(2,4), com processos = 1 e paredes condutoras, ver yee.py)
+fatorADI = 4            # Passo de tempo do ADI-FDTD em múltiplos do limite do CFL (o erro de fase cresce com ele)
+simetria = None         # Planos de simetria: None (grade inteira), 'auto' (detectados, ver yee.simetrias()) ou (linhas, colunas);
+                        # com simetria simulacao() devolve yee.Espelhado, que reconstrói a grade inteira ao virar array
+exportar = None         # Exporta a animação em paralelo ('animacao.mp4' ou diretório de PNGs, ver comum/exportacao.py)
 
 #precisão do comprimento
 dx = 1e-2  # m
 dt = 1*dx/(np.sqrt(2)*c)  # s
 
+def campoFonte(dt, TIME):
+    """
+    Campo imposto no centro da grade em função do tempo, amostrado com passo dt
+    """
+    # Pulso retangular
+    Ez_t = np.zeros(TIME)
+    Ez_t[0:int(0.1*(l/c)/dt)] = 1
+    # Onda senoidal
+    #Ez_t = np.linspace(0, 2*np.pi, num=TIME)
+    #Ez_t = np.sin(2*Ez_t*(TIME/(0.5*(l/c)/dt)))
+    return Ez_t
+
+# Troca dx e dt pela grade mais grossa que respeita erroFaseMax (ver comum/autoajuste.py)
+esquema, S = ('adi2D', fatorADI/np.sqrt(2)) if motor == 'adi' else ('yee2D' if ordem == 2 else 'yee2D4', None)
+if(erroFaseMax is not None):
+    grade = autoajuste.ajustarGrade(esquema, campoFonte(dt, int(T/dt)), dt, c, erroFaseMax, S)
+    dx = grade['dx']
+    dt = grade['dt']
+elif(motor == 'adi'):
+    dt = fatorADI*dt
+elif(ordem == 4):
+    # Limite de estabilidade do estêncil de quarta ordem
+    dt = min(dt, autoajuste.courantMaximo(esquema)*dx/c)
+
 #lado do quadrado do espaço (Quantidade de pontos simulados)
 LEN = int(l/dx) #pontos
 
 #duração da simulação (Número de passos de tempo)
 TIME = int(T/dt) #pontos
 
+assert contorno in ('parede', 'cpml'), "Contorno inválido!"
+assert motor in ('yee', 'adi'), "Motor inválido!"
+assert motor == 'yee' or (processos == 1 and contorno == 'parede'), "O ADI-FDTD exige processos = 1 e paredes condutoras!"
+assert ordem == 2 or (motor == 'yee' and processos == 1 and contorno == 'parede'), \
+    "A quarta ordem exige o Yee com processos = 1 e paredes condutoras!"
+assert contorno == 'parede' or processos == 1, "A CPML não é suportada com processos > 1!"
+assert contorno == 'parede' or not meioHeterogeneo, "A CPML exige o meio homogêneo!"
+
+Ez_t = campoFonte(dt, TIME)
+
+def meio(SIGMA=SIGMA, SIGMA_STAR=SIGMA_STAR):
+    """
+    Mapa de materiais por célula usado com meioHeterogeneo, com as perdas
+    dadas no meio de fundo; as regiões são pintadas aqui (por padrão um
+    cilindro dielétrico com EPSILON quatro vezes maior à direita da fonte)
+    """
+    mapa = materiais.Mapa((LEN, LEN), EPSILON=EPSILON, MU=MU, SIGMA=SIGMA, SIGMA_STAR=SIGMA_STAR)
+    return mapa.pintar(lambda i, j: (i - 0.5*LEN)**2 + (j - 0.75*LEN)**2 < (0.1*LEN)**2, EPSILON=4*EPSILON)
+
+def constantes(SIGMA, SIGMA_STAR):
+    """
+    Constantes CA, CB, DA e DB da atualização para as perdas dadas (mapas
+    por ponto calculados uma só vez a partir de meio() se meioHeterogeneo);
+    o ADI-FDTD usa as constantes de meio passo
+    """
+    passo = dt/2 if motor == 'adi' else dt
+    if(meioHeterogeneo):
+        return materiais.coeficientesYee(meio(SIGMA, SIGMA_STAR), passo, dx, usarCache)
+    CA = (1-((SIGMA*passo)/(2*EPSILON)))/(1+((SIGMA*passo)/(2*EPSILON)))
+    CB = (passo/(EPSILON*dx))/(1+((SIGMA*passo)/(2*EPSILON)))
+    DA = (1-((SIGMA_STAR*passo)/(2*MU)))/(1+((SIGMA_STAR*passo)/(2*MU)))
+    DB = (passo/(MU*dx))/(1+((SIGMA_STAR*passo)/(2*MU)))
+    return CA, CB, DA, DB
+
+# Constantes uteis para a simulação
+CA, CB, DA, DB = constantes(SIGMA, SIGMA_STAR)
+
+def planosSimetria(CA, CB, DA, DB, processos=processos):
+    """
+    Planos de simetria (linhas, colunas) usados na simulação ou None para a
+    grade inteira (ver yee.quadros2DSimetria(), só com processos = 1,
+    paredes condutoras e o algoritmo de Yee de segunda ordem)
+    """
+    if(simetria is None):
+        return None
+    compativel = processos == 1 and contorno == 'parede' and motor == 'yee' and ordem == 2
+    if(simetria == 'auto'):
+        planos = yee.simetrias(LEN, CA, CB, DA, DB) if compativel else (False, False)
+    else:
+        planos = tuple(bool(eixo) for eixo in simetria)
+        assert compativel, "A simetria exige processos = 1, paredes condutoras e o Yee de segunda ordem!"
+        assert all(p <= d for p, d in zip(planos, yee.simetrias(LEN, CA, CB, DA, DB))), \
+            "A grade ou o meio não são simétricos nos planos pedidos!"
+    return planos if any(planos) else None
+
 #verificação de memória < 2GB (para nao dar problema no PC)
-memoria = TIME*LEN*LEN*8*3
+partes = 2**sum(planosSimetria(CA, CB, DA, DB) or ())   # só a metade ou o quadrante com simetria
+memoria = (1 if animarDurante else TIME)*LEN*LEN*np.dtype(dtype).itemsize*3/partes # só o passo atual se animarDurante
+assert (erroFaseMax is None or memoria < 2*(2**30)), autoajuste.mensagemRefino(erroFaseMax, dx)
 assert (memoria < 2*(2**30)), "parâmetros consomem muita memoria: " + str(memoria/(2**30)) + "GB"
 
-# Ez no centro da grade
-# Pulso retangular
-Ez_t = np.zeros(TIME)
-Ez_t[0:int(0.1*(l/c)/dt)] = 1
-# Onda senoidal
-#Ez_t = np.linspace(0, 2*np.pi, num=TIME)
-#Ez_t = np.sin(2*Ez_t*(TIME/(0.5*(l/c)/dt)))
+def bordas():
+    """
+    Argumento cpml do gerador para o contorno escolhido (ver pml.py)
+    """
+    if(contorno == 'cpml'):
+        return {'cpml': pml.CPML(espessuraPML, dt, dx, EPSILON, MU, grauPML)}
+    return {}
 
-# Condições iniciais
-Ez0 = np.zeros((LEN+1, LEN+1))
-Hx0 = np.zeros((LEN+1, LEN))
-Hy0 = np.zeros((LEN, LEN+1))
+def simulacao(dtype=dtype, processos=processos, SIGMA=SIGMA, SIGMA_STAR=SIGMA_STAR, completo=True):
+    """
+    Função que realiza a simulação com a configuração acima, reaproveitando
+    o cache se usarCache
+    entradas: dtype, processos, SIGMA e SIGMA_STAR (padrão os da configuração)
+    completo - com simetria, devolve a grade inteira reconstruída quadro a
+               quadro quando pedido (yee.Espelhado) em vez da parte simulada
+    saídas: Ez (TIME, LEN+1, LEN+1), Hx (TIME, LEN+1, LEN) e Hy (TIME, LEN, LEN+1)
+    """
+    CA, CB, DA, DB = constantes(SIGMA, SIGMA_STAR)
+    planos = planosSimetria(CA, CB, DA, DB, processos)
+    if(motor == 'adi'):
+        simular, kwargs = adi.simular2D, {'dtype': dtype}
+        parametros = {'quadros': adi.quadros2D, 'thomas': (adi.fatorar, adi.resolver, adi._sistema),
+                      'nucleos': (yee.diferenca, yee.atualizar)}
+    elif(processos > 1):
+        simular, kwargs = yee_paralelo.simular2D, {'processos': processos, 'dtype': dtype}
+        parametros = {'quadros': yee_paralelo.quadros2D, 'trabalhador': yee_paralelo._trabalhador,
+                      'nucleos': (yee.diferenca, yee.atualizar)}
+    elif(planos):
+        simular, kwargs = yee.simular2DSimetria, {'dtype': dtype, 'simetria': planos}
+        parametros = {'quadros': yee.quadros2DSimetria, 'nucleos': (yee.diferenca, yee.atualizar)}
+    else:
+        simular, kwargs = yee.simular2D, {'dtype': dtype, 'janela': janelaAtiva, 'ordem': ordem, **bordas()}
+        parametros = {'quadros': yee.quadros2D, 'nucleos': (yee.diferenca, yee.diferenca4, yee.atualizar),
+                      'pml': (pml.CPML, pml.Camada, pml._corrigir)}
 
-# Constantes uteis para a simulação
-CA = (1-((SIGMA*dt)/(2*EPSILON)))/(1+((SIGMA*dt)/(2*EPSILON)))
-CB = (dt/(EPSILON*dx))/(1+((SIGMA*dt)/(2*EPSILON)))
-DA = (1-((SIGMA_STAR*dt)/(2*MU)))/(1+((SIGMA_STAR*dt)/(2*MU)))
-DB = (dt/(MU*dx))/(1+((SIGMA_STAR*dt)/(2*MU)))
-
-# Arrays para armazenar e processar os dados
-Ez = np.empty((TIME, LEN+1, LEN+1))
-Ez[0] = Ez0     # Condição inicial
-# Condição de contorno
-Ez[:, :, +1] = 0
-Ez[:, :, -1] = 0
-Ez[:, +1, :] = 0
-Ez[:, -1, :] = 0
-
-Hx = np.empty((TIME, LEN+1, LEN))
-Hx[0] = Hx0     # Condição inicial
-
-Hy = np.empty((TIME, LEN, LEN+1))
-Hy[0] = Hy0     # Condição inicial
-
-# Loop principal da simulação
-for n in range(1, TIME): # Começa em 1 porque condições iniciais são conhecidas
-    Ez[n, 1:-1, 1:-1] = CA*Ez[n-1, 1:-1, 1:-1] + CB*(
-        - (Hx[n-1, 1:-1, 1:] - Hx[n-1, 1:-1, :-1])
-        + (Hy[n-1, 1:, 1:-1] - Hy[n-1, :-1, 1:-1])
-        )
-
-    Ez[n, int(LEN/2), int(LEN/2)] = Ez_t[n]
-    Hx[n] = DA*Hx[n-1] - DB*(Ez[n, :, 1:] - Ez[n, :, :-1])
-    Hy[n] = DA*Hy[n-1] + DB*(Ez[n, 1:, :] - Ez[n, :-1, :])
-
-
-###### PLOT dos Gráficos ######
-COR = 'seismic'
-
-#Gera a animacao
-animacao2D.plotAnimations(Ez, LEN, TIME, AnimZmin, AnimZmax)
-
-#Cria as Figuras Estaticas
-fig1, ax1 = plt.subplots()
-fig1_2, ax1_2 = plt.subplots()
-fig2, ax2 = plt.subplots()
-fig2_2, ax2_2 = plt.subplots()
-fig3, ax3 = plt.subplots()
-fig3_2, ax3_2 = plt.subplots()
-fig4 = plt.figure()
-ax4 = fig4.gca(projection='3d')
-fig4_2 = plt.figure()
-ax4_2 = fig4_2.gca(projection='3d')
-
-fig1.canvas.set_window_title('Ez_antes')
-fig1.suptitle('Componente z do Campo E (antes do final da grid)', fontsize=12)
-fig1_2.canvas.set_window_title('Ez_depois')
-fig1_2.suptitle('Componente z do Campo E (após chegar no final da grid)', fontsize=12)
-fig2.canvas.set_window_title('Hx_antes')
-fig2.suptitle('Componente x do Campo H (antes do final da grid)', fontsize=12)
-fig2_2.canvas.set_window_title('Hx_depois')
-fig2_2.suptitle('Componente x do Campo H (após chegar no final da grid)', fontsize=12)
-fig3.canvas.set_window_title('Hy_antes')
-fig3.suptitle('Componente y do Campo H (antes do final da grid)', fontsize=12)
-fig3_2.canvas.set_window_title('Hy_depois')
-fig3_2.suptitle('Componente y do Campo H (após chegar no final da grid)', fontsize=12)
-fig4.canvas.set_window_title('Ez 3D_antes')
-fig4.suptitle('Componente z do Campo E (visualização em 3D antes do final da grid)', fontsize=12)
-fig4_2.canvas.set_window_title('Ez 3D_depois')
-fig4_2.suptitle('Componente z do Campo E (visualização em 3D após chegar no final da grid)', fontsize=10)
-
-#Plota Ez
-maxval = np.max(abs(Ez[int(0.6*TIME)]))
-colormap = ax1.imshow(Ez[int(0.6*TIME)], cmap=COR, vmin=-maxval, vmax=maxval)
-ax1.set_xlabel('x')
-ax1.set_ylabel('y')
-fig1.colorbar(colormap)
-maxval = np.max(abs(Ez[-1]))
-colormap = ax1_2.imshow(Ez[-1], cmap=COR, vmin=-maxval, vmax=maxval)
-ax1_2.set_xlabel('x')
-ax1_2.set_ylabel('y')
-fig1_2.colorbar(colormap)
-
-#Plota Hx
-maxval = np.max(abs(Hx[int(0.6*TIME)]))
-colormap = ax2.imshow(Hx[int(0.6*TIME)], cmap=COR, vmin=-maxval, vmax=maxval)
-ax2.set_xlabel('x')
-ax2.set_ylabel('y')
-fig2.colorbar(colormap)
-maxval = np.max(abs(Hx[-1]))
-colormap = ax2_2.imshow(Hx[-1], cmap=COR, vmin=-maxval, vmax=maxval)
-ax2_2.set_xlabel('x')
-ax2_2.set_ylabel('y')
-fig2_2.colorbar(colormap)
-
-#Plota Hy
-maxval = np.max(abs(Hy[int(0.6*TIME)]))
-colormap = ax3.imshow(Hy[int(0.6*TIME)], cmap=COR, vmin=-maxval, vmax=maxval)
-ax3.set_xlabel('x')
-ax3.set_ylabel('y')
-fig3.colorbar(colormap)
-maxval = np.max(abs(Hy[-1]))
-colormap = ax3_2.imshow(Hy[-1], cmap=COR, vmin=-maxval, vmax=maxval)
-ax3_2.set_xlabel('x')
-ax3_2.set_ylabel('y')
-fig3_2.colorbar(colormap)
-
-#Plota Ez 3D
-x = np.linspace(-100, 100, 101)
-y = np.linspace(-100, 100, 101)
-X, Y = np.meshgrid(x, y)
-ax4.plot_surface(X, Y, Ez[int(0.6*TIME)], rcount = 200 , ccount = 200,  cmap=COR)
-ax4.set_xlabel('x')
-ax4.set_ylabel('y')
-ax4.set_zlabel('V/m')
-ax4_2.plot_surface(X, Y, Ez[-1], rcount = 200 , ccount = 200,  cmap=COR)
-ax4_2.set_xlabel('x')
-ax4_2.set_ylabel('y')
-ax4_2.set_zlabel('V/m')
-#Calcula e define os limites do eixo Z
-zmax = np.maximum(np.amax(Ez[int(0.6*TIME)]), np.amax(Ez[-1]))
-zmin = np.minimum(np.amin(Ez[int(0.6*TIME)]), np.amin(Ez[-1]))
-ax4.set_zlim(zmin, zmax)
-ax4_2.set_zlim(zmin, zmax)
-
-plt.show()
+    if(usarCache):
+        resultado = cache.memorizar(simular, (Ez_t, CA, CB, DA, DB, LEN, TIME), kwargs, parametros)
+    else:
+        resultado = simular(Ez_t, CA, CB, DA, DB, LEN, TIME, **kwargs)
+    if(planos and completo):
+        return yee.espelhados(*resultado, simetria=planos)
+    return resultado
+
+if __name__ == "__main__":
+    import matplotlib.pyplot as plt
+    import animacao2D
+
+    executor.configurar(threads)
+    instrumentacao.configurar(instrumentar)
+
+    if(motor == 'adi'):
+        # Custo em precisão do passo acima do CFL (ver comum/dispersao.py)
+        N = c/(autoajuste.frequenciaMaxima(Ez_t, dt)*dx)
+        print("ADI-FDTD com dt = %g vezes o limite do CFL: erro de fase de até %.3g%% com N = %.3g "
+              "pontos por comprimento de onda (Yee no limite do CFL: %.3g%%)"
+              % (S*np.sqrt(2), autoajuste.erroFase('adi2D', S, N),
+                 N, autoajuste.erroFase('yee2D', autoajuste.courantMaximo('yee2D'), N)))
+
+    if(animarDurante):
+        # Anima os quadros enquanto a simulação avança, sem guardar o histórico
+        planos = planosSimetria(CA, CB, DA, DB)
+        if(motor == 'adi'):
+            quadros = adi.quadros2D(Ez_t, CA, CB, DA, DB, LEN, TIME, k=2, dtype=dtype)
+        elif(processos > 1):
+            quadros = yee_paralelo.quadros2D(Ez_t, CA, CB, DA, DB, LEN, TIME, k=2, processos=processos, dtype=dtype)
+        elif(planos):
+            # Reconstrói a grade inteira a cada quadro animado
+            quadros = ((n, *yee.completar2D(*campos, simetria=planos)) for n, *campos in
+                       yee.quadros2DSimetria(Ez_t, CA, CB, DA, DB, LEN, TIME, k=2, dtype=dtype, simetria=planos))
+        else:
+            quadros = yee.quadros2D(Ez_t, CA, CB, DA, DB, LEN, TIME, k=2, dtype=dtype, janela=janelaAtiva,
+                                    ordem=ordem, **bordas())
+        animacao2D.plotAnimations(None, LEN, TIME, AnimZmin, AnimZmax, modo=modoAnimacao, quadros=quadros)
+        sys.exit()
+
+    Ez, Hx, Hy = simulacao()
+
+    if(relatorioPrecisao):
+        precisao.relatorio(simulacao(completo=False), simulacao, kwargs={'completo': False})
+
+    if(exportar):
+        exportacao.exportar(animacao2D.prepararAnimacao, (Ez, LEN, TIME, AnimZmin, AnimZmax), exportar,
+                            kwargs={'modo': modoAnimacao})
+        sys.exit()
+
+
+    ###### PLOT dos Gráficos ######
+    COR = 'seismic'
+
+    #Gera a animacao
+    animacao2D.plotAnimations(Ez, LEN, TIME, AnimZmin, AnimZmax, modo=modoAnimacao)
+
+    #Cria as Figuras Estaticas
+    fig1, ax1 = plt.subplots()
+    fig1_2, ax1_2 = plt.subplots()
+    fig2, ax2 = plt.subplots()
+    fig2_2, ax2_2 = plt.subplots()
+    fig3, ax3 = plt.subplots()
+    fig3_2, ax3_2 = plt.subplots()
+    fig4 = plt.figure()
+    ax4 = fig4.gca(projection='3d')
+    fig4_2 = plt.figure()
+    ax4_2 = fig4_2.gca(projection='3d')
+
+    fig1.canvas.set_window_title('Ez_antes')
+    fig1.suptitle('Componente z do Campo E (antes do final da grid)', fontsize=12)
+    fig1_2.canvas.set_window_title('Ez_depois')
+    fig1_2.suptitle('Componente z do Campo E (após chegar no final da grid)', fontsize=12)
+    fig2.canvas.set_window_title('Hx_antes')
+    fig2.suptitle('Componente x do Campo H (antes do final da grid)', fontsize=12)
+    fig2_2.canvas.set_window_title('Hx_depois')
+    fig2_2.suptitle('Componente x do Campo H (após chegar no final da grid)', fontsize=12)
+    fig3.canvas.set_window_title('Hy_antes')
+    fig3.suptitle('Componente y do Campo H (antes do final da grid)', fontsize=12)
+    fig3_2.canvas.set_window_title('Hy_depois')
+    fig3_2.suptitle('Componente y do Campo H (após chegar no final da grid)', fontsize=12)
+    fig4.canvas.set_window_title('Ez 3D_antes')
+    fig4.suptitle('Componente z do Campo E (visualização em 3D antes do final da grid)', fontsize=12)
+    fig4_2.canvas.set_window_title('Ez 3D_depois')
+    fig4_2.suptitle('Componente z do Campo E (visualização em 3D após chegar no final da grid)', fontsize=10)
+
+    #Plota Ez
+    maxval = np.max(abs(Ez[int(0.6*TIME)]))
+    colormap = ax1.imshow(Ez[int(0.6*TIME)], cmap=COR, vmin=-maxval, vmax=maxval)
+    ax1.set_xlabel('x')
+    ax1.set_ylabel('y')
+    fig1.colorbar(colormap)
+    maxval = np.max(abs(Ez[-1]))
+    colormap = ax1_2.imshow(Ez[-1], cmap=COR, vmin=-maxval, vmax=maxval)
+    ax1_2.set_xlabel('x')
+    ax1_2.set_ylabel('y')
+    fig1_2.colorbar(colormap)
+
+    #Plota Hx
+    maxval = np.max(abs(Hx[int(0.6*TIME)]))
+    colormap = ax2.imshow(Hx[int(0.6*TIME)], cmap=COR, vmin=-maxval, vmax=maxval)
+    ax2.set_xlabel('x')
+    ax2.set_ylabel('y')
+    fig2.colorbar(colormap)
+    maxval = np.max(abs(Hx[-1]))
+    colormap = ax2_2.imshow(Hx[-1], cmap=COR, vmin=-maxval, vmax=maxval)
+    ax2_2.set_xlabel('x')
+    ax2_2.set_ylabel('y')
+    fig2_2.colorbar(colormap)
+
+    #Plota Hy
+    maxval = np.max(abs(Hy[int(0.6*TIME)]))
+    colormap = ax3.imshow(Hy[int(0.6*TIME)], cmap=COR, vmin=-maxval, vmax=maxval)
+    ax3.set_xlabel('x')
+    ax3.set_ylabel('y')
+    fig3.colorbar(colormap)
+    maxval = np.max(abs(Hy[-1]))
+    colormap = ax3_2.imshow(Hy[-1], cmap=COR, vmin=-maxval, vmax=maxval)
+    ax3_2.set_xlabel('x')
+    ax3_2.set_ylabel('y')
+    fig3_2.colorbar(colormap)
+
+    #Plota Ez 3D
+    X, Y = animacao2D.eixos(Ez[-1].shape, LEN)
+    ax4.plot_surface(X, Y, Ez[int(0.6*TIME)], rcount = 200 , ccount = 200,  cmap=COR)
+    ax4.set_xlabel('x')
+    ax4.set_ylabel('y')
+    ax4.set_zlabel('V/m')
+    ax4_2.plot_surface(X, Y, Ez[-1], rcount = 200 , ccount = 200,  cmap=COR)
+    ax4_2.set_xlabel('x')
+    ax4_2.set_ylabel('y')
+    ax4_2.set_zlabel('V/m')
+    #Calcula e define os limites do eixo Z
+    zmax = np.maximum(np.amax(Ez[int(0.6*TIME)]), np.amax(Ez[-1]))
+    zmin = np.minimum(np.amin(Ez[int(0.6*TIME)]), np.amin(Ez[-1]))
+    ax4.set_zlim(zmin, zmax)
+    ax4_2.set_zlim(zmin, zmax)
+
+    plt.show()
 
 
@@ -0,0 +1,183 @@
+"""
+Bordas absorventes para os solvers de Yee (ver yee.py): CPML (camada
+perfeitamente casada convolucional) em 1D e 2D e a ABC de Mur de primeira
+ordem nos casos 1D.
+
+Com as paredes condutoras originais a onda volta da borda, o que obriga a
+parar a simulação antes das reflexões ou a aumentar a grade. A CPML
+(Roden e Gedney) ocupa as últimas 'espessura' células junto às paredes:
+nelas cada diferença espacial d da atualização vira d/kappa + psi, com a
+variável auxiliar psi = b*psi + a*d (a convolução recursiva), e os perfis
+sigma, kappa e alfa crescem com a profundidade na camada. Os
+coeficientes b, a e 1/kappa - 1 de cada célula são calculados uma só vez
+(ver CPML.perfil()) e a correção é aplicada depois da atualização normal,
+só nas faixas da camada, com o restante dos laços inalterado.
+
+Em 1D a camada fica só na borda direita (na esquerda está a fonte) e em
+2D nas quatro paredes. A ABC de Mur é um único ponto por passo:
+E_N(n+1) = E_N-1(n) + (S-1)/(S+1)*(E_N-1(n+1) - E_N(n)), exata para S = 1.
+"""
+
+import numpy as np
+
+def coeficienteMur(S):
+    """
+    Coeficiente (S-1)/(S+1) da ABC de Mur para o número de Courant S = v*dt/dx
+    """
+    return (S - 1)/(S + 1)
+
+class CPML:
+    """
+    Parâmetros da CPML; camada1D() e camada2D() montam as faixas e as
+    variáveis auxiliares de uma simulação
+    """
+    def __init__(self, espessura, dt, dx, EPSILON, MU, grau=3, reflexao=1e-8, kappaMax=1.0, alfaMax=0.0):
+        """
+        entradas:
+        espessura - número de células da camada
+        dt, dx - passos de tempo e espaço
+        EPSILON, MU - permissividade e permeabilidade do meio
+        grau - grau do polinômio dos perfis de sigma e kappa
+        reflexao - reflexão teórica na incidência normal (define sigma máximo)
+        kappaMax - kappa na parede (1 = sem esticamento real)
+        alfaMax - alfa na entrada da camada (S/m, decresce até 0 na parede)
+        """
+        assert espessura >= 1, "Espessura da CPML inválida!"
+        self.espessura = espessura
+        self.dt = dt
+        self.dx = dx
+        self.EPSILON = EPSILON
+        self.MU = MU
+        self.grau = grau
+        self.reflexao = reflexao
+        self.kappaMax = kappaMax
+        self.alfaMax = alfaMax
+        # sigma máximo para a reflexão teórica pedida
+        eta = np.sqrt(MU/EPSILON)
+        self.sigmaMax = -(grau + 1)*np.log(reflexao)/(2*eta*espessura*dx)
+
+    def __repr__(self):
+        # Usado na chave do cache (ver comum/cache.py)
+        return ("CPML(espessura=%r, dt=%r, dx=%r, EPSILON=%r, MU=%r, grau=%r, reflexao=%r, kappaMax=%r, alfaMax=%r)"
+                % (self.espessura, self.dt, self.dx, self.EPSILON, self.MU, self.grau,
+                   self.reflexao, self.kappaMax, self.alfaMax))
+
+    def perfil(self, profundidade, dtype=np.float64):
+        """
+        Coeficientes das células com a profundidade dada (em células, de 0
+        na entrada a 'espessura' na parede)
+        saídas: b, a e 1/kappa - 1
+        """
+        x = np.clip(np.asarray(profundidade, dtype=float)/self.espessura, 0, 1)
+        sigma = self.sigmaMax*x**self.grau
+        kappa = 1 + (self.kappaMax - 1)*x**self.grau
+        alfa = self.alfaMax*(1 - x)
+        b = np.exp(-(sigma/kappa + alfa)*self.dt/self.EPSILON)
+        denominador = sigma*kappa + kappa**2*alfa
+        a = np.zeros_like(b)
+        np.divide(sigma*(b - 1), denominador, out=a, where=denominador > 0)
+        return [np.asarray(valor, dtype=dtype) for valor in (b, a, 1/kappa - 1)]
+
+    def _faixa(self, profundidade, eixo, dimensoes, dtype):
+        """
+        Coeficientes de uma faixa com as profundidades dadas ao longo de um
+        eixo, no formato que se propaga pelo outro eixo em 2D
+        """
+        b, a, k1 = self.perfil(profundidade, dtype)
+        forma = (-1,) + (1,)*(dimensoes - 1) if eixo == 0 else (1, -1)
+        return [coef.reshape(forma) for coef in (b, a, k1)]
+
+    def _termo(self, destino, mais, menos, coeficientes, sinal):
+        b, a, k1 = coeficientes
+        psi = np.zeros(np.broadcast_shapes(destino.shape, b.shape), dtype=destino.dtype)
+        return (destino, mais, menos, b, a, k1, psi, sinal)
+
+    def camada1D(self, Ez, Hy):
+        """
+        Camada na borda direita do caso 1D (Ez com LEN+1 pontos e Hy com LEN)
+        """
+        LEN = len(Hy)
+        N = self.espessura
+        assert N < LEN, "A CPML é mais espessa que a grade!"
+        dtype = Ez.dtype
+        # A camada começa na posição LEN-N e termina na parede (posição LEN)
+        # Ez[i] (posição i) com i em [LEN-N+1, LEN) usa Hy[i] - Hy[i-1]
+        termosE = [self._termo(Ez[LEN-N+1:LEN], Hy[LEN-N+1:LEN], Hy[LEN-N:LEN-1],
+                               self._faixa(np.arange(1, N), 0, 1, dtype), 1)]
+        # Hy[i] (posição i + 1/2) com i em [LEN-N, LEN) usa Ez[i+1] - Ez[i]
+        termosH = [self._termo(Hy[LEN-N:LEN], Ez[LEN-N+1:LEN+1], Ez[LEN-N:LEN],
+                               self._faixa(np.arange(N) + 0.5, 0, 1, dtype), 1)]
+        return Camada(termosE, [], termosH)
+
+    def camada2D(self, Ez, Hx, Hy):
+        """
+        Camada nas quatro paredes do caso 2D (Ez (LEN+1, LEN+1), Hx (LEN+1, LEN)
+        e Hy (LEN, LEN+1))
+        """
+        LEN = Hx.shape[1]
+        N = self.espessura
+        assert 2*N < LEN, "A CPML é mais espessa que a grade!"
+        dtype = Ez.dtype
+        termosE = []
+        termosHx = []
+        termosHy = []
+        # Profundidade da posição p: N - p junto à parede 0 e p - (LEN-N) junto à parede LEN
+        # Faixas de Ez (pontos internos com profundidade > 0) e de Hx, Hy (posições i + 1/2)
+        faixasE = ((1, N, N - np.arange(1, N)), (LEN-N+1, LEN, np.arange(1, N)))
+        faixasH = ((0, N, N - np.arange(N) - 0.5), (LEN-N, LEN, np.arange(N) + 0.5))
+        for a, b, profundidade in faixasE:
+            # Eixo 0: Ez += CB*(Hy[i] - Hy[i-1]) nas linhas [a, b)
+            termosE.append(self._termo(Ez[a:b, 1:-1], Hy[a:b, 1:-1], Hy[a-1:b-1, 1:-1],
+                                       self._faixa(profundidade, 0, 2, dtype), 1))
+            # Eixo 1: Ez -= CB*(Hx[:, j] - Hx[:, j-1]) nas colunas [a, b)
+            termosE.append(self._termo(Ez[1:-1, a:b], Hx[1:-1, a:b], Hx[1:-1, a-1:b-1],
+                                       self._faixa(profundidade, 1, 2, dtype), -1))
+        for a, b, profundidade in faixasH:
+            # Hx -= DB*(Ez[:, j+1] - Ez[:, j]) nas colunas [a, b)
+            termosHx.append(self._termo(Hx[:, a:b], Ez[:, a+1:b+1], Ez[:, a:b],
+                                       self._faixa(profundidade, 1, 2, dtype), -1))
+            # Hy += DB*(Ez[i+1] - Ez[i]) nas linhas [a, b)
+            termosHy.append(self._termo(Hy[a:b], Ez[a+1:b+1], Ez[a:b],
+                                       self._faixa(profundidade, 0, 2, dtype), 1))
+        return Camada(termosE, termosHx, termosHy)
+
+class Camada:
+    """
+    Faixas da CPML de uma simulação: visões dos campos, coeficientes e psi
+    (os campos devem ser atualizados no próprio array, como em yee.py)
+    """
+    def __init__(self, termosE, termosHx, termosHy):
+        self.termosE = termosE
+        self.termosHx = termosHx
+        self.termosHy = termosHy
+
+    def corrigirE(self, CB):
+        """
+        Correção de Ez depois da atualização normal (CB da atualização)
+        """
+        _corrigir(self.termosE, CB)
+
+    def corrigirH(self, DBx, DBy=None):
+        """
+        Correção de Hx e Hy depois da atualização normal (DB da atualização
+        de cada campo; DBy padrão DBx, como no caso 1D, que só tem Hy)
+        """
+        _corrigir(self.termosHx, DBx)
+        _corrigir(self.termosHy, DBx if DBy is None else DBy)
+
+def _corrigir(termos, C):
+    """
+    destino += sinal*C*(d*(1/kappa - 1) + psi), com psi = b*psi + a*d e
+    d = mais - menos
+    """
+    for destino, mais, menos, b, a, k1, psi, sinal in termos:
+        d = mais - menos
+        psi *= b
+        psi += a*d
+        d *= k1
+        d += psi
+        d *= C
+        if(sinal > 0):
+            destino += d
+        else:
+            destino -= d
@@ -0,0 +1,37 @@
+"""
+Testes do ADI-FDTD (adi.py): o algoritmo de Thomas resolve os sistemas
+tridiagonais e o esquema continua estável acima do limite do CFL do Yee.
+"""
+
+import numpy as np
+import yee
+import adi
+
+def _pulso(passos):
+    t = np.arange(passos)
+    return np.exp(-((t - 15)/5.0)**2)
+
+def test_thomas():
+    gerador = np.random.default_rng(0)
+    N, M = 12, 5
+    inferior, superior = -gerador.random((N, M)), -gerador.random((N, M))
+    diagonal = 3 + gerador.random((N, M))
+    d = gerador.random((N, M))
+    esperado = np.empty_like(d)
+    for j in range(M):
+        A = np.diag(diagonal[:, j]) + np.diag(inferior[1:, j], -1) + np.diag(superior[:-1, j], 1)
+        esperado[:, j] = np.linalg.solve(A, d[:, j])
+    x = adi.resolver(adi.fatorar(inferior, diagonal, superior), d.copy(), np.empty(M))
+    np.testing.assert_allclose(x, esperado, rtol=1e-12, atol=1e-14)
+
+def test_estavel_acima_do_CFL():
+    # Constantes de meio passo com dt = 2: Courant 2, quase três vezes o
+    # limite 1/sqrt(2) do Yee 2D, que com o mesmo dt diverge
+    LEN, TIME, C = 40, 400, 1.0
+    maximo = 0
+    for n, Ez, Hx, Hy in adi.quadros2D(_pulso(TIME), 1.0, C, 1.0, C, LEN, TIME):
+        maximo = max(maximo, float(np.max(np.abs(Ez))))
+    assert maximo < 2    # continua na ordem da amplitude da fonte
+    with np.errstate(all='ignore'):
+        Ez = yee.simular2D(_pulso(TIME), 1.0, 2*C, 1.0, 2*C, LEN, TIME)[0]
+    assert not np.all(np.abs(Ez[-1]) < 1e3)
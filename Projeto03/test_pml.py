@@ -0,0 +1,50 @@
+"""
+Testes das bordas absorventes (pml.py): a reflexão na borda é medida
+comparando, a cada passo, a grade pequena com uma grade grande o bastante
+para que a sua própria reflexão não volte à região comparada.
+"""
+
+import numpy as np
+import yee
+import pml
+
+def _pulso(passos):
+    # Pulso gaussiano suave
+    t = np.arange(passos)
+    return np.exp(-((t - 40)/12.0)**2)
+
+def erroMaximo(pequeno, grande, regiao, deslocamento=0):
+    """
+    Maior diferença de Ez entre os quadros de dois geradores na região dada
+    da grade pequena (a mesma região na grande, deslocada em cada eixo)
+    """
+    outra = tuple(slice(r.start + deslocamento, r.stop + deslocamento) for r in regiao)
+    return max(float(np.max(np.abs(a[1][regiao] - b[1][outra]))) for a, b in zip(pequeno, grande))
+
+def test_reflexao_1D():
+    LEN, TIME = 100, 400
+    S = 1.0     # a ABC de Mur é exata para S = 1
+    def gerador(quadros, L, **opcoes):
+        return quadros(_pulso(TIME), 1.0, S, 1.0, S, L, TIME, **opcoes)
+    mur = pml.coeficienteMur(S)
+    assert erroMaximo(gerador(yee.quadros1D, LEN, mur=mur),
+                      gerador(yee.quadros1D, 3*LEN), (slice(0, LEN+1),)) < 1e-12
+    assert erroMaximo(gerador(yee.quadros1DHy, LEN, mur=mur),
+                      gerador(yee.quadros1DHy, 3*LEN), (slice(0, LEN),)) < 1e-12
+    # Na CPML a comparação vai só até a entrada da camada (a grade com
+    # paredes condutoras reflete o pulso inteiro)
+    cpml = pml.CPML(10, S, 1.0, 1.0, 1.0)
+    assert erroMaximo(gerador(yee.quadros1D, LEN, cpml=cpml),
+                      gerador(yee.quadros1D, 3*LEN), (slice(0, LEN-9),)) < 1e-4
+
+def test_reflexao_2D():
+    LEN, TIME, S = 60, 150, 0.5
+    def gerador(L, **opcoes):
+        return yee.quadros2D(_pulso(TIME), 1.0, S, 1.0, S, L, TIME, **opcoes)
+    # Pontos fora da camada, com a grade pequena no centro da grande
+    interno = (slice(10, LEN-9),)*2
+    cpml = pml.CPML(10, S, 1.0, 1.0, 1.0)
+    def erro(**opcoes):
+        return erroMaximo(gerador(LEN, **opcoes), gerador(3*LEN), interno, LEN)
+    absorvente, condutora = erro(cpml=cpml), erro()
+    assert absorvente < 1e-4 and absorvente < 1e-3*condutora
@@ -0,0 +1,103 @@
+"""
+Testes dos laços de Yee (yee.py): os núcleos no próprio array, a divisão
+em faixas entre threads, a janela ativa e a simulação da metade ou do
+quadrante da grade dão o mesmo resultado, bit a bit, que as expressões
+originais dos scripts. As diferenças de quarta ordem (FDTD(2,4)) são
+exatas para polinômios cúbicos.
+"""
+
+import numpy as np
+import pytest
+import yee
+from comum import executor
+
+# Unidades normalizadas, Courant 0.5 (estável em 1D e 2D)
+CA, CB, DA, DB = 1.0, 0.5, 1.0, 0.5
+LEN, TIME = 40, 60
+
+def _pulso(passos):
+    t = np.arange(passos)
+    return np.exp(-((t - 15)/5.0)**2)
+
+def _original1D(Ez_t):
+    Ez = np.zeros(LEN+1)
+    Hy = np.zeros(LEN)
+    Ez[0] = Ez_t[0]
+    for n in range(1, TIME):
+        Ez[1:-1] = CA*Ez[1:-1] + CB*(Hy[1:]-Hy[:-1])
+        Ez[0] = Ez_t[n]
+        Hy = DA*Hy + DB*(Ez[1:] - Ez[:-1])
+    return Ez, Hy
+
+def _original2D(Ez_t):
+    Ez = np.zeros((LEN+1, LEN+1))
+    Hx = np.zeros((LEN+1, LEN))
+    Hy = np.zeros((LEN, LEN+1))
+    for n in range(1, TIME):
+        Ez[1:-1, 1:-1] = CA*Ez[1:-1, 1:-1] + CB*(
+            - (Hx[1:-1, 1:] - Hx[1:-1, :-1])
+            + (Hy[1:, 1:-1] - Hy[:-1, 1:-1])
+            )
+        Ez[int(LEN/2), int(LEN/2)] = Ez_t[n]
+        Hx = DA*Hx - DB*(Ez[:, 1:] - Ez[:, :-1])
+        Hy = DA*Hy + DB*(Ez[1:, :] - Ez[:-1, :])
+    return Ez, Hx, Hy
+
+def ultimo(gerador, **opcoes):
+    """
+    Cópia dos campos no último passo de um gerador de yee.py
+    """
+    for _, *campos in gerador(_pulso(TIME), CA, CB, DA, DB, LEN, TIME, k=TIME-1, **opcoes):
+        pass
+    return [np.copy(campo) for campo in campos]
+
+def todos(gerador, **opcoes):
+    """
+    Históricos (TIME, ...) de todos os campos de um gerador de yee.py
+    """
+    return yee.historico(gerador(_pulso(TIME), CA, CB, DA, DB, LEN, TIME, **opcoes), TIME)
+
+def iguais(a, b):
+    return all(np.array_equal(x, y) for x, y in zip(a, b))
+
+@pytest.fixture
+def threads():
+    executor.configurar(3, tamanhoTrecho=7, limiar=0)
+    yield
+    executor.configurar(1)
+
+def test_nucleos_identicos_ao_original():
+    assert iguais(ultimo(yee.quadros1D), _original1D(_pulso(TIME)))
+    assert iguais(ultimo(yee.quadros2D), _original2D(_pulso(TIME)))
+
+@pytest.mark.parametrize('gerador, opcoes', [(yee.quadros1D, {}), (yee.quadros1DHy, {}), (yee.quadros2D, {}),
+                                             (yee.quadros1D, {'ordem': 4}), (yee.quadros2D, {'ordem': 4})])
+def test_threads_identicas(gerador, opcoes, threads):
+    paralelo = ultimo(gerador, **opcoes)
+    executor.configurar(1)
+    assert iguais(paralelo, ultimo(gerador, **opcoes))
+
+@pytest.mark.parametrize('gerador, opcoes', [(yee.quadros1D, {}), (yee.quadros1DHy, {}), (yee.quadros2D, {}),
+                                             (yee.quadros1D, {'ordem': 4})])
+def test_janela_identica(gerador, opcoes):
+    # TIME passa do passo em que a janela alcança as paredes
+    assert iguais(todos(gerador, janela=True, **opcoes), todos(gerador, **opcoes))
+
+@pytest.mark.parametrize('simetria', [(True, True), (True, False), (False, True)])
+def test_simetria_identica(simetria):
+    parte = yee.simular2DSimetria(_pulso(TIME), CA, CB, DA, DB, LEN, TIME, simetria=simetria)
+    inteira = todos(yee.quadros2D)
+    assert iguais(yee.completar2D(*parte, simetria=simetria), inteira)
+    # Espelhado reconstrói só o quadro pedido
+    assert iguais([campo[TIME//2] for campo in yee.espelhados(*parte, simetria=simetria)],
+                  [campo[TIME//2] for campo in inteira])
+
+def test_diferenca4_exata_para_cubicas():
+    x = np.arange(12.0)
+    f = np.outer(x**3 - 2*x**2 + x, np.ones(3))
+    d = yee.diferenca4(f, np.empty((11, 3)), np.empty((11, 3)))
+    # Derivada no meio de cada intervalo; as pontas usam a segunda ordem
+    meio = x[:-1] + 0.5
+    np.testing.assert_allclose(d[1:-1, 0], (3*meio**2 - 4*meio + 1)[1:-1], rtol=1e-12)
+    np.testing.assert_array_equal(d[[0, -1], 0], (f[1:] - f[:-1])[[0, -1], 0])
+    np.testing.assert_array_equal(yee.diferenca4(f.T, np.empty((3, 11)), np.empty((3, 11)), eixo=1), d.T)
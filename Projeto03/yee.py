@@ -0,0 +1,611 @@
+"""
+Laços principais do algoritmo de Yee (1D, 1D com Hy no contorno e 2D),
+separados dos scripts de configuração e dos gráficos.
+
+Cada caso tem um gerador de quadros, que guarda só o passo atual de cada
+campo (as atualizações de Yee podem ser feitas no próprio array) e entrega
+um quadro a cada k passos enquanto a simulação avança, e uma função
+simular*, que monta o histórico completo (TIME, ...) a partir do gerador.
+
+Os quadros entregues são os próprios arrays da simulação: quem precisar
+guardá-los deve copiá-los antes de pedir o próximo.
+
+As atualizações são feitas pelos núcleos diferenca() e atualizar(), que
+usam buffers de rascunho alocados uma única vez e operações com out= e no
+próprio array, sem criar arrays temporários a cada passo (a banda de
+memória é o gargalo em grades grandes). Os resultados são idênticos, bit a
+bit, às expressões originais (CA*Ez + CB*(...) etc.), pois as operações
+são as mesmas e na mesma ordem. bytesPorPasso() mede o que ainda é alocado:
+no 2D resta só o buffer interno dos ufuncs para fatias não contíguas
+(~128 kB, que não cresce com a grade).
+
+Todos os geradores aceitam dtype (np.float64 ou np.float32, que usa
+metade da memória e da banda); os campos, rascunhos e constantes são
+criados nessa precisão (ver comum/precisao.py para o desvio em relação
+a float64).
+
+Cada meio passo é escrito como uma função de uma faixa de pontos (1D) ou
+de linhas (2D) e executado por comum/executor.py, que pode dividi-lo entre
+threads (ver executor.configurar()).
+
+Com comum/instrumentacao.py ligado, os laços medem o tempo das fases E,
+fonte, H e contorno e mostram o progresso (desligado, custa só um teste
+por fase).
+
+Com janela=True os geradores atualizam só a região que a onda já pode ter
+alcançado: partindo do ponto da fonte, cada passo cresce a região de uma
+célula para cada lado (o alcance do estêncil, qualquer que seja o número
+de Courant), e fora dela os campos continuam exatamente nulos. O resultado
+é idêntico, bit a bit, ao da grade inteira; em 1D o trabalho cai até à
+metade enquanto a onda atravessa a grade e em 2D a área atualizada cresce
+com o quadrado do passo até a região alcançar as paredes, quando os
+geradores voltam à atualização completa.
+
+Com ordem=4 os geradores de quadros1D() e quadros2D() usam as diferenças
+espaciais de quarta ordem de diferenca4() (FDTD(2,4)), com as de segunda
+ordem junto às bordas, onde falta um vizinho do estêncil. O limite de
+estabilidade cai para S = 6/7 em 1D e 6/(7*sqrt(2)) em 2D, mas o erro de
+fase cai bem mais rápido com N (ver comum/dispersao.py), o que permite
+grades mais grossas; a janela ativa cresce três células por passo em 1D e
+não é usada em 2D.
+
+As paredes refletoras originais podem ser trocadas por bordas absorventes
+(ver pml.py): cpml recebe um pml.CPML, cuja camada corrige os campos das
+faixas junto às paredes depois de cada meio passo, e nos casos 1D mur
+recebe o coeficiente de pml.coeficienteMur() para a ABC de Mur na borda
+direita. Com os dois em None o laço é o original.
+
+CA, CB, DA e DB podem ser constantes (meio homogêneo) ou mapas por ponto
+calculados uma só vez por comum/materiais.py (CA e CB nos pontos internos
+de Ez, DA e DB nos pontos de Hy, e em 2D pares (Hx, Hy) para DA e DB);
+cada faixa usa a parte correspondente do mapa (ver trecho()) e a
+atualização continua sendo a mesma expressão. A CPML exige CB e DB
+constantes.
+
+Com a fonte no centro da grade 2D (LEN par) e o meio simétrico, Ez é par
+em relação à linha e à coluna centrais e quadros2DSimetria() simula só a
+metade ou o quadrante (ver simetrias()). O plano de simetria é uma parede
+magnética: o H tangencial é ímpar e fica numa linha (ou coluna) fantasma
+com o negativo da primeira, de modo que a atualização de Ez no plano é a
+mesma da grade inteira e o resultado é idêntico, bit a bit, com 1/4 da
+memória e do trabalho no quadrante. completar2D() reconstrói a grade
+inteira e Espelhado faz isso só para os quadros pedidos.
+"""
+
+import os
+import sys
+import tracemalloc
+import numpy as np
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from comum import executor, instrumentacao
+
+def diferenca(a, b, out):
+    """
+    Calcula out = a - b (diferença finita) sem alocar arrays
+    """
+    return np.subtract(a, b, out=out)
+
+def diferenca4(f, out, rascunho, eixo=0, a=0, b=None):
+    """
+    Diferenças de quarta ordem entre pontos consecutivos de f ao longo do
+    eixo, (27*(f[i+1] - f[i]) - (f[i+2] - f[i-1]))/24, nas posições [a, b)
+    de out (que tem uma posição a menos que f no eixo), com as de segunda
+    ordem f[i+1] - f[i] na primeira e na última posição, onde falta um dos
+    vizinhos; rascunho tem a forma de out
+    """
+    n = f.shape[eixo] - 1
+    b = n if b is None else b
+    f, o, r = (np.moveaxis(x, eixo, 0) for x in (f, out, rascunho))
+    np.subtract(f[a+1:b+1], f[a:b], out=o[a:b])
+    c, d = max(a, 1), min(b, n-1)
+    if(d > c):
+        np.subtract(f[c+2:d+2], f[c-1:d-1], out=r[c:d])
+        o[c:d] *= 27
+        o[c:d] -= r[c:d]
+        o[c:d] /= 24
+    return out
+
+def atualizar(campo, A, B, rotacional, subtrair=False):
+    """
+    Atualiza campo = A*campo + B*rotacional (ou A*campo - B*rotacional se
+    subtrair) no próprio array; rotacional é usado como rascunho
+    """
+    rotacional *= B
+    campo *= A
+    if(subtrair):
+        campo -= rotacional
+    else:
+        campo += rotacional
+    return campo
+
+def coeficientes(dtype, *valores):
+    """
+    Converte as constantes da atualização para a precisão dos campos, para
+    que as operações não sejam promovidas para float64
+    """
+    return [np.asarray(valor, dtype=dtype) for valor in valores]
+
+def trecho(coeficiente, *indices):
+    """
+    Parte de um mapa de coeficientes correspondente aos índices dados
+    (constantes são usadas inteiras)
+    """
+    if(coeficiente.ndim == 0):
+        return coeficiente
+    return coeficiente[indices]
+
+def porCampo(coeficiente):
+    """
+    Separa um coeficiente de H do 2D em (Hx, Hy): o par de mapas ou a mesma
+    constante para os dois campos
+    """
+    if(isinstance(coeficiente, (tuple, list))):
+        return coeficiente
+    return coeficiente, coeficiente
+
+def quadros1D(Ez_t, CA, CB, DA, DB, LEN, TIME, k=1, dtype=np.float64, janela=False, mur=None, cpml=None,
+              ordem=2):
+    """
+    Gerador do caso 1D (Ez com LEN+1 pontos, nulo na borda direita)
+    entradas:
+    Ez_t - campo imposto na borda esquerda em função do tempo
+    CA, CB, DA, DB - constantes da atualização
+    LEN, TIME - número de pontos no espaço e no tempo
+    k - entrega um quadro a cada k passos
+    dtype - precisão dos campos (np.float64 ou np.float32)
+    janela - atualiza só a região já alcançada pela onda (ver acima)
+    mur - coeficiente da ABC de Mur na borda direita (None = parede condutora)
+    cpml - pml.CPML da camada absorvente na borda direita (None = sem camada)
+    ordem - ordem das diferenças espaciais, 2 ou 4 (ver diferenca4(), sem CPML)
+    saídas (a cada quadro):
+    n, Ez, Hy - passo de tempo e campos nesse passo
+    """
+    CA, CB, DA, DB = coeficientes(dtype, CA, CB, DA, DB)
+    # Condições iniciais
+    Ez = np.zeros(LEN+1, dtype=dtype)
+    Hy = np.zeros(LEN, dtype=dtype)
+    Ez[0] = Ez_t[0]     # Fonte na borda esquerda
+    # Rascunhos dos rotacionais
+    rotE = np.empty(LEN-1, dtype=dtype)
+    rotH = np.empty(LEN, dtype=dtype)
+    assert ordem in (2, 4), "Ordem inválida!"
+    assert not cpml or (CB.ndim == 0 and DB.ndim == 0), "A CPML exige CB e DB constantes!"
+    assert not cpml or ordem == 2, "A CPML exige as diferenças de segunda ordem!"
+    camada = cpml.camada1D(Ez, Hy) if cpml else None
+    if(ordem == 4):
+        rascunhoE, rascunhoH = np.empty_like(rotE), np.empty_like(rotH)
+    yield 0, Ez, Hy
+
+    # Ez[1:-1] = CA*Ez[1:-1] + CB*(Hy[1:]-Hy[:-1]) nos pontos internos [a, b)
+    def passoE(a, b):
+        if(ordem == 4):
+            rot = diferenca4(Hy, rotE, rascunhoE, a=a, b=b)[a:b]
+        else:
+            rot = diferenca(Hy[1+a:1+b], Hy[a:b], rotE[a:b])
+        atualizar(Ez[1+a:1+b], trecho(CA, slice(a, b)), trecho(CB, slice(a, b)), rot)
+
+    # Hy = DA*Hy + DB*(Ez[1:] - Ez[:-1]) nos pontos [a, b)
+    def passoH(a, b):
+        if(ordem == 4):
+            rot = diferenca4(Ez, rotH, rascunhoH, a=a, b=b)[a:b]
+        else:
+            rot = diferenca(Ez[a+1:b+1], Ez[a:b], rotH[a:b])
+        atualizar(Hy[a:b], trecho(DA, slice(a, b)), trecho(DB, slice(a, b)), rot)
+
+    # Ez e Hy só podem ser não nulos nos pontos [0, alcance); com o estêncil
+    # de quarta ordem Ez chega a um ponto além e Hy a três a cada passo
+    alcance = 1 if janela else LEN
+    alemE, alemH = (0, 1) if ordem == 2 else (1, 3)
+    medidor = instrumentacao.medidor(TIME-1, 'Yee 1D', 2*LEN+1)
+    for n in range(1, TIME): # Começa em 1 porque condições iniciais são conhecidas
+        if(medidor):
+            medidor.inicio()
+        anterior = Ez[-2]   # Ez[LEN-1] no passo anterior (ABC de Mur)
+        executor.executar(passoE, min(alcance+alemE, LEN-1))
+        if(camada):
+            camada.corrigirE(CB)
+        if(medidor):
+            medidor.fase('E')
+        Ez[0] = Ez_t[n]
+        if(medidor):
+            medidor.fase('fonte')
+        if(mur is not None):
+            Ez[-1] = anterior + mur*(Ez[-2] - Ez[-1])
+            if(medidor):
+                medidor.fase('contorno')
+        executor.executar(passoH, min(alcance+alemH, LEN))
+        if(camada):
+            camada.corrigirH(DB)
+        alcance += alemH
+        if(medidor):
+            medidor.fase('H')
+            medidor.passo(n, Ez=Ez, Hy=Hy)
+        if(n % k == 0):
+            yield n, Ez, Hy
+    if(medidor):
+        medidor.fim()
+
+def quadros1DHy(Ez_t, CA, CB, DA, DB, LEN, TIME, k=1, dtype=np.float64, janela=False, mur=None):
+    """
+    Gerador do caso 1D com Hy nulo na borda direita (Ez e Hy com LEN pontos)
+    entradas e saídas como em quadros1D() (com mur, Hy[-1] segue a ABC de
+    Mur em vez de ser nulo)
+    """
+    CA, CB, DA, DB = coeficientes(dtype, CA, CB, DA, DB)
+    # Condições iniciais
+    Ez = np.zeros(LEN, dtype=dtype)
+    Hy = np.zeros(LEN, dtype=dtype)
+    Ez[0] = Ez_t[0]     # Fonte na borda esquerda
+    # Rascunho dos rotacionais (ambos com LEN-1 pontos)
+    rot = np.empty(LEN-1, dtype=dtype)
+    yield 0, Ez, Hy
+
+    # Ez[1:] = CA*Ez[1:] + CB*(Hy[1:]-Hy[:-1]) nos pontos [a, b) de Ez[1:]
+    def passoE(a, b):
+        atualizar(Ez[1+a:1+b], trecho(CA, slice(a, b)), trecho(CB, slice(a, b)),
+                  diferenca(Hy[1+a:1+b], Hy[a:b], rot[a:b]))
+
+    # Hy[:-1] = DA*Hy[:-1] + DB*(Ez[1:] - Ez[:-1]) nos pontos [a, b)
+    def passoH(a, b):
+        atualizar(Hy[a:b], trecho(DA, slice(a, b)), trecho(DB, slice(a, b)),
+                  diferenca(Ez[a+1:b+1], Ez[a:b], rot[a:b]))
+
+    # Ez e Hy só podem ser não nulos nos pontos [0, alcance)
+    alcance = 1 if janela else LEN
+    medidor = instrumentacao.medidor(TIME-1, 'Yee 1D Hy', 2*LEN)
+    for n in range(1, TIME):
+        if(medidor):
+            medidor.inicio()
+        executor.executar(passoE, min(alcance, LEN-1))
+        if(medidor):
+            medidor.fase('E')
+        Ez[0] = Ez_t[n]
+        if(medidor):
+            medidor.fase('fonte')
+        anterior = Hy[-2]   # Hy[LEN-2] no passo anterior (ABC de Mur)
+        executor.executar(passoH, min(alcance+1, LEN-1))
+        alcance += 1
+        if(medidor):
+            medidor.fase('H')
+        if(mur is None):
+            Hy[-1] = 0
+        else:
+            Hy[-1] = anterior + mur*(Hy[-2] - Hy[-1])
+        if(medidor):
+            medidor.fase('contorno')
+            medidor.passo(n, Ez=Ez, Hy=Hy)
+        if(n % k == 0):
+            yield n, Ez, Hy
+    if(medidor):
+        medidor.fim()
+
+def quadros2D(Ez_t, CA, CB, DA, DB, LEN, TIME, k=1, dtype=np.float64, janela=False, cpml=None, ordem=2):
+    """
+    Gerador do caso 2D (Ez no centro da grade, paredes condutoras)
+    entradas como em quadros1D() (cpml com a camada nas quatro paredes e,
+    com ordem = 4, a grade inteira atualizada a cada passo, sem janela)
+    saídas (a cada quadro):
+    n, Ez, Hx, Hy - passo de tempo e campos nesse passo
+    """
+    (DAx, DAy), (DBx, DBy) = porCampo(DA), porCampo(DB)
+    CA, CB, DAx, DAy, DBx, DBy = coeficientes(dtype, CA, CB, DAx, DAy, DBx, DBy)
+    # Condições iniciais (Ez nulo nas bordas)
+    Ez = np.zeros((LEN+1, LEN+1), dtype=dtype)
+    Hx = np.zeros((LEN+1, LEN), dtype=dtype)
+    Hy = np.zeros((LEN, LEN+1), dtype=dtype)
+    # Rascunhos dos rotacionais
+    rotX = np.empty((LEN-1, LEN-1), dtype=dtype)
+    rotY = np.empty((LEN-1, LEN-1), dtype=dtype)
+    difX = np.empty((LEN+1, LEN), dtype=dtype)
+    difY = np.empty((LEN, LEN+1), dtype=dtype)
+    assert ordem in (2, 4), "Ordem inválida!"
+    assert not cpml or all(C.ndim == 0 for C in (CB, DBx, DBy)), "A CPML exige CB e DB constantes!"
+    assert not cpml or ordem == 2, "A CPML exige as diferenças de segunda ordem!"
+    camada = cpml.camada2D(Ez, Hx, Hy) if cpml else None
+    if(ordem == 4):
+        rascunhos = [np.empty_like(rot) for rot in (rotX, rotY, difX, difY)]
+    yield 0, Ez, Hx, Hy
+
+    # Ez = CA*Ez + CB*(-(Hx[1:-1, 1:] - Hx[1:-1, :-1]) + (Hy[1:, 1:-1] - Hy[:-1, 1:-1]))
+    # nas linhas internas [a, b)
+    def passoE(a, b):
+        rx, ry = rotX[a:b], rotY[a:b]
+        if(ordem == 4):
+            diferenca4(Hx[1+a:1+b], rx, rascunhos[0][a:b], eixo=1)
+            diferenca4(Hy[:, 1:-1], rotY, rascunhos[1], a=a, b=b)
+        else:
+            diferenca(Hx[1+a:1+b, 1:], Hx[1+a:1+b, :-1], rx)
+            diferenca(Hy[1+a:1+b, 1:-1], Hy[a:b, 1:-1], ry)
+        atualizar(Ez[1+a:1+b, 1:-1], trecho(CA, slice(a, b)), trecho(CB, slice(a, b)), diferenca(ry, rx, ry))
+
+    # Hx = DA*Hx - DB*(Ez[:, 1:] - Ez[:, :-1]) e
+    # Hy = DA*Hy + DB*(Ez[1:, :] - Ez[:-1, :]) nas linhas [a, b)
+    def passoH(a, b):
+        if(ordem == 4):
+            rx = diferenca4(Ez[a:b], difX[a:b], rascunhos[2][a:b], eixo=1)
+        else:
+            rx = diferenca(Ez[a:b, 1:], Ez[a:b, :-1], difX[a:b])
+        atualizar(Hx[a:b], trecho(DAx, slice(a, b)), trecho(DBx, slice(a, b)), rx, subtrair=True)
+        c = min(b, LEN)     # Hy tem só LEN linhas
+        if(c > a):
+            if(ordem == 4):
+                ry = diferenca4(Ez, difY, rascunhos[3], a=a, b=c)[a:c]
+            else:
+                ry = diferenca(Ez[a+1:c+1], Ez[a:c], difY[a:c])
+            atualizar(Hy[a:c], trecho(DAy, slice(a, c)), trecho(DBy, slice(a, c)), ry)
+
+    # Janela ativa: os três campos só podem ser não nulos nas linhas e
+    # colunas [lo, hi); Ez é atualizado em [lo, hi+1) e Hx e Hy em [lo-1, hi+1)
+    # (passoEJanela recebe linhas de Ez e passoHJanela linhas de Hx e Hy)
+    def passoEJanela(a, b):
+        rx, ry = rotX[a-1:b-1, lo-1:hi], rotY[a-1:b-1, lo-1:hi]
+        diferenca(Hx[a:b, lo:hi+1], Hx[a:b, lo-1:hi], rx)
+        diferenca(Hy[a:b, lo:hi+1], Hy[a-1:b-1, lo:hi+1], ry)
+        atualizar(Ez[a:b, lo:hi+1], trecho(CA, slice(a-1, b-1), slice(lo-1, hi)),
+                  trecho(CB, slice(a-1, b-1), slice(lo-1, hi)), diferenca(ry, rx, ry))
+
+    def passoHJanela(a, b):
+        x = (slice(a, b), slice(lo-1, hi+1))
+        atualizar(Hx[x], trecho(DAx, *x), trecho(DBx, *x),
+                  diferenca(Ez[a:b, lo:hi+2], Ez[a:b, lo-1:hi+1], difX[x]), subtrair=True)
+        atualizar(Hy[x], trecho(DAy, *x), trecho(DBy, *x),
+                  diferenca(Ez[a+1:b+1, lo-1:hi+1], Ez[a:b, lo-1:hi+1], difY[x]))
+
+    centro = int(LEN/2)
+    lo, hi = centro, centro+1
+    # Volta à grade inteira quando a janela chegaria às paredes
+    janela = janela and ordem == 2 and lo >= 1 and hi < LEN
+    medidor = instrumentacao.medidor(TIME-1, 'Yee 2D', (LEN+1)**2 + 2*LEN*(LEN+1))
+    for n in range(1, TIME):
+        if(medidor):
+            medidor.inicio()
+        if(janela):
+            executor.executar(passoEJanela, hi+1-lo, hi+1-lo, inicio=lo)
+        else:
+            executor.executar(passoE, LEN-1, LEN-1)
+        if(camada):
+            camada.corrigirE(CB)
+        if(medidor):
+            medidor.fase('E')
+        Ez[centro, centro] = Ez_t[n]
+        if(medidor):
+            medidor.fase('fonte')
+        if(janela):
+            executor.executar(passoHJanela, hi+2-lo, hi+2-lo, inicio=lo-1)
+            lo, hi = lo-1, hi+1
+            janela = lo >= 1 and hi < LEN
+        else:
+            executor.executar(passoH, LEN+1, LEN)
+        if(camada):
+            camada.corrigirH(DBx, DBy)
+        if(medidor):
+            medidor.fase('H')
+            medidor.passo(n, Ez=Ez, Hx=Hx, Hy=Hy)
+        if(n % k == 0):
+            yield n, Ez, Hx, Hy
+    if(medidor):
+        medidor.fim()
+
+def simetrias(LEN, CA, CB, DA, DB):
+    """
+    Detecta os planos de simetria do caso 2D com a fonte no centro
+    saídas: (linhas, colunas) - True se a grade e os coeficientes são
+            simétricos em relação à linha (coluna) central
+    """
+    if(LEN % 2):
+        return (False, False)   # a fonte não fica no centro
+    (DAx, DAy), (DBx, DBy) = porCampo(DA), porCampo(DB)
+    mapas = [np.asarray(C) for C in (CA, CB, DAx, DAy, DBx, DBy)]
+    return tuple(all(C.ndim == 0 or np.array_equal(C, np.flip(C, eixo)) for C in mapas)
+                 for eixo in (0, 1))
+
+def quadros2DSimetria(Ez_t, CA, CB, DA, DB, LEN, TIME, k=1, dtype=np.float64, simetria=(True, True)):
+    """
+    Gerador do caso 2D que simula só a parte da grade com índices a partir
+    do centro nos eixos espelhados (ver acima)
+    entradas como em quadros2D() e mais:
+    simetria - (linhas, colunas), espelha em relação à linha e/ou à coluna
+               central (ver simetrias())
+    saídas (a cada quadro):
+    n, Ez, Hx, Hy - passo de tempo e campos da parte simulada, com a coluna
+                    fantasma de Hx e a linha fantasma de Hy (ver completar2D())
+    """
+    assert LEN % 2 == 0, "A simetria exige LEN par (fonte no centro)!"
+    gi, gj = (int(bool(eixo)) for eixo in simetria)
+    centro = LEN//2
+    oi, oj = centro*gi, centro*gj   # primeira linha e coluna simuladas
+    (DAx, DAy), (DBx, DBy) = porCampo(DA), porCampo(DB)
+    CA, CB, DAx, DAy, DBx, DBy = coeficientes(dtype, CA, CB, DAx, DAy, DBx, DBy)
+    # Partes dos mapas de coeficientes (CA e CB começam na primeira linha interna)
+    CA, CB = [trecho(C, slice(oi-gi, None), slice(oj-gj, None)) for C in (CA, CB)]
+    DAx, DAy, DBx, DBy = [trecho(C, slice(oi, None), slice(oj, None)) for C in (DAx, DAy, DBx, DBy)]
+    # Condições iniciais; Hx tem a coluna 0 e Hy a linha 0 fantasmas nos eixos espelhados
+    Ez = np.zeros((LEN+1-oi, LEN+1-oj), dtype=dtype)
+    Hx = np.zeros((LEN+1-oi, LEN-oj+gj), dtype=dtype)
+    Hy = np.zeros((LEN-oi+gi, LEN+1-oj), dtype=dtype)
+    # Ez é atualizado nas linhas [1-gi, -1) e colunas [1-gj, -1)
+    linhasE, colunasE = LEN-oi-1+gi, LEN-oj-1+gj
+    r0, c0 = 1-gi, 1-gj
+    # Rascunhos dos rotacionais
+    rotX = np.empty((linhasE, colunasE), dtype=dtype)
+    rotY = np.empty((linhasE, colunasE), dtype=dtype)
+    difX = np.empty((LEN+1-oi, LEN-oj), dtype=dtype)
+    difY = np.empty((LEN-oi, LEN+1-oj), dtype=dtype)
+    yield 0, Ez, Hx, Hy
+
+    # Mesma atualização de quadros2D(), nas linhas [a, b) da parte atualizada de Ez
+    def passoE(a, b):
+        rx, ry = rotX[a:b], rotY[a:b]
+        diferenca(Hx[r0+a:r0+b, 1:], Hx[r0+a:r0+b, :-1], rx)
+        diferenca(Hy[1+a:1+b, c0:-1], Hy[a:b, c0:-1], ry)
+        atualizar(Ez[r0+a:r0+b, c0:-1], trecho(CA, slice(a, b)), trecho(CB, slice(a, b)), diferenca(ry, rx, ry))
+
+    # Hx e Hy (sem as fantasmas) nas linhas [a, b) de Ez
+    def passoH(a, b):
+        atualizar(Hx[a:b, gj:], trecho(DAx, slice(a, b)), trecho(DBx, slice(a, b)),
+                  diferenca(Ez[a:b, 1:], Ez[a:b, :-1], difX[a:b]), subtrair=True)
+        c = min(b, LEN-oi)  # Hy tem uma linha a menos que Ez
+        if(c > a):
+            atualizar(Hy[gi+a:gi+c], trecho(DAy, slice(a, c)), trecho(DBy, slice(a, c)),
+                      diferenca(Ez[a+1:c+1], Ez[a:c], difY[a:c]))
+
+    medidor = instrumentacao.medidor(TIME-1, 'Yee 2D simetria', Ez.size + Hx.size + Hy.size)
+    for n in range(1, TIME):
+        if(medidor):
+            medidor.inicio()
+        executor.executar(passoE, linhasE, colunasE)
+        if(medidor):
+            medidor.fase('E')
+        Ez[centro-oi, centro-oj] = Ez_t[n]
+        if(medidor):
+            medidor.fase('fonte')
+        executor.executar(passoH, LEN+1-oi, LEN-oj)
+        if(medidor):
+            medidor.fase('H')
+        # H tangencial ímpar em relação aos planos de simetria
+        if(gj):
+            np.negative(Hx[:, 1], out=Hx[:, 0])
+        if(gi):
+            np.negative(Hy[1], out=Hy[0])
+        if(medidor):
+            medidor.fase('contorno')
+            medidor.passo(n, Ez=Ez, Hx=Hx, Hy=Hy)
+        if(n % k == 0):
+            yield n, Ez, Hx, Hy
+    if(medidor):
+        medidor.fim()
+
+def _espelhar(campo, eixo, impar):
+    """
+    Junta a imagem espelhada a um campo simulado a partir do centro num eixo
+    (contado a partir do fim, para aceitar quadros e históricos): campos
+    pares repetem o ponto do plano, ímpares perdem a posição fantasma
+    """
+    eixo = campo.ndim + eixo
+    fatia = [slice(None)]*campo.ndim
+    fatia[eixo] = slice(1, None)
+    parte = campo[tuple(fatia)]
+    if(impar):
+        return np.concatenate([-np.flip(parte, eixo), parte], axis=eixo)
+    return np.concatenate([np.flip(parte, eixo), campo], axis=eixo)
+
+def completar2D(Ez, Hx, Hy, simetria=(True, True)):
+    """
+    Reconstrói a grade inteira a partir dos quadros (ou históricos) de
+    quadros2DSimetria()
+    saídas: Ez (..., LEN+1, LEN+1), Hx (..., LEN+1, LEN) e Hy (..., LEN, LEN+1)
+    """
+    linhas, colunas = simetria
+    # (campo, ímpar nas linhas, ímpar nas colunas)
+    campos = []
+    for campo, imparLinhas, imparColunas in ((Ez, False, False), (Hx, False, True), (Hy, True, False)):
+        if(linhas):
+            campo = _espelhar(campo, -2, imparLinhas)
+        if(colunas):
+            campo = _espelhar(campo, -1, imparColunas)
+        campos.append(campo)
+    return tuple(campos)
+
+class Espelhado:
+    """
+    Histórico (TIME, ...) de um campo de quadros2DSimetria() visto como o da
+    grade inteira: cada quadro é reconstruído só quando é pedido
+    """
+    def __init__(self, historico, imparLinhas, imparColunas, simetria):
+        self.historico = historico
+        self.impar = (imparLinhas, imparColunas)
+        self.simetria = tuple(simetria)
+        self.dtype = historico.dtype
+        forma = list(historico.shape)
+        for eixo in (0, 1):
+            if(self.simetria[eixo]):
+                forma[1+eixo] = 2*forma[1+eixo] - 1 - self.impar[eixo]
+        self.shape = tuple(forma)
+        self.ndim = len(forma)
+
+    def __len__(self):
+        return len(self.historico)
+
+    def __getitem__(self, indice):
+        campo = np.asarray(self.historico[indice])
+        for eixo in (0, 1):
+            if(self.simetria[eixo]):
+                campo = _espelhar(campo, eixo-2, self.impar[eixo])
+        return campo
+
+    def __array__(self, dtype=None, copy=None):
+        return np.asarray(self[:], dtype=dtype)
+
+def bytesPorPasso(gerador, passos=10):
+    """
+    Mede, com o tracemalloc, quantos bytes são alocados temporariamente
+    (pico acima do que já estava alocado) em cada passo de um gerador de
+    quadros com k=1
+    saídas: maior valor entre os passos medidos (as condições iniciais,
+    que alocam os campos e rascunhos, não entram na conta)
+    """
+    next(gerador)
+    iniciado = tracemalloc.is_tracing()
+    if(not iniciado):
+        tracemalloc.start()
+    maior = 0
+    for _ in range(passos):
+        tracemalloc.reset_peak()
+        antes = tracemalloc.get_traced_memory()[0]
+        if(next(gerador, None) is None):
+            break
+        maior = max(maior, tracemalloc.get_traced_memory()[1] - antes)
+    if(not iniciado):
+        tracemalloc.stop()
+    return maior
+
+def historico(gerador, TIME):
+    """
+    Guarda todos os quadros de um gerador (com k=1) em arrays (TIME, ...)
+    """
+    n, *campos = next(gerador)
+    historicos = [np.empty((TIME,) + campo.shape, dtype=campo.dtype) for campo in campos]
+    for h, campo in zip(historicos, campos):
+        h[n] = campo
+    for n, *campos in gerador:
+        for h, campo in zip(historicos, campos):
+            h[n] = campo
+    return tuple(historicos)
+
+def simular1D(Ez_t, CA, CB, DA, DB, LEN, TIME, dtype=np.float64, janela=False, mur=None, cpml=None, ordem=2):
+    """
+    Função que realiza o loop principal do caso 1D
+    saídas: Ez (TIME, LEN+1) e Hy (TIME, LEN)
+    """
+    return historico(quadros1D(Ez_t, CA, CB, DA, DB, LEN, TIME, dtype=dtype, janela=janela,
+                               mur=mur, cpml=cpml, ordem=ordem), TIME)
+
+def simular1DHy(Ez_t, CA, CB, DA, DB, LEN, TIME, dtype=np.float64, janela=False, mur=None):
+    """
+    Função que realiza o loop principal do caso 1D com Hy no contorno
+    saídas: Ez (TIME, LEN) e Hy (TIME, LEN)
+    """
+    return historico(quadros1DHy(Ez_t, CA, CB, DA, DB, LEN, TIME, dtype=dtype, janela=janela, mur=mur), TIME)
+
+def simular2D(Ez_t, CA, CB, DA, DB, LEN, TIME, dtype=np.float64, janela=False, cpml=None, ordem=2):
+    """
+    Função que realiza o loop principal do caso 2D
+    saídas: Ez (TIME, LEN+1, LEN+1), Hx (TIME, LEN+1, LEN) e Hy (TIME, LEN, LEN+1)
+    """
+    return historico(quadros2D(Ez_t, CA, CB, DA, DB, LEN, TIME, dtype=dtype, janela=janela, cpml=cpml,
+                               ordem=ordem), TIME)
+
+def simular2DSimetria(Ez_t, CA, CB, DA, DB, LEN, TIME, dtype=np.float64, simetria=(True, True)):
+    """
+    Função que realiza o loop principal do caso 2D só na parte simulada
+    saídas: Ez, Hx e Hy (TIME, ...) da parte simulada (ver completar2D())
+    """
+    return historico(quadros2DSimetria(Ez_t, CA, CB, DA, DB, LEN, TIME, dtype=dtype, simetria=simetria), TIME)
+
+def espelhados(Ez, Hx, Hy, simetria=(True, True)):
+    """
+    Históricos de simular2DSimetria() vistos como os da grade inteira
+    saídas: Ez (TIME, LEN+1, LEN+1), Hx (TIME, LEN+1, LEN) e Hy (TIME, LEN, LEN+1)
+    """
+    return (Espelhado(Ez, False, False, simetria), Espelhado(Hx, False, True, simetria),
+            Espelhado(Hy, True, False, simetria))
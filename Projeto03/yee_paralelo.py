@@ -0,0 +1,186 @@
+"""
+Algoritmo de Yee 2D em paralelo, com a grade dividida em faixas de linhas
+entre processos.
+
+Ez (LEN+1, LEN+1), Hx (LEN+1, LEN) e Hy (LEN, LEN+1) ficam inteiros em
+multiprocessing.shared_memory; cada processo atualiza só as linhas da sua
+faixa, com os mesmos núcleos sem alocação de yee.py. A troca de halo (uma
+linha) é a leitura direta da linha vizinha na memória compartilhada:
+    - a atualização de Ez na primeira linha da faixa lê Hy da linha anterior
+    - a atualização de Hy na última linha da faixa lê Ez da linha seguinte
+e por isso cada meio passo (E com a fonte, depois H) termina numa barreira.
+As operações em cada ponto são as mesmas do caso serial, então o
+resultado é idêntico ao de yee.simular2D. Mapas de coeficientes (ver
+comum/materiais.py) são aceitos como em yee.quadros2D(), e cada processo
+usa só as linhas da sua faixa.
+
+O processo principal só entrega os quadros: a cada k passos os processos
+esperam numa segunda barreira enquanto o quadro é lido. Com
+comum/instrumentacao.py ligado ele mostra o progresso a cada quadro (as
+fases correm nos processos e não são separadas).
+"""
+
+import os
+import threading
+import multiprocessing
+from multiprocessing import shared_memory
+import numpy as np
+import yee
+from comum import instrumentacao
+
+def faixas(linhas, partes):
+    """
+    Divide range(linhas) em 'partes' faixas contíguas (inicio, fim)
+    """
+    limites = np.linspace(0, linhas, partes + 1).astype(int)
+    return [(int(a), int(b)) for a, b in zip(limites[:-1], limites[1:])]
+
+class _Memoria(shared_memory.SharedMemory):
+    """
+    Memória compartilhada que continua mapeada enquanto houver arrays sobre
+    ela (quadros guardados depois do fim do gerador); o mapeamento é
+    liberado junto com o último array
+    """
+    def __del__(self):
+        try:
+            self.close()
+        except (OSError, BufferError):
+            pass
+
+def _abrir(nome, forma, dtype):
+    """
+    Abre um array guardado na memória compartilhada 'nome'
+    """
+    memoria = shared_memory.SharedMemory(name=nome)
+    return memoria, _array(memoria, forma, dtype)
+
+def _array(memoria, forma, dtype):
+    """
+    Array sobre a memória compartilhada; np.frombuffer mantém o buffer
+    exportado enquanto o array (ou uma vista dele) existir, de modo que
+    memoria.close() falha em vez de desmapear a memória ainda em uso
+    """
+    return np.frombuffer(memoria.buf, dtype=dtype, count=int(np.prod(forma))).reshape(forma)
+
+def _trabalhador(nomes, faixa, Ez_t, CA, CB, DA, DB, LEN, TIME, k, dtype, passo, quadro):
+    """
+    Laço de um processo: atualiza as linhas [inicio, fim) de Ez, Hx e Hy
+    """
+    memorias = []
+    campos = []
+    for nome, forma in zip(nomes, ((LEN+1, LEN+1), (LEN+1, LEN), (LEN, LEN+1))):
+        memoria, campo = _abrir(nome, forma, dtype)
+        memorias.append(memoria)
+        campos.append(campo)
+    Ez, Hx, Hy = campos
+    (DAx, DAy), (DBx, DBy) = yee.porCampo(DA), yee.porCampo(DB)
+    CA, CB, DAx, DAy, DBx, DBy = yee.coeficientes(dtype, CA, CB, DAx, DAy, DBx, DBy)
+
+    a, b = faixa
+    e0, e1 = max(a, 1), min(b, LEN)     # linhas internas de Ez
+    h1 = min(b, LEN)                    # Hy tem só LEN linhas
+    centro = int(LEN/2)
+    fonte = a <= centro < b
+
+    # Rascunhos dos rotacionais, só do tamanho da faixa
+    rotX = np.empty((max(e1 - e0, 0), LEN-1), dtype=dtype)
+    rotY = np.empty((max(e1 - e0, 0), LEN-1), dtype=dtype)
+    difX = np.empty((b - a, LEN), dtype=dtype)
+    difY = np.empty((max(h1 - a, 0), LEN+1), dtype=dtype)
+    # Partes dos mapas de coeficientes da faixa
+    CA, CB = yee.trecho(CA, slice(e0-1, e1-1)), yee.trecho(CB, slice(e0-1, e1-1))
+    DAx, DBx = yee.trecho(DAx, slice(a, b)), yee.trecho(DBx, slice(a, b))
+    DAy, DBy = yee.trecho(DAy, slice(a, h1)), yee.trecho(DBy, slice(a, h1))
+
+    try:
+        for n in range(1, TIME):
+            if(e1 > e0):
+                yee.diferenca(Hx[e0:e1, 1:], Hx[e0:e1, :-1], rotX)
+                yee.diferenca(Hy[e0:e1, 1:-1], Hy[e0-1:e1-1, 1:-1], rotY)
+                yee.atualizar(Ez[e0:e1, 1:-1], CA, CB, yee.diferenca(rotY, rotX, rotY))
+            if(fonte):
+                Ez[centro, centro] = Ez_t[n]
+            passo.wait()    # Ez completo antes de atualizar H
+
+            yee.atualizar(Hx[a:b], DAx, DBx, yee.diferenca(Ez[a:b, 1:], Ez[a:b, :-1], difX), subtrair=True)
+            if(h1 > a):
+                yee.atualizar(Hy[a:h1], DAy, DBy, yee.diferenca(Ez[a+1:h1+1], Ez[a:h1], difY))
+            passo.wait()    # Hx e Hy completos antes do próximo Ez
+
+            if(n % k == 0):
+                quadro.wait()   # quadro pronto
+                quadro.wait()   # quadro lido pelo processo principal
+    except threading.BrokenBarrierError:
+        pass    # gerador fechado antes do fim
+    finally:
+        del Ez, Hx, Hy, campo, campos
+        for memoria in memorias:
+            memoria.close()
+
+def quadros2D(Ez_t, CA, CB, DA, DB, LEN, TIME, k=1, processos=None, dtype=np.float64):
+    """
+    Gerador do caso 2D em paralelo, com as mesmas entradas e saídas de
+    yee.quadros2D() e mais:
+    processos - número de processos (faixas de linhas), padrão os.cpu_count()
+    """
+    if(processos is None):
+        processos = os.cpu_count() or 1
+    processos = max(1, min(processos, LEN+1))
+
+    # Campos na memória compartilhada (condições iniciais nulas)
+    formas = ((LEN+1, LEN+1), (LEN+1, LEN), (LEN, LEN+1))
+    tamanho = np.dtype(dtype).itemsize
+    memorias = [_Memoria(create=True, size=tamanho*int(np.prod(forma))) for forma in formas]
+    campos = [_array(memoria, forma, dtype) for forma, memoria in zip(formas, memorias)]
+    for campo in campos:
+        campo[:] = 0
+    Ez, Hx, Hy = campos
+
+    # 'fork' evita reexecutar o script em cada processo
+    metodos = multiprocessing.get_all_start_methods()
+    contexto = multiprocessing.get_context('fork' if 'fork' in metodos else None)
+    passo = contexto.Barrier(processos)
+    quadro = contexto.Barrier(processos + 1)
+    nomes = [memoria.name for memoria in memorias]
+    trabalhadores = [contexto.Process(target=_trabalhador, daemon=True,
+                                      args=(nomes, faixa, Ez_t, CA, CB, DA, DB, LEN, TIME, k, dtype, passo, quadro))
+                     for faixa in faixas(LEN+1, processos)]
+
+    medidor = instrumentacao.medidor(TIME-1, 'Yee 2D paralelo', (LEN+1)**2 + 2*LEN*(LEN+1))
+    try:
+        yield 0, Ez, Hx, Hy
+        for trabalhador in trabalhadores:
+            trabalhador.start()
+        for n in range(k, TIME, k):
+            quadro.wait()
+            if(medidor):
+                medidor.passo(n, Ez=Ez, Hx=Hx, Hy=Hy)
+            yield n, Ez, Hx, Hy
+            quadro.wait()
+        if(medidor):
+            medidor.fim()
+        for trabalhador in trabalhadores:
+            trabalhador.join()
+    finally:
+        # Interrompe os processos se o gerador for fechado antes do fim
+        passo.abort()
+        quadro.abort()
+        for trabalhador in trabalhadores:
+            if(trabalhador.is_alive()):
+                trabalhador.terminate()
+            if(trabalhador.pid is not None):
+                trabalhador.join()
+        del Ez, Hx, Hy, campo, campos
+        for memoria in memorias:
+            try:
+                memoria.close()
+            except BufferError:
+                pass    # ainda há quadros apontando para a memória
+            memoria.unlink()
+
+def simular2D(Ez_t, CA, CB, DA, DB, LEN, TIME, processos=None, dtype=np.float64):
+    """
+    Função que realiza o loop principal do caso 2D em paralelo
+    saídas: Ez (TIME, LEN+1, LEN+1), Hx (TIME, LEN+1, LEN) e Hy (TIME, LEN, LEN+1)
+    """
+    return yee.historico(quadros2D(Ez_t, CA, CB, DA, DB, LEN, TIME, processos=processos, dtype=dtype), TIME)
@@ -0,0 +1,5 @@
+"""
+Módulos comuns aos três projetos (cache de resultados, ferramentas de
+desempenho, etc.). Os scripts de cada projeto acrescentam a raiz do
+repositório ao sys.path para poder importá-los.
+"""
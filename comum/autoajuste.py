@@ -0,0 +1,145 @@
+"""
+Ajuste automático da grade a partir da relação de dispersão numérica
+(ver dispersao.py e Projeto02/densidade_malha.py).
+
+Dada a forma de onda da fonte, estima-se a maior frequência significativa
+pela FFT (a última acima de um limiar relativo de amplitude); dada uma
+tolerância para o erro da velocidade de fase, procura-se a menor densidade
+de grade N (pontos por comprimento de onda) que a respeita para o maior
+fator de Courant estável do esquema, sem descer de N_MIN. Daí saem o maior
+dx (célula mais grossa) e o dt correspondente.
+
+N_MIN é a densidade prática mínima: nos esquemas 1D com S = 1 o erro de
+fase é nulo para qualquer N e, sem esse piso, a grade cairia no limite de
+Nyquist (N = 2), que não representa a forma de onda.
+
+"Mais grossa" é relativo ao espectro da fonte: fontes descontínuas (o
+degrau e os pulsos retangulares dos scripts) têm espectro acima de -40 dB
+até perto da frequência de Nyquist da amostragem, e o ajuste então refina
+a grade em vez de engrossá-la. Nesse caso os scripts param com a mensagem
+de mensagemRefino() em vez do limite genérico de memória.
+
+Em 2D o erro é avaliado na direção dos eixos (S, N) e na diagonal
+(S*sqrt(2), N*sqrt(2)), que são os dois extremos da dispersão anisotrópica
+do algoritmo de Yee. O mesmo vale para o ADI-FDTD ('adi2D'), que não tem
+limite de estabilidade: o fator de Courant precisa ser dado e só o erro de
+fase cresce com ele.
+
+Os esquemas com diferenças espaciais de quarta ordem (FDTD(2,4), ver
+ESTENCEIS) usam a relação de dispersão e o limite de estabilidade do seu
+estêncil. Como o erro temporal continua de segunda ordem, o ganho em N
+aparece sobretudo em 2D (em 1D a segunda ordem com S = 1 já é exata).
+"""
+
+import numpy as np
+from . import dispersao
+
+# Esquemas de cada projeto: número de dimensões da grade
+ESQUEMAS = {'linha': 1,     # Projeto01 (equações do telegrafista)
+            'onda': 1,      # Projeto02 (equação de onda de segunda ordem)
+            'yee1D': 1,     # Projeto03 caso_1D e caso_1D_Hy
+            'yee2D': 2,     # Projeto03 caso_2D
+            'adi2D': 2,     # Projeto03 caso_2D com o ADI-FDTD (adi.py)
+            'onda4': 1,     # Projeto02 com ORDEM = 4
+            'yee1D4': 1,    # Projeto03 caso_1D com ordem = 4
+            'yee2D4': 2}    # Projeto03 caso_2D com ordem = 4
+
+# Estêncil de quarta ordem dos esquemas FDTD(2,4) (ver dispersao.ESTENCEIS),
+# os outros são de segunda ordem
+ESTENCEIS = {'onda4': 'onda4', 'yee1D4': 'yee4', 'yee2D4': 'yee4'}
+
+# Menor densidade aceita (pontos por comprimento de onda na maior frequência,
+# acima do limite de Nyquist N = 2) e maior densidade procurada
+N_MIN = 10
+N_MAX = 1e4
+
+def courantMaximo(esquema):
+    """
+    Maior fator de Courant estável do esquema (1/sqrt(dimensões) na segunda
+    ordem, o limite do estêncil dividido por sqrt(dimensões) na quarta e
+    sem limite para o ADI-FDTD)
+    """
+    if(esquema == 'adi2D'):
+        return np.inf
+    if(esquema in ESTENCEIS):
+        return dispersao.courantLimite(ESTENCEIS[esquema])/np.sqrt(ESQUEMAS[esquema])
+    return 1/np.sqrt(ESQUEMAS[esquema])
+
+def frequenciaMaxima(sinal, dt, limiar=1e-2):
+    """
+    Estima a maior frequência significativa de um sinal pela FFT, isto é, a
+    última frequência em que a amplitude do espectro passa de 'limiar' vezes
+    o seu máximo (1e-2 = -40 dB)
+    entradas:
+    sinal - forma de onda da fonte (Ez_t, E_t, Vs_t)
+    dt - passo de tempo com que o sinal foi amostrado
+    limiar - amplitude relativa abaixo da qual o espectro é desprezado
+    """
+    # O campo parte do repouso (condição inicial nula)
+    sinal = np.concatenate(([0.0], np.asarray(sinal, dtype=float)))
+    # Preenche com zeros para melhorar a resolução em frequência
+    espectro = np.abs(np.fft.rfft(sinal, n=4*len(sinal)))
+    frequencias = np.fft.rfftfreq(4*len(sinal), d=dt)
+    if(espectro.max() == 0):
+        return 0.0
+    significativas = np.nonzero(espectro >= limiar*espectro.max())[0]
+    return frequencias[significativas[-1]]
+
+def erroFase(esquema, S, N):
+    """
+    Erro da velocidade de fase (%) do esquema, no pior caso de direção
+    """
+    if(esquema == 'adi2D'):
+        return np.maximum(dispersao.dispersaoADI(S, N)[2], dispersao.dispersaoADI(S, N, np.pi/4)[2])
+    estencil = ESTENCEIS.get(esquema)
+    erro = dispersao.dispersao(S, N, estencil)[2]
+    if(ESQUEMAS[esquema] == 2):
+        erro = np.maximum(erro, dispersao.dispersao(S*np.sqrt(2), N*np.sqrt(2), estencil)[2])
+    return erro
+
+def densidadeMinima(esquema, erroMax, S, pontos=4000):
+    """
+    Menor densidade de grade N (pontos por comprimento de onda) tal que o
+    erro da velocidade de fase fica abaixo de erroMax (%) para todo N maior
+    """
+    Ns = np.geomspace(N_MIN, N_MAX, pontos)
+    erros = erroFase(esquema, S, Ns)
+    ruins = np.nonzero(~(erros <= erroMax))[0]
+    if(len(ruins) == 0):
+        return float(N_MIN)
+    assert ruins[-1] < len(Ns) - 1, "Tolerância de erro muito pequena para N <= " + str(N_MAX)
+    return float(Ns[ruins[-1] + 1])
+
+def mensagemRefino(erroMax, dx):
+    """
+    Mensagem dos scripts quando a grade ajustada não cabe na memória
+    """
+    return ("erroFaseMax = %g refinou a grade até dx = %.3g e a simulação não cabe na memória: fontes "
+            "descontínuas têm espectro até perto da frequência de Nyquist e fazem o ajuste refinar a grade "
+            "(ver comum/autoajuste.py); use uma fonte suave, uma tolerância maior ou erroFaseMax = None"
+            % (erroMax, dx))
+
+def ajustarGrade(esquema, sinal, dt, velocidade, erroMax, S=None, limiar=1e-2):
+    """
+    Escolhe a grade mais grossa que respeita a tolerância de erro de fase
+    entradas:
+    esquema - chave de ESQUEMAS ('linha', 'onda', 'yee1D', 'yee2D', 'adi2D',
+              'onda4', 'yee1D4', 'yee2D4')
+    sinal, dt - forma de onda da fonte e o passo com que foi amostrada
+    velocidade - velocidade de propagação no meio (c, uf, ...)
+    erroMax - erro máximo da velocidade de fase (%)
+    S - fator de Courant, padrão o maior estável do esquema (obrigatório
+        para o 'adi2D')
+    limiar - ver frequenciaMaxima()
+    saídas:
+    dicionário com dx, dt, S, N (pontos por comprimento de onda) e a
+    frequência máxima considerada
+    """
+    if(S is None):
+        S = courantMaximo(esquema)
+    assert np.isfinite(S), "O esquema '" + esquema + "' exige o fator de Courant"
+    fmax = frequenciaMaxima(sinal, dt, limiar)
+    assert fmax > 0, "A fonte não tem conteúdo em frequência"
+    N = densidadeMinima(esquema, erroMax, S)
+    dx = velocidade/(fmax*N)
+    return {'dx': dx, 'dt': S*dx/velocidade, 'S': S, 'N': N, 'fmax': fmax}
@@ -0,0 +1,214 @@
+"""
+Cache de resultados das simulações endereçado pelo conteúdo.
+
+A chave de cada resultado é o hash dos parâmetros físicos e numéricos da
+simulação (argumentos da função, arrays como a forma de onda da fonte e o
+código da própria função), de modo que mudar só configurações de gráfico
+(YMin, velocidade, tomarMedia, ...) reaproveita o resultado já calculado.
+
+Os resultados são guardados em disco como arquivos .npy (abertos com
+mmap_mode='r', sem copiar tudo para a memória) e mantidos em dois LRU de
+tamanho limitado, um na memória e outro no disco. Cada entrada é escrita
+num diretório temporário (prefixo TEMPORARIO, fora do LRU) e renomeada
+no fim, então vários processos podem guardar a mesma chave ao mesmo tempo
+(como nas varreduras, ver varredura.py): o primeiro a renomear fica e os
+outros descartam a sua cópia, que tem o mesmo conteúdo.
+"""
+
+import os
+import json
+import shutil
+import hashlib
+import inspect
+import threading
+from collections import OrderedDict
+import numpy as np
+
+# Diretório do cache (pode ser trocado pela variável de ambiente SEL0612_CACHE)
+DIRETORIO = os.environ.get('SEL0612_CACHE', os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), '.cache_simulacoes'))
+MAX_MEMORIA = 512*(2**20)   # bytes mantidos na memória
+MAX_DISCO = 4*(2**30)       # bytes mantidos no disco
+TEMPORARIO = '_tmp-'        # prefixo das entradas que ainda estão sendo escritas
+
+_memoria = OrderedDict()    # chave: (resultado, tamanho em bytes)
+
+def _atualizarHash(h, obj):
+    """
+    Acrescenta um objeto (arrays, números, strings, listas, dicionários) ao hash
+    """
+    if(isinstance(obj, np.ndarray)):
+        h.update(b'array' + str(obj.dtype).encode() + str(obj.shape).encode())
+        h.update(np.ascontiguousarray(obj).tobytes())
+    elif(isinstance(obj, dict)):
+        h.update(b'dict%d' % len(obj))
+        for k in sorted(obj, key=repr):
+            _atualizarHash(h, k)
+            _atualizarHash(h, obj[k])
+    elif(isinstance(obj, (list, tuple))):
+        h.update(b'seq%d' % len(obj))
+        for item in obj:
+            _atualizarHash(h, item)
+    elif(isinstance(obj, np.dtype) or (isinstance(obj, type) and issubclass(obj, np.generic))):
+        # Precisão (np.float32, np.float64, ...) pelo nome, não pelo código
+        h.update(b'dtype' + np.dtype(obj).str.encode())
+    elif(callable(obj)):
+        try:
+            h.update(inspect.getsource(obj).encode())
+        except (OSError, TypeError):
+            # Sem o código-fonte (função criada com exec, por exemplo)
+            codigo = getattr(obj, '__code__', None)
+            if(codigo is not None):
+                h.update(codigo.co_code + repr(codigo.co_consts).encode())
+            else:
+                h.update(repr(getattr(obj, '__qualname__', obj)).encode())
+    else:
+        h.update(type(obj).__name__.encode() + repr(obj).encode())
+
+def chave(*objetos):
+    """
+    Calcula a chave (hash sha256) dos objetos dados
+    """
+    h = hashlib.sha256()
+    for obj in objetos:
+        _atualizarHash(h, obj)
+    return h.hexdigest()
+
+def _achatar(obj, arrays):
+    """
+    Converte o resultado numa descrição JSON, colocando os arrays na lista
+    'arrays' (cada um vira um arquivo .npy)
+    """
+    if(isinstance(obj, np.ndarray)):
+        arrays.append(obj)
+        return {'tipo': 'array', 'indice': len(arrays) - 1}
+    if(isinstance(obj, dict)):
+        return {'tipo': 'dict',
+                'itens': [[_achatar(k, arrays), _achatar(v, arrays)] for k, v in obj.items()]}
+    if(isinstance(obj, (list, tuple))):
+        return {'tipo': type(obj).__name__, 'itens': [_achatar(v, arrays) for v in obj]}
+    if(isinstance(obj, np.generic)):
+        obj = obj.item()
+    return {'tipo': 'valor', 'valor': obj}
+
+def _reconstruir(descricao, diretorio):
+    """
+    Operação inversa de _achatar, abrindo os arrays com mmap
+    """
+    tipo = descricao['tipo']
+    if(tipo == 'array'):
+        return np.load(os.path.join(diretorio, '%d.npy' % descricao['indice']), mmap_mode='r')
+    if(tipo == 'dict'):
+        return {_reconstruir(k, diretorio): _reconstruir(v, diretorio) for k, v in descricao['itens']}
+    if(tipo in ('list', 'tuple')):
+        itens = [_reconstruir(v, diretorio) for v in descricao['itens']]
+        return tuple(itens) if tipo == 'tuple' else itens
+    return descricao['valor']
+
+def _tamanho(obj):
+    """
+    Soma o tamanho em bytes dos arrays do resultado
+    """
+    if(isinstance(obj, np.ndarray)):
+        return obj.nbytes
+    if(isinstance(obj, dict)):
+        return sum(_tamanho(v) for v in obj.values())
+    if(isinstance(obj, (list, tuple))):
+        return sum(_tamanho(v) for v in obj)
+    return 0
+
+def _lembrar(k, resultado):
+    """
+    Coloca o resultado no LRU da memória, descartando os mais antigos
+    """
+    tamanho = _tamanho(resultado)
+    _memoria[k] = (resultado, tamanho)
+    _memoria.move_to_end(k)
+    total = sum(t for _, t in _memoria.values())
+    while(total > MAX_MEMORIA and len(_memoria) > 1):
+        _, (_, t) = _memoria.popitem(last=False)
+        total -= t
+
+def _limparDisco(manter):
+    """
+    Remove do disco as entradas usadas há mais tempo até caber em MAX_DISCO
+    """
+    entradas = []
+    total = 0
+    for nome in os.listdir(DIRETORIO):
+        if(nome.startswith(TEMPORARIO)):
+            continue    # ainda sendo escrita por algum processo
+        caminho = os.path.join(DIRETORIO, nome)
+        manifesto = os.path.join(caminho, 'manifesto.json')
+        if(not os.path.isfile(manifesto)):
+            continue
+        tamanho = sum(os.path.getsize(os.path.join(caminho, arq)) for arq in os.listdir(caminho))
+        entradas.append((os.path.getmtime(manifesto), nome, tamanho))
+        total += tamanho
+    for _, nome, tamanho in sorted(entradas):
+        if(total <= MAX_DISCO):
+            break
+        if(nome != manter):
+            shutil.rmtree(os.path.join(DIRETORIO, nome), ignore_errors=True)
+            total -= tamanho
+
+def carregar(k):
+    """
+    Retorna o resultado guardado com a chave k ou None se não existir
+    """
+    if(k in _memoria):
+        _memoria.move_to_end(k)
+        return _memoria[k][0]
+    diretorio = os.path.join(DIRETORIO, k)
+    manifesto = os.path.join(diretorio, 'manifesto.json')
+    if(not os.path.isfile(manifesto)):
+        return None
+    with open(manifesto) as arq:
+        resultado = _reconstruir(json.load(arq), diretorio)
+    os.utime(manifesto)  # marca o uso para o LRU do disco
+    _lembrar(k, resultado)
+    return resultado
+
+def guardar(k, resultado):
+    """
+    Guarda o resultado no disco (um .npy por array) e na memória
+    """
+    os.makedirs(DIRETORIO, exist_ok=True)
+    arrays = []
+    descricao = _achatar(resultado, arrays)
+    # Escreve num diretório temporário e renomeia, para nunca deixar
+    # uma entrada pela metade
+    temporario = os.path.join(DIRETORIO, '%s%s-%d-%d' % (TEMPORARIO, k, os.getpid(), threading.get_ident()))
+    os.makedirs(temporario, exist_ok=True)
+    for indice, array in enumerate(arrays):
+        np.save(os.path.join(temporario, '%d.npy' % indice), array)
+    with open(os.path.join(temporario, 'manifesto.json'), 'w') as arq:
+        json.dump(descricao, arq)
+    destino = os.path.join(DIRETORIO, k)
+    try:
+        os.rename(temporario, destino)
+    except OSError:
+        # Outro processo guardou a mesma chave antes (com o mesmo conteúdo)
+        shutil.rmtree(temporario, ignore_errors=True)
+        if(not os.path.isfile(os.path.join(destino, 'manifesto.json'))):
+            raise
+    _limparDisco(k)
+    _lembrar(k, resultado)
+
+def memorizar(funcao, args=(), kwargs=None, parametros=None):
+    """
+    Executa funcao(*args, **kwargs) ou retorna o resultado guardado
+    entradas:
+    funcao - função da simulação (o código dela faz parte da chave)
+    args, kwargs - argumentos da função
+    parametros - dicionário com os demais parâmetros que afetam o resultado
+                 e não são argumentos (globais do script como T, DX, LEN)
+    """
+    if(kwargs is None):
+        kwargs = {}
+    k = chave(funcao, args, kwargs, parametros)
+    resultado = carregar(k)
+    if(resultado is None):
+        resultado = funcao(*args, **kwargs)
+        guardar(k, resultado)
+    return resultado
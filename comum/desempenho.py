@@ -0,0 +1,552 @@
+"""
+Medição de desempenho dos solvers, sem gráficos (não importa o matplotlib).
+
+Cada caso (solver, motor, LEN, passos, dtype) roda num processo novo, para
+que o pico de memória (RSS) seja só dele, e mede:
+    tempo     - melhor tempo de parede entre as repetições (s)
+    mcelulas  - milhões de células atualizadas por segundo
+    rss       - pico de memória residente do processo do caso (bytes)
+    alocado   - pico de bytes alocados durante uma execução (tracemalloc)
+    desvio    - desvio relativo máximo dos campos finais em relação ao
+                laço de referência (as expressões originais dos scripts)
+Um motor otimizado que se afaste da referência mais que TOLERANCIA falha.
+
+Os esquemas e bordas acrescentados depois dos scripts originais (FDTD(2,4),
+ABC de Mur, CPML e ADI-FDTD) são solvers à parte, com uma referência escrita
+diretamente das equações, sem os núcleos e rascunhos dos motores. No
+'yee2D' o motor 'simetria' simula só o quadrante e é comparado depois de
+completar2D(); as células por segundo contam a grade inteira equivalente.
+
+Uso:
+    python -m comum.desempenho [--rapido] [--solvers linha,yee2D]
+                               [--saida resultado.json] [--base base.json]
+O JSON gerado pode ser guardado e passado depois em --base, que mostra a
+razão entre os tempos e marca as regressões maiores que REGRESSAO.
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import tracemalloc
+import multiprocessing
+import numpy as np
+try:
+    import resource
+except ImportError:     # Windows
+    resource = None
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+for projeto in ('Projeto01', 'Projeto02', 'Projeto03'):
+    sys.path.append(os.path.join(RAIZ, projeto))
+sys.path.append(RAIZ)
+import linha
+import onda
+import yee
+import yee_paralelo
+import adi
+import pml
+from comum import executor, materiais
+
+TOLERANCIA = {'float64': 1e-12, 'float32': 1e-4}   # desvio relativo máximo
+REGRESSAO = 0.10    # aumento de tempo em relação à base marcado como regressão
+
+# Tamanhos (LEN, passos) de cada solver, completos e rápidos
+TAMANHOS = {'linha': [(10**4, 1000), (10**6, 50)],
+            'onda': [(10**4, 500), (10**5, 100)],
+            'onda4': [(10**4, 500), (10**5, 100)],
+            'yee1D': [(10**4, 1000), (10**6, 50)],
+            'yee1DHy': [(10**4, 1000), (10**6, 50)],
+            'yee1DMur': [(10**4, 1000), (10**6, 50)],
+            'yee2D': [(200, 200), (1000, 40)],
+            'yee2D4': [(200, 200), (1000, 40)],
+            'yee2DCPML': [(200, 200), (1000, 40)],
+            'adi2D': [(200, 200), (500, 40)]}
+RAPIDOS = {'linha': [(1000, 200)],
+           'onda': [(1000, 200)],
+           'onda4': [(1000, 200)],
+           'yee1D': [(1000, 200)],
+           'yee1DHy': [(1000, 200)],
+           'yee1DMur': [(1000, 200)],
+           'yee2D': [(64, 50)],
+           'yee2D4': [(64, 50)],
+           'yee2DCPML': [(64, 100)],
+           'adi2D': [(64, 50)]}
+
+# Bordas absorventes nas unidades normalizadas de _entradaYee (dx = 1,
+# dt = 0.5, EPSILON = MU = 1): coeficiente de Mur e CPML de 10 células
+MUR = pml.coeficienteMur(0.5)
+CPML = pml.CPML(10, 0.5, 1.0, 1.0, 1.0)
+
+def _pulso(passos):
+    """
+    Pulso gaussiano usado como fonte em todos os casos
+    """
+    t = np.arange(passos)
+    return np.exp(-((t - 30)/10.0)**2)
+
+####################### Laços de referência ########################
+# As expressões originais dos scripts, guardando só o passo atual
+
+def _refLinha(entrada, dtype):
+    Vs_t, LEN, TIME, C1, C2, C3, C4, Rs, Rl = entrada
+    v = np.zeros(LEN)
+    i = np.zeros(LEN+1)
+    for n in range(1, TIME):
+        iN = np.empty(LEN+1)
+        iN[1:-1] = C1*( v[1:] - v[:-1] ) + C2*i[1:-1]
+        iN[0] = (Vs_t[n-1]-v[0])/Rs
+        iN[-1] = v[-1]/Rl
+        v = C3*( iN[1:] - iN[:-1] ) + C4*v
+        i = iN
+    return i, v
+
+def _refOnda(entrada, dtype):
+    E_t, LEN, TIME, S, S_REFRAC, QUEBRA = entrada
+    E = np.zeros((TIME, LEN+2))
+    E[1:, 0] = E_t[:TIME-1]
+    for n in range(2, TIME):
+        E[n][1:QUEBRA] = ((S**2)*(E[n-1, 2:QUEBRA+1] + E[n-1, :QUEBRA-1] - 2*E[n-1, 1:QUEBRA])
+                          + 2*E[n-1][1:QUEBRA] - E[n-2][1:QUEBRA])
+        E[n][QUEBRA:-1] = ((S_REFRAC**2)*(E[n-1, QUEBRA+1:] + E[n-1, QUEBRA-1:-2] - 2*E[n-1, QUEBRA:-1])
+                           + 2*E[n-1][QUEBRA:-1] - E[n-2][QUEBRA:-1])
+        E[n, -1] = E[n, -2]
+    return E[-1],
+
+def _meiosOnda(LEN, S, S_REFRAC, QUEBRA):
+    # S² nos pontos 1..LEN, S_REFRAC² a partir de QUEBRA
+    S2 = np.full(LEN, S**2)
+    S2[QUEBRA-1:] = S_REFRAC**2
+    return S2
+
+def _refOnda4(entrada, dtype):
+    E_t, LEN, TIME, S, S_REFRAC, QUEBRA = entrada
+    S2 = _meiosOnda(LEN, S, S_REFRAC, QUEBRA)
+    E = np.zeros((TIME, LEN+2))
+    E[1:, 0] = E_t[:TIME-1]
+    laplaciano = np.empty(LEN)
+    for n in range(2, TIME):
+        # Cinco pontos em 2..LEN-1 e três nos pontos 1 e LEN
+        laplaciano[1:-1] = (-E[n-1, 4:] + 16*E[n-1, 3:-1] - 30*E[n-1, 2:-2] + 16*E[n-1, 1:-3] - E[n-1, :-4])/12
+        laplaciano[0] = E[n-1, 2] + E[n-1, 0] - 2*E[n-1, 1]
+        laplaciano[-1] = E[n-1, -1] + E[n-1, -3] - 2*E[n-1, -2]
+        E[n][1:-1] = S2*laplaciano + 2*E[n-1][1:-1] - E[n-2][1:-1]
+        E[n, -1] = E[n, -2]
+    return E[-1],
+
+def _refYee1D(entrada, dtype):
+    Ez_t, CA, CB, DA, DB, LEN, TIME = entrada
+    Ez = np.zeros(LEN+1)
+    Hy = np.zeros(LEN)
+    Ez[0] = Ez_t[0]
+    for n in range(1, TIME):
+        Ez[1:-1] = CA*Ez[1:-1] + CB*(Hy[1:]-Hy[:-1])
+        Ez[0] = Ez_t[n]
+        Hy = DA*Hy + DB*(Ez[1:] - Ez[:-1])
+    return Ez, Hy
+
+def _refYee1DMur(entrada, dtype):
+    Ez_t, CA, CB, DA, DB, LEN, TIME = entrada
+    Ez = np.zeros(LEN+1)
+    Hy = np.zeros(LEN)
+    Ez[0] = Ez_t[0]
+    for n in range(1, TIME):
+        anterior = Ez[-2]
+        Ez[1:-1] = CA*Ez[1:-1] + CB*(Hy[1:]-Hy[:-1])
+        Ez[0] = Ez_t[n]
+        Ez[-1] = anterior + MUR*(Ez[-2] - Ez[-1])
+        Hy = DA*Hy + DB*(Ez[1:] - Ez[:-1])
+    return Ez, Hy
+
+def _refYee1DHy(entrada, dtype):
+    Ez_t, CA, CB, DA, DB, LEN, TIME = entrada
+    Ez = np.zeros(LEN)
+    Hy = np.zeros(LEN)
+    Ez[0] = Ez_t[0]
+    for n in range(1, TIME):
+        Ez[1:] = CA*Ez[1:] + CB*(Hy[1:]-Hy[:-1])
+        Ez[0] = Ez_t[n]
+        Hy[:-1] = DA*Hy[:-1] + DB*(Ez[1:] - Ez[:-1])
+        Hy[-1] = 0
+    return Ez, Hy
+
+def _refYee2D(entrada, dtype):
+    Ez_t, CA, CB, DA, DB, LEN, TIME = entrada
+    Ez = np.zeros((LEN+1, LEN+1))
+    Hx = np.zeros((LEN+1, LEN))
+    Hy = np.zeros((LEN, LEN+1))
+    for n in range(1, TIME):
+        Ez[1:-1, 1:-1] = CA*Ez[1:-1, 1:-1] + CB*(
+            - (Hx[1:-1, 1:] - Hx[1:-1, :-1])
+            + (Hy[1:, 1:-1] - Hy[:-1, 1:-1])
+            )
+        Ez[int(LEN/2), int(LEN/2)] = Ez_t[n]
+        Hx = DA*Hx - DB*(Ez[:, 1:] - Ez[:, :-1])
+        Hy = DA*Hy + DB*(Ez[1:, :] - Ez[:-1, :])
+    return Ez, Hx, Hy
+
+def _diferenca4(f, eixo):
+    # (27*(f[i+1] - f[i]) - (f[i+2] - f[i-1]))/24, com f[i+1] - f[i] nas pontas
+    f = np.moveaxis(f, eixo, 0)
+    d = f[1:] - f[:-1]
+    d[1:-1] = (27*(f[2:-1] - f[1:-2]) - (f[3:] - f[:-3]))/24
+    return np.moveaxis(d, 0, eixo)
+
+def _refYee2D4(entrada, dtype):
+    Ez_t, CA, CB, DA, DB, LEN, TIME = entrada
+    Ez = np.zeros((LEN+1, LEN+1))
+    Hx = np.zeros((LEN+1, LEN))
+    Hy = np.zeros((LEN, LEN+1))
+    for n in range(1, TIME):
+        Ez[1:-1, 1:-1] = CA*Ez[1:-1, 1:-1] + CB*(_diferenca4(Hy[:, 1:-1], 0) - _diferenca4(Hx[1:-1], 1))
+        Ez[int(LEN/2), int(LEN/2)] = Ez_t[n]
+        Hx = DA*Hx - DB*_diferenca4(Ez, 1)
+        Hy = DA*Hy + DB*_diferenca4(Ez, 0)
+    return Ez, Hx, Hy
+
+def _refYee2DCPML(entrada, dtype):
+    Ez_t, CA, CB, DA, DB, LEN, TIME = entrada
+    N = CPML.espessura
+    # Coeficientes da CPML na grade inteira (profundidade nula fora da camada:
+    # a = 0 e 1/kappa - 1 = 0, psi continua nulo)
+    def perfil(posicoes):
+        return CPML.perfil(np.maximum(np.maximum(N - posicoes, posicoes - (LEN-N)), 0))
+    bE, aE, kE = perfil(np.arange(1, LEN))
+    bH, aH, kH = perfil(np.arange(LEN) + 0.5)
+    Ez = np.zeros((LEN+1, LEN+1))
+    Hx = np.zeros((LEN+1, LEN))
+    Hy = np.zeros((LEN, LEN+1))
+    psiEy = np.zeros((LEN-1, LEN-1))
+    psiEx = np.zeros((LEN-1, LEN-1))
+    psiHx = np.zeros((LEN+1, LEN))
+    psiHy = np.zeros((LEN, LEN+1))
+    for n in range(1, TIME):
+        dy = Hy[1:, 1:-1] - Hy[:-1, 1:-1]
+        dx = Hx[1:-1, 1:] - Hx[1:-1, :-1]
+        psiEy = bE[:, None]*psiEy + aE[:, None]*dy
+        psiEx = bE*psiEx + aE*dx
+        Ez[1:-1, 1:-1] = CA*Ez[1:-1, 1:-1] + CB*(
+            ((1 + kE[:, None])*dy + psiEy)
+            - ((1 + kE)*dx + psiEx)
+            )
+        Ez[int(LEN/2), int(LEN/2)] = Ez_t[n]
+        dx = Ez[:, 1:] - Ez[:, :-1]
+        dy = Ez[1:, :] - Ez[:-1, :]
+        psiHx = bH*psiHx + aH*dx
+        psiHy = bH[:, None]*psiHy + aH[:, None]*dy
+        Hx = DA*Hx - DB*((1 + kH)*dx + psiHx)
+        Hy = DA*Hy + DB*((1 + kH[:, None])*dy + psiHy)
+    return Ez, Hx, Hy
+
+def _refADI2D(entrada, dtype):
+    Ez_t, CA, CB, DA, DB, LEN, TIME = entrada
+    c = int(LEN/2) - 1     # ponto da fonte entre os internos
+    # Sistema implícito de Ez ao longo de um eixo (constantes de meio passo),
+    # com a linha identidade da fonte só no sistema que passa por ela
+    A = ((1 + 2*CB*DB)*np.eye(LEN-1) - CB*DB*np.eye(LEN-1, k=1) - CB*DB*np.eye(LEN-1, k=-1))
+    Afonte = A.copy()
+    Afonte[c] = 0
+    Afonte[c, c] = 1
+    def resolver(d):
+        Ez = np.linalg.solve(A, d)
+        Ez[:, c] = np.linalg.solve(Afonte, d[:, c])
+        return Ez
+    Ez = np.zeros((LEN+1, LEN+1))
+    Hx = np.zeros((LEN+1, LEN))
+    Hy = np.zeros((LEN, LEN+1))
+    for n in range(1, TIME):
+        # Primeiro meio passo: implícito ao longo das linhas (com Hy)
+        Hy = DA*Hy
+        d = CA*Ez[1:-1, 1:-1] + CB*((Hy[1:, 1:-1] - Hy[:-1, 1:-1]) - (Hx[1:-1, 1:] - Hx[1:-1, :-1]))
+        Hx = DA*Hx - DB*(Ez[:, 1:] - Ez[:, :-1])
+        d[c, c] = (Ez_t[n-1] + Ez_t[n])/2
+        Ez[1:-1, 1:-1] = resolver(d)
+        Hy = Hy + DB*(Ez[1:, :] - Ez[:-1, :])
+        # Segundo meio passo: implícito ao longo das colunas (com Hx)
+        Hx = DA*Hx
+        d = CA*Ez[1:-1, 1:-1] + CB*((Hy[1:, 1:-1] - Hy[:-1, 1:-1]) - (Hx[1:-1, 1:] - Hx[1:-1, :-1]))
+        Hy = DA*Hy + DB*(Ez[1:, :] - Ez[:-1, :])
+        d[c, c] = Ez_t[n]
+        Ez[1:-1, 1:-1] = resolver(d.T).T
+        Hx = Hx - DB*(Ez[:, 1:] - Ez[:, :-1])
+    return Ez, Hx, Hy
+
+########################## Motores atuais ##########################
+
+def _ultimo(gerador):
+    """
+    Cópia dos campos do último quadro de um gerador
+    """
+    for _, *campos in gerador:
+        pass
+    return tuple(np.copy(campo) for campo in campos)
+
+def _linhaSimular(entrada, dtype):
+    Vs_t, LEN, TIME, C1, C2, C3, C4, Rs, Rl = entrada
+    i, v, _ = linha.simular(Vs_t, LEN, TIME, C1, C2, C3, C4, Rs, Rl, 1, modo='rolante',
+                            instantes=(TIME-1,), velocidade=TIME, dtype=dtype)
+    return i[TIME-1], v[TIME-1]
+
+def _linhaQuadros(entrada, dtype):
+    Vs_t, LEN, TIME, C1, C2, C3, C4, Rs, Rl = entrada
+    return _ultimo(linha.quadros(Vs_t, LEN, TIME, C1, C2, C3, C4, Rs, Rl, 1,
+                                 velocidade=TIME-1, dtype=dtype))
+
+def _onda(janela=False, ordem=2):
+    # Mesmo mapa dos dois meios de Projeto02/codigo.py
+    def motor(entrada, dtype):
+        E_t, LEN, TIME, S, S_REFRAC, QUEBRA = entrada
+        E = np.zeros((TIME, LEN+2), dtype=dtype)
+        E[1:, 0] = E_t[:TIME-1]
+        meio = materiais.Mapa(LEN, S=S).pintar(slice(QUEBRA-1, None), S=S_REFRAC)
+        return onda.meioVariavel(E, materiais.quadradoCourant(meio, dtype), janela=janela, ordem=ordem)[-1],
+    return motor
+
+def _yee(gerador, **opcoes):
+    def motor(entrada, dtype):
+        Ez_t, CA, CB, DA, DB, LEN, TIME = entrada
+        return _ultimo(gerador(Ez_t, CA, CB, DA, DB, LEN, TIME, k=TIME-1, dtype=dtype, **opcoes))
+    return motor
+
+def _yeeSimetria(entrada, dtype):
+    Ez_t, CA, CB, DA, DB, LEN, TIME = entrada
+    return yee.completar2D(*_ultimo(yee.quadros2DSimetria(Ez_t, CA, CB, DA, DB, LEN, TIME, k=TIME-1,
+                                                          dtype=dtype)))
+
+def _comThreads(motor):
+    """
+    Roda o motor com o executor de faixas usando todas as threads
+    """
+    def comThreads(entrada, dtype):
+        executor.configurar(max(2, os.cpu_count() or 1))
+        try:
+            return motor(entrada, dtype)
+        finally:
+            executor.configurar(1)
+    return comThreads
+
+def _yeeParalelo(entrada, dtype):
+    Ez_t, CA, CB, DA, DB, LEN, TIME = entrada
+    return _ultimo(yee_paralelo.quadros2D(Ez_t, CA, CB, DA, DB, LEN, TIME, k=TIME-1,
+                                          processos=max(2, os.cpu_count() or 1), dtype=dtype))
+
+########################### Casos ##########################
+
+def _entradaLinha(LEN, TIME):
+    # R = G = 0, L = C = 1, dt = 0.5, dz = 1 (Courant 0.5) e cargas casadas
+    return (_pulso(TIME), LEN, TIME) + tuple(linha.constantes(0, 1, 0, 1, 0.5, 1)) + (1.0, 1.0)
+
+def _entradaOnda(LEN, TIME):
+    return (_pulso(TIME), LEN, TIME, 0.9, 0.25, LEN//2)
+
+def _entradaOnda4(LEN, TIME):
+    # S abaixo do limite sqrt(3)/2 da quarta ordem
+    return (_pulso(TIME), LEN, TIME, 0.8, 0.25, LEN//2)
+
+def _entradaYee(LEN, TIME):
+    # Unidades normalizadas, Courant 0.5 (estável também em 2D e na quarta ordem)
+    return (_pulso(TIME), 1.0, 0.5, 1.0, 0.5, LEN, TIME)
+
+def _entradaADI(LEN, TIME):
+    # Constantes de meio passo com dt = 1.5: Courant 1.5, acima do limite
+    # 1/sqrt(2) do Yee 2D
+    return (_pulso(TIME), 1.0, 0.75, 1.0, 0.75, LEN, TIME)
+
+# solver: (entrada, células por passo, referência, {motor: função})
+SOLVERS = {
+    'linha': (_entradaLinha, lambda LEN: 2*LEN + 1, _refLinha,
+              {'simular': _linhaSimular, 'quadros': _linhaQuadros,
+               'simular+threads': _comThreads(_linhaSimular)}),
+    'onda': (_entradaOnda, lambda LEN: LEN, _refOnda,
+             {'meioVariavel': _onda(), 'janela': _onda(janela=True)}),
+    'onda4': (_entradaOnda4, lambda LEN: LEN, _refOnda4,
+              {'meioVariavel': _onda(ordem=4), 'janela': _onda(janela=True, ordem=4)}),
+    'yee1D': (_entradaYee, lambda LEN: 2*LEN + 1, _refYee1D,
+              {'quadros': _yee(yee.quadros1D), 'quadros+threads': _comThreads(_yee(yee.quadros1D)),
+               'janela': _yee(yee.quadros1D, janela=True)}),
+    'yee1DHy': (_entradaYee, lambda LEN: 2*LEN, _refYee1DHy,
+                {'quadros': _yee(yee.quadros1DHy), 'quadros+threads': _comThreads(_yee(yee.quadros1DHy)),
+                 'janela': _yee(yee.quadros1DHy, janela=True)}),
+    'yee1DMur': (_entradaYee, lambda LEN: 2*LEN + 1, _refYee1DMur,
+                 {'quadros': _yee(yee.quadros1D, mur=MUR), 'janela': _yee(yee.quadros1D, janela=True, mur=MUR)}),
+    'yee2D': (_entradaYee, lambda LEN: (LEN+1)**2 + 2*LEN*(LEN+1), _refYee2D,
+              {'quadros': _yee(yee.quadros2D), 'quadros+threads': _comThreads(_yee(yee.quadros2D)),
+               'processos': _yeeParalelo, 'janela': _yee(yee.quadros2D, janela=True),
+               'simetria': _yeeSimetria}),
+    'yee2D4': (_entradaYee, lambda LEN: (LEN+1)**2 + 2*LEN*(LEN+1), _refYee2D4,
+               {'quadros': _yee(yee.quadros2D, ordem=4),
+                'quadros+threads': _comThreads(_yee(yee.quadros2D, ordem=4))}),
+    'yee2DCPML': (_entradaYee, lambda LEN: (LEN+1)**2 + 2*LEN*(LEN+1), _refYee2DCPML,
+                  {'quadros': _yee(yee.quadros2D, cpml=CPML),
+                   'quadros+threads': _comThreads(_yee(yee.quadros2D, cpml=CPML)),
+                   'janela': _yee(yee.quadros2D, janela=True, cpml=CPML)}),
+    'adi2D': (_entradaADI, lambda LEN: (LEN+1)**2 + 2*LEN*(LEN+1), _refADI2D,
+              {'quadros': _yee(adi.quadros2D)}),
+}
+
+def casos(solvers=None, rapido=False):
+    """
+    Lista os casos (solver, motor, LEN, passos, dtype); a referência vem
+    antes dos motores de cada tamanho e o primeiro motor também roda em float32
+    """
+    tamanhos = RAPIDOS if rapido else TAMANHOS
+    lista = []
+    for solver in (solvers or SOLVERS):
+        motores = list(SOLVERS[solver][3])
+        for LEN, passos in tamanhos[solver]:
+            lista.append((solver, 'referencia', LEN, passos, 'float64'))
+            lista += [(solver, motor, LEN, passos, 'float64') for motor in motores]
+            lista.append((solver, motores[0], LEN, passos, 'float32'))
+    return lista
+
+def _picoRSS():
+    """
+    Pico de memória residente do processo (bytes), ou None se não disponível
+    """
+    # No Linux o ru_maxrss é herdado do processo pai no fork/exec, enquanto
+    # o VmHWM é do espaço de endereçamento atual
+    try:
+        with open('/proc/self/status') as arq:
+            for linhaStatus in arq:
+                if(linhaStatus.startswith('VmHWM:')):
+                    return int(linhaStatus.split()[1])*1024
+    except OSError:
+        pass
+    if(resource is None):
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss if sys.platform == 'darwin' else rss*1024   # kB no Linux
+
+def medir(caso, repeticoes=3):
+    """
+    Função que mede um caso no próprio processo
+    saídas: dicionário com as medidas e os campos finais ('campos')
+    """
+    solver, motor, LEN, passos, dtype = caso
+    entrada, celulas, referencia, motores = SOLVERS[solver]
+    funcao = referencia if motor == 'referencia' else motores[motor]
+    dados = entrada(LEN, passos)
+    tipo = np.dtype(dtype).type
+
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        campos = funcao(dados, tipo)
+        tempos.append(time.perf_counter() - inicio)
+    tempo = min(tempos)
+
+    # Pico de bytes alocados numa execução separada (o tracemalloc atrasa)
+    tracemalloc.start()
+    funcao(dados, tipo)
+    alocado = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    return {'solver': solver, 'motor': motor, 'LEN': LEN, 'passos': passos, 'dtype': dtype,
+            'tempo': tempo, 'mcelulas': celulas(LEN)*(passos - 1)/tempo/1e6,
+            'rss': _picoRSS(), 'alocado': alocado, 'campos': [np.asarray(c) for c in campos]}
+
+def _filho(caso, repeticoes, conexao):
+    """
+    Mede um caso num processo novo e devolve o resultado pela conexão
+    """
+    try:
+        conexao.send(medir(caso, repeticoes))
+    except Exception as erro:
+        conexao.send({'erro': repr(erro)})
+    conexao.close()
+
+def _isolado(caso, repeticoes):
+    """
+    Executa medir() num processo novo ('spawn'), para um RSS só do caso
+    """
+    contexto = multiprocessing.get_context('spawn')
+    recebe, envia = contexto.Pipe(duplex=False)
+    processo = contexto.Process(target=_filho, args=(caso, repeticoes, envia))
+    processo.start()
+    resultado = recebe.recv()
+    processo.join()
+    assert 'erro' not in resultado, "Falha no caso %s: %s" % (caso, resultado.get('erro'))
+    return resultado
+
+def _desvio(campos, referencia):
+    """
+    Desvio relativo máximo entre os campos finais e os da referência
+    """
+    absoluto = max(float(np.max(np.abs(np.asarray(a, dtype=np.float64) - b))) for a, b in zip(campos, referencia))
+    maximo = max(float(np.max(np.abs(b))) for b in referencia)
+    return absoluto/maximo if maximo > 0 else absoluto
+
+def executar(solvers=None, rapido=False, repeticoes=3, isolar=True):
+    """
+    Função que mede todos os casos e confere os motores com a referência
+    saídas: dicionário com o ambiente ('meta') e a lista de casos
+    """
+    resultados = []
+    referencias = {}
+    for caso in casos(solvers, rapido):
+        resultado = _isolado(caso, repeticoes) if isolar else medir(caso, repeticoes)
+        campos = resultado.pop('campos')
+        chave = caso[0], caso[2], caso[3]
+        if(caso[1] == 'referencia'):
+            referencias[chave] = campos
+        resultado['desvio'] = _desvio(campos, referencias[chave])
+        resultado['ok'] = resultado['desvio'] <= TOLERANCIA[caso[4]]
+        resultados.append(resultado)
+        _imprimir(resultado)
+    meta = {'python': platform.python_version(), 'numpy': np.__version__,
+            'plataforma': platform.platform(), 'cpus': os.cpu_count(),
+            'data': time.strftime('%Y-%m-%d %H:%M:%S')}
+    return {'meta': meta, 'casos': resultados}
+
+def _imprimir(r, base=None):
+    """
+    Imprime uma linha da tabela de resultados
+    """
+    linhaTabela = "%-9s %-16s %8d %6d %-8s %9.2f Mcel/s %10.4f s %8.1f MB %9.1f MB  desvio %.1e %s" % (
+        r['solver'], r['motor'], r['LEN'], r['passos'], r['dtype'], r['mcelulas'], r['tempo'],
+        (r['rss'] or 0)/2**20, r['alocado']/2**20, r['desvio'], 'ok' if r['ok'] else 'FALHOU')
+    if(base is not None):
+        razao = r['tempo']/base['tempo']
+        linhaTabela += "  %.2fx da base%s" % (razao, '  REGRESSÃO' if razao > 1 + REGRESSAO else '')
+    print(linhaTabela)
+
+def comparar(atual, base):
+    """
+    Compara dois resultados (do JSON) caso a caso
+    saídas: lista das chaves dos casos com regressão de tempo
+    """
+    def chave(r):
+        return r['solver'], r['motor'], r['LEN'], r['passos'], r['dtype']
+    anteriores = {chave(r): r for r in base['casos']}
+    regressoes = []
+    print("\nComparação com a base (%s):" % base['meta'].get('data'))
+    for r in atual['casos']:
+        anterior = anteriores.get(chave(r))
+        if(anterior is None):
+            continue
+        _imprimir(r, anterior)
+        if(r['tempo'] > (1 + REGRESSAO)*anterior['tempo']):
+            regressoes.append(chave(r))
+    return regressoes
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Mede o desempenho dos solvers")
+    parser.add_argument('--rapido', action='store_true', help="tamanhos pequenos (conferência rápida)")
+    parser.add_argument('--solvers', help="lista separada por vírgulas (%s)" % ','.join(SOLVERS))
+    parser.add_argument('--repeticoes', type=int, default=3)
+    parser.add_argument('--saida', help="arquivo JSON com os resultados")
+    parser.add_argument('--base', help="JSON de uma medição anterior para comparar")
+    argumentos = parser.parse_args()
+
+    solvers = argumentos.solvers.split(',') if argumentos.solvers else None
+    atual = executar(solvers, argumentos.rapido, argumentos.repeticoes)
+    if(argumentos.saida):
+        with open(argumentos.saida, 'w') as arq:
+            json.dump(atual, arq, indent=1)
+    if(argumentos.base):
+        with open(argumentos.base) as arq:
+            comparar(atual, json.load(arq))
+    if(not all(r['ok'] for r in atual['casos'])):
+        sys.exit(1)
@@ -0,0 +1,140 @@
+"""
+Relação de dispersão numérica do método FDTD para a equação de onda,
+calculada sobre arrays inteiros do NumPy.
+
+Para uma densidade de grade N (pontos por comprimento de onda) e um fator
+de Courant S, o número de onda numérico satisfaz
+
+    k~*dx = arccos(zeta),   zeta = 1 + (cos(2*pi*S/N) - 1)/S**2
+
+A velocidade de fase normalizada é (2*pi/N)/Re(k~*dx) e a atenuação
+espacial (nepers por célula) é -Im(k~*dx). Como zeta <= 1 sempre, o
+arccos complexo se resume a dois casos:
+    zeta >= -1 -> arccos(zeta) real, sem atenuação
+    zeta <  -1 -> Re = pi e -Im = arccosh(-zeta)
+o que permite obter velocidade, atenuação e erro numa única passada, sem
+aritmética complexa.
+
+Com os estênceis espaciais de quarta ordem (FDTD(2,4), ver ESTENCEIS) a
+relação fica sin(w*dt/2)/S = g(u), com u = sin(k~*dx/2) e w*dt = 2*pi*S/N;
+na segunda ordem g(u) = u, que é a relação acima. g é crescente, então
+u = g^-1(sin(pi*S/N)/S) tem uma única solução, escrita em forma fechada, e
+como antes u <= 1 dá k~*dx = 2*arcsin(u) real e u > 1 dá Re = pi e
+-Im = 2*arccosh(u). O maior S estável é 1/g(1) (ver courantLimite()).
+
+O ADI-FDTD 2D tem uma relação própria (ver dispersaoADI()).
+"""
+
+import numpy as np
+
+# Estênceis espaciais de quarta ordem: lado espacial g(u) da relação
+ESTENCEIS = {'onda4': 'laplaciano (-1, 16, -30, 16, -1)/12 da equação de onda, g(u) = u*sqrt(1 + u²/3)',
+             'yee4': 'diferença escalonada (1, -27, 27, -1)/24 de Yee, g(u) = u + u³/6'}
+
+def simbolo(u, estencil=None):
+    """
+    Lado espacial g(u) da relação de dispersão do estêncil (None = segunda ordem)
+    """
+    u = np.asarray(u, dtype=float)
+    if(estencil is None):
+        return u
+    if(estencil == 'onda4'):
+        return u*np.sqrt(1 + u**2/3)
+    assert estencil == 'yee4', "Estêncil inválido: " + str(estencil)
+    return u + u**3/6
+
+def seno(r, estencil=None):
+    """
+    Inversa de simbolo(): u = sin(k~*dx/2) tal que g(u) = r
+    """
+    r = np.asarray(r, dtype=float)
+    if(estencil is None):
+        return r
+    if(estencil == 'onda4'):
+        # u² + u⁴/3 = r², na forma sem cancelamento para r pequeno
+        return np.sqrt(2*r**2/(1 + np.sqrt(1 + 4*r**2/3)))
+    assert estencil == 'yee4', "Estêncil inválido: " + str(estencil)
+    # Raiz real de u³ + 6*u - 6*r = 0
+    return 2*np.sqrt(2)*np.sinh(np.arcsinh(3*r/(2*np.sqrt(2)))/3)
+
+def courantLimite(estencil=None):
+    """
+    Maior fator de Courant estável em 1D (1/g(1)): 1 na segunda ordem,
+    sqrt(3)/2 no 'onda4' e 6/7 no 'yee4'
+    """
+    return float(1/simbolo(1, estencil))
+
+def argumento(S, N):
+    """
+    Calcula zeta = 1 + (cos(2*pi*S/N) - 1)/S**2 (aceita arrays com broadcast)
+    """
+    S = np.asarray(S, dtype=float)
+    N = np.asarray(N, dtype=float)
+    return 1 + (np.cos(2*np.pi*S/N) - 1)/(S**2)
+
+def numeroOnda(S, N, estencil=None):
+    """
+    Retorna as partes real e imaginária (com o sinal trocado) de k~*dx,
+    isto é, arccos(zeta) e a atenuação por célula
+    """
+    if(estencil is not None):
+        S = np.asarray(S, dtype=float)
+        u = seno(np.abs(np.sin(np.pi*S/np.asarray(N, dtype=float)))/S, estencil)
+        return 2*np.arcsin(np.minimum(u, 1)), 2*np.arccosh(np.maximum(u, 1))
+    zeta = argumento(S, N)
+    # Na região instável (zeta < -1) a parte real fica presa em pi
+    real = np.arccos(np.maximum(zeta, -1))
+    atenuacao = np.arccosh(np.maximum(-zeta, 1))
+    return real, atenuacao
+
+def dispersao(S, N, estencil=None):
+    """
+    Determina velocidade de fase, atenuação e erro da velocidade de fase
+    entradas:
+    S - Fator de Courrant (escalar ou array)
+    N - Densidade da grade (escalar ou array)
+    estencil - chave de ESTENCEIS ou None (segunda ordem)
+    S e N seguem as regras de broadcast do NumPy, por exemplo
+    S[:, None] e N[None, :] geram mapas 2D
+    saídas:
+    velocidade - velocidade de fase numérica normalizada em c
+    atenuacao - constante de atenuação (nepers/célula da grade)
+    erro - erro da velocidade de fase (%)
+    """
+    real, atenuacao = numeroOnda(S, N, estencil)
+    # Re(k~*dx) = 0 (N = S/m, m inteiro) dá velocidade infinita
+    with np.errstate(divide='ignore'):
+        velocidade = (2*np.pi/np.asarray(N, dtype=float))/real
+    erro = np.abs(1 - velocidade)*100
+    return velocidade, atenuacao, erro
+
+def mapa(Ss, Ns, estencil=None):
+    """
+    Calcula a dispersão para todas as combinações de Ss e Ns
+    saídas: arrays (len(Ss), len(Ns)) como em dispersao()
+    """
+    Ss = np.asarray(Ss, dtype=float)
+    Ns = np.asarray(Ns, dtype=float)
+    return dispersao(Ss[:, None], Ns[None, :], estencil)
+
+def dispersaoADI(S, N, angulo=0):
+    """
+    Dispersão do ADI-FDTD 2D (Projeto03/adi.py), que é incondicionalmente
+    estável: para uma onda na direção 'angulo' (radianos a partir do eixo x)
+        tan²(w*dt/2) = X² + Y² + X²*Y²
+        X = S*sin(pi*cos(angulo)/N),   Y = S*sin(pi*sin(angulo)/N)
+    com S = c*dt/dx, que pode passar do limite do CFL (1/sqrt(2)). w é
+    sempre real, então não há atenuação, mas o erro de fase cresce com S
+    saídas como em dispersao()
+    """
+    S = np.asarray(S, dtype=float)
+    N = np.asarray(N, dtype=float)
+    X = S*np.sin(np.pi*np.cos(angulo)/N)
+    Y = S*np.sin(np.pi*np.sin(angulo)/N)
+    wdt = 2*np.arctan(np.sqrt(X**2 + Y**2 + (X*Y)**2))
+    # Velocidade normalizada: (w/k)/c = w*dt/(2*pi*S/N)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        velocidade = wdt/(2*np.pi*S/N)
+    atenuacao = np.zeros_like(velocidade)
+    erro = np.abs(1 - velocidade)*100
+    return velocidade, atenuacao, erro
@@ -0,0 +1,100 @@
+"""
+Monitores de frequência: DFT acumulada durante a simulação.
+
+Em vez de guardar o histórico (TIME x LEN) e calcular a FFT depois, cada
+Monitor soma, a cada passo n, campo[regiao]*exp(-j*w*t_n)*dt para as
+frequências escolhidas, com t_n = (n + deslocamento)*dt. A memória é
+O(pontos x frequências) e o resultado está pronto no fim do laço; a
+região pode ser um ponto, uma linha ou um plano do campo (qualquer índice
+do numpy).
+
+Os monitores são alimentados pelos geradores de quadros dos solvers com
+k=1 (um quadro por passo, sem histórico), ver acumular():
+
+    monitores = [Monitor(f, dt, 'v', 0), Monitor(f, dt, 'i', slice(0, 2), -0.5)]
+    acumular(linha.quadros(..., velocidade=1), monitores, ('i', 'v'))
+
+O deslocamento corrige o meio passo entre os campos intercalados no tempo
+(na linha i[n] é calculado com v[n-1], então está meio passo antes de v[n]);
+o intercalamento no espaço fica a cargo de quem monta os monitores (ex.: a
+média de i[0] e i[1] cai no ponto de v[0], ver linha.espectroEntrada()).
+
+Como a soma vai só até o último passo, a excitação deve ser um pulso cuja
+resposta decaia dentro da simulação; com um degrau (fonte 1 da linha) a
+transformada fica dominada pelo truncamento e as razões (impedância, S11)
+perdem o sentido.
+"""
+
+import numpy as np
+
+class Monitor:
+    """
+    DFT de uma região de um campo nas frequências dadas, acumulada passo a passo
+    """
+    def __init__(self, frequencias, dt, campo, regiao=(), deslocamento=0.0):
+        """
+        entradas:
+        frequencias - frequências em Hz
+        dt - passo de tempo da simulação
+        campo - nome do campo no quadro (ver acumular())
+        regiao - índice do campo monitorado (ponto, fatia ou tupla de
+                 fatias; () = campo inteiro)
+        deslocamento - instante do campo em passos, relativo a n (ex.: -0.5)
+        """
+        self.frequencias = np.atleast_1d(np.asarray(frequencias, dtype=float))
+        self.dt = dt
+        self.campo = campo
+        self.regiao = regiao
+        self.deslocamento = deslocamento
+        self.omega = 2*np.pi*self.frequencias
+        self.soma = None
+        self.passos = 0
+
+    def acumular(self, n, campo):
+        """
+        Soma a contribuição do passo n (campo é o array inteiro do passo)
+        """
+        valores = campo[self.regiao]
+        if(self.soma is None):
+            forma = (len(self.frequencias),) + np.shape(valores)
+            self.soma = np.zeros(forma, dtype=np.complex128)
+            self._rascunho = np.empty(forma, dtype=np.complex128)
+            self._eixos = (len(self.frequencias),) + (1,)*np.ndim(valores)
+        fator = np.exp(-1j*self.omega*((n + self.deslocamento)*self.dt))*self.dt
+        np.multiply(fator.reshape(self._eixos), valores, out=self._rascunho)
+        self.soma += self._rascunho
+        self.passos += 1
+
+    def resultado(self):
+        """
+        Transformada acumulada, array (frequências, forma da região)
+        """
+        return self.soma
+
+def acumular(quadros, monitores, nomes):
+    """
+    Função que consome um gerador de quadros (n, campo1, campo2, ...) e
+    alimenta os monitores com o campo de cada um
+    entradas:
+    quadros - gerador de um solver com um quadro por passo (k=1)
+    monitores - lista de Monitor
+    nomes - nomes dos campos na ordem do quadro, ex. ('Ez', 'Hy')
+    saídas: os próprios monitores
+    """
+    indices = [nomes.index(monitor.campo) for monitor in monitores]
+    for n, *campos in quadros:
+        for monitor, k in zip(monitores, indices):
+            monitor.acumular(n, campos[k])
+    return monitores
+
+def impedancia(V, I):
+    """
+    Impedância V/I em cada frequência
+    """
+    return V/I
+
+def reflexao(Z, Z0):
+    """
+    Coeficiente de reflexão (S11) de uma impedância Z numa referência Z0
+    """
+    return (Z - Z0)/(Z + Z0)
@@ -0,0 +1,74 @@
+"""
+Execução das atualizações de campo em faixas, com um pool de threads.
+
+As operações grandes do NumPy liberam o GIL, então uma atualização como
+Ez[1:-1, 1:-1] = ... pode ser dividida em faixas contíguas (linhas na
+grade 2D, trechos de pontos em 1D) executadas em threads ao mesmo tempo,
+sem copiar os campos entre processos (ver Projeto03/yee_paralelo.py para
+a versão com processos, mais pesada). Cada solver escreve a atualização
+como uma função f(inicio, fim) sobre um intervalo de itens e chama
+executar(f, n); abaixo de LIMIAR elementos, onde o custo das threads
+domina, f(0, n) é chamada diretamente.
+
+Como cada ponto continua sendo calculado pelas mesmas operações, o
+resultado é idêntico ao da execução serial.
+"""
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+
+TRABALHADORES = 1       # threads (1 = execução serial)
+TAMANHO_TRECHO = None   # itens (linhas ou pontos) por faixa, None = uma faixa por thread
+LIMIAR = 2**17          # elementos abaixo dos quais a execução é serial
+
+_pool = None
+
+def configurar(trabalhadores=1, tamanhoTrecho=None, limiar=2**17):
+    """
+    Configura o executor compartilhado pelos solvers
+    entradas:
+    trabalhadores - número de threads (None = os.cpu_count(), 1 = serial)
+    tamanhoTrecho - itens por faixa (None = divide igualmente entre as threads)
+    limiar - número de elementos abaixo do qual a execução é serial
+    """
+    global TRABALHADORES, TAMANHO_TRECHO, LIMIAR, _pool
+    if(trabalhadores is None):
+        trabalhadores = os.cpu_count() or 1
+    assert trabalhadores >= 1, "Número de threads inválido!"
+    assert tamanhoTrecho is None or tamanhoTrecho >= 1, "Tamanho de trecho inválido!"
+    if(_pool is not None and trabalhadores != TRABALHADORES):
+        _pool.shutdown()
+        _pool = None
+    TRABALHADORES = trabalhadores
+    TAMANHO_TRECHO = tamanhoTrecho
+    LIMIAR = limiar
+
+def trechos(n):
+    """
+    Divide range(n) nas faixas (inicio, fim) executadas pelas threads
+    """
+    if(TAMANHO_TRECHO is not None):
+        return [(a, min(a + TAMANHO_TRECHO, n)) for a in range(0, n, TAMANHO_TRECHO)]
+    limites = np.linspace(0, n, min(TRABALHADORES, n) + 1).astype(int)
+    return [(int(a), int(b)) for a, b in zip(limites[:-1], limites[1:])]
+
+def executar(funcao, n, elementosPorItem=1, inicio=0):
+    """
+    Executa funcao(a, b) cobrindo os itens range(inicio, inicio+n)
+    entradas:
+    funcao - atualização de uma faixa de itens (não deve retornar nada)
+    n - número de itens (linhas ou pontos)
+    elementosPorItem - elementos de cada item (comprimento da linha em 2D),
+                       usado na comparação com LIMIAR
+    inicio - primeiro item (para atualizar só uma parte da grade)
+    """
+    global _pool
+    if(TRABALHADORES <= 1 or n*elementosPorItem < LIMIAR or n < 2):
+        funcao(inicio, inicio + n)
+        return
+    if(_pool is None):
+        _pool = ThreadPoolExecutor(TRABALHADORES)
+    # Espera todas as faixas (e propaga exceções) antes do próximo meio passo
+    for futuro in [_pool.submit(funcao, inicio + a, inicio + b) for a, b in trechos(n)]:
+        futuro.result()
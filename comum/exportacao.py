@@ -0,0 +1,162 @@
+"""
+Exportação das animações para vídeo ou sequência de imagens, renderizando
+os quadros em paralelo.
+
+Cada módulo de gráficos (Projeto01/graficos.py, Projeto03/animacao1D.py e
+Projeto03/animacao2D.py) tem uma função prepararAnimacao(...) que monta a
+figura e devolve (fig, funcao, frames, blit). Os quadros 0..frames-1 são
+divididos em trechos contíguos entre processos; cada processo monta a sua
+própria figura com o backend Agg (sem janela) uma única vez e desenha os
+seus trechos. Os trechos são juntados em ordem: como arquivos PNG
+numerados num diretório ou enviados ao ffmpeg para gerar um vídeo.
+
+Só é possível exportar a partir do histórico completo (frames inteiro),
+não de um gerador de quadros (animarDurante).
+"""
+
+import os
+import shutil
+import tempfile
+import subprocess
+import multiprocessing
+import numpy as np
+
+# Extensões tratadas como vídeo (as demais são diretórios de PNGs)
+VIDEOS = ('.mp4', '.mkv', '.avi', '.mov', '.webm', '.gif')
+
+_tarefa = None      # (preparar, args, kwargs, pasta, video) de cada processo
+_figura = None      # (fig, funcao) já montada no processo
+
+def _iniciar(preparar, args, kwargs, pasta, video):
+    """
+    Inicializa um processo de renderização (backend Agg, sem janelas)
+    pasta - diretório temporário dos trechos (video) ou destino dos PNGs
+    """
+    global _tarefa, _figura
+    import matplotlib.pyplot as plt
+    plt.switch_backend('Agg')
+    _tarefa = (preparar, args, kwargs, pasta, video)
+    _figura = None
+
+def _desenhar(fig, funcao, quadro):
+    """
+    Desenha um quadro e retorna a imagem RGB (altura, largura, 3)
+    """
+    # Com blit os artistas são 'animated' e ficariam fora do desenho completo
+    for artista in funcao(quadro):
+        artista.set_animated(False)
+    fig.canvas.draw()
+    return np.asarray(fig.canvas.buffer_rgba())[:, :, :3]
+
+def _renderizar(trecho):
+    """
+    Renderiza os quadros de um trecho (inicio, fim)
+    saídas: caminho do arquivo com os quadros em RGB puro (vídeo) ou None
+    (os PNGs já são gravados diretamente no diretório de destino)
+    """
+    global _figura
+    preparar, args, kwargs, pasta, video = _tarefa
+    if(_figura is None):
+        fig, funcao, _, _ = preparar(*args, **kwargs)
+        _figura = (fig, funcao)
+    fig, funcao = _figura
+
+    inicio, fim = trecho
+    if(not video):
+        import matplotlib.pyplot as plt
+        for quadro in range(inicio, fim):
+            plt.imsave(os.path.join(pasta, 'quadro_%05d.png' % quadro), _desenhar(fig, funcao, quadro))
+        return None
+
+    caminho = os.path.join(pasta, 'trecho_%05d.rgb' % inicio)
+    with open(caminho, 'wb') as arq:
+        for quadro in range(inicio, fim):
+            arq.write(np.ascontiguousarray(_desenhar(fig, funcao, quadro)).tobytes())
+    return caminho
+
+def _trechos(nQuadros, processos, porProcesso=4):
+    """
+    Divide os quadros em trechos contíguos, alguns por processo para
+    equilibrar a carga (quadros do fim da simulação podem ser mais lentos)
+    """
+    nTrechos = max(1, min(nQuadros, processos*porProcesso))
+    limites = np.linspace(0, nQuadros, nTrechos + 1).astype(int)
+    return [(int(a), int(b)) for a, b in zip(limites[:-1], limites[1:]) if b > a]
+
+def _ffmpeg(destino, largura, altura, fps):
+    """
+    Abre o ffmpeg recebendo quadros RGB pela entrada padrão
+    """
+    import matplotlib
+    programa = shutil.which(matplotlib.rcParams['animation.ffmpeg_path'])
+    assert programa is not None, "ffmpeg não encontrado, exporte para um diretório de PNGs"
+    comando = [programa, '-y', '-loglevel', 'error',
+               '-f', 'rawvideo', '-pix_fmt', 'rgb24', '-s', '%dx%d' % (largura, altura),
+               '-r', str(fps), '-i', '-']
+    if(not destino.lower().endswith('.gif')):
+        # yuv420p (compatível com a maioria dos reprodutores) exige lados pares
+        comando += ['-vf', 'pad=ceil(iw/2)*2:ceil(ih/2)*2', '-pix_fmt', 'yuv420p']
+    return subprocess.Popen(comando + [destino], stdin=subprocess.PIPE)
+
+def exportar(preparar, args, destino, kwargs=None, processos=None, fps=30):
+    """
+    Função que exporta uma animação renderizando os quadros em paralelo
+    entradas:
+    preparar - prepararAnimacao de um dos módulos de gráficos
+    args, kwargs - argumentos de preparar (com o histórico completo)
+    destino - arquivo de vídeo (extensões em VIDEOS, usa o ffmpeg) ou
+              diretório onde são gravados quadro_00000.png, quadro_00001.png, ...
+    processos - número de processos, padrão os.cpu_count() (1 = sem paralelismo)
+    fps - quadros por segundo do vídeo
+    saídas:
+    número de quadros exportados
+    """
+    import matplotlib.pyplot as plt
+    plt.switch_backend('Agg')
+    if(kwargs is None):
+        kwargs = {}
+    if(processos is None):
+        processos = os.cpu_count() or 1
+
+    # Monta a figura uma vez para saber o número de quadros e o tamanho
+    fig, funcao, nQuadros, _ = preparar(*args, **kwargs)
+    assert isinstance(nQuadros, int), "Só é possível exportar a partir do histórico completo"
+    altura, largura, _ = _desenhar(fig, funcao, 0).shape
+    plt.close('all')
+
+    video = destino.lower().endswith(VIDEOS)
+    if(video):
+        pasta = tempfile.mkdtemp(prefix='exportacao_')
+        saida = _ffmpeg(destino, largura, altura, fps)
+    else:
+        pasta = destino
+        os.makedirs(pasta, exist_ok=True)
+
+    trechos = _trechos(nQuadros, processos)
+    pool = None
+    try:
+        if(processos == 1):
+            _iniciar(preparar, args, kwargs, pasta, video)
+            resultados = map(_renderizar, trechos)
+        else:
+            # 'fork' evita copiar o histórico para cada processo (e reexecutar o script)
+            metodos = multiprocessing.get_all_start_methods()
+            contexto = multiprocessing.get_context('fork' if 'fork' in metodos else None)
+            pool = contexto.Pool(processos, initializer=_iniciar,
+                                 initargs=(preparar, args, kwargs, pasta, video))
+            # imap entrega os trechos na ordem, enquanto os próximos são renderizados
+            resultados = pool.imap(_renderizar, trechos)
+
+        for caminho in resultados:
+            if(video):
+                with open(caminho, 'rb') as arq:
+                    shutil.copyfileobj(arq, saida.stdin)
+                os.remove(caminho)
+    finally:
+        if(pool is not None):
+            pool.terminate()
+        if(video):
+            saida.stdin.close()
+            saida.wait()
+            shutil.rmtree(pasta, ignore_errors=True)
+    return nQuadros
@@ -0,0 +1,145 @@
+"""
+Instrumentação dos laços de tempo dos solvers.
+
+Desligada por padrão: medidor() devolve None e os laços só testam
+'if(medidor):' entre as fases de cada passo, o que custa muito menos que
+as próprias atualizações. Com configurar(True, ...) cada laço recebe um
+Medidor que:
+    - acumula o tempo de cada fase do passo: 'E', 'H', 'contorno', 'fonte'
+      (na linha de transmissão v faz o papel de E e i o de H) e 'registro'
+      (sondas e quadros guardados)
+    - chama os callbacks a cada 'intervalo' passos, como callback(n, medidor, campos),
+      com campos um dicionário nome: array do passo atual
+    - imprime em sys.stderr uma linha de progresso (passo, passos/s,
+      Mcélulas/s e tempo restante) no máximo a cada 'periodo' segundos
+    - imprime o resumo do tempo por fase no fim do laço
+O tempo gasto fora do laço (na animação, entre dois quadros de um gerador)
+e nos callbacks não entra nas fases.
+"""
+
+import sys
+import time
+
+ATIVO = False       # instrumentação ligada
+INTERVALO = 100     # passos entre as chamadas dos callbacks
+CALLBACKS = ()      # funções callback(n, medidor, campos)
+PROGRESSO = True    # imprime a linha de progresso e o resumo
+PERIODO = 1.0       # segundos mínimos entre duas linhas de progresso
+
+FASES = ('E', 'H', 'contorno', 'fonte', 'registro')
+
+def configurar(ativo=False, intervalo=100, callbacks=(), progresso=True, periodo=1.0):
+    """
+    Configura a instrumentação usada pelos laços dos solvers
+    entradas:
+    ativo - liga a instrumentação (False = custo praticamente nulo)
+    intervalo - passos entre as chamadas dos callbacks
+    callbacks - funções callback(n, medidor, campos)
+    progresso - imprime a linha de progresso e o resumo por fase
+    periodo - segundos mínimos entre duas linhas de progresso
+    """
+    global ATIVO, INTERVALO, CALLBACKS, PROGRESSO, PERIODO
+    assert intervalo >= 1, "Intervalo inválido!"
+    ATIVO = ativo
+    INTERVALO = intervalo
+    CALLBACKS = tuple(callbacks)
+    PROGRESSO = progresso
+    PERIODO = periodo
+
+def medidor(ultimo, nome='', celulas=None, primeiro=1):
+    """
+    Cria o medidor de um laço, ou None se a instrumentação estiver desligada
+    entradas:
+    ultimo - último passo do laço (TIME-1)
+    nome - nome do solver na linha de progresso
+    celulas - células atualizadas por passo (para Mcélulas/s)
+    primeiro - primeiro passo do laço
+    """
+    if(not ATIVO):
+        return None
+    return Medidor(ultimo, nome, celulas, primeiro)
+
+class Medidor:
+    """
+    Tempos por fase e progresso de um laço de tempo (ver medidor())
+    """
+    def __init__(self, ultimo, nome='', celulas=None, primeiro=1):
+        self.ultimo = ultimo
+        self.nome = nome
+        self.celulas = celulas
+        self.primeiro = primeiro
+        self.n = primeiro - 1
+        self.tempos = dict.fromkeys(FASES, 0.0)
+        self.comeco = time.perf_counter()
+        self._marca = self.comeco
+        self._impresso = self.comeco
+
+    def inicio(self):
+        """
+        Marca o início de um passo (descarta o tempo fora do laço)
+        """
+        self._marca = time.perf_counter()
+
+    def fase(self, nome):
+        """
+        Soma à fase 'nome' o tempo desde a última marca
+        """
+        agora = time.perf_counter()
+        self.tempos[nome] = self.tempos.get(nome, 0.0) + agora - self._marca
+        self._marca = agora
+
+    def passo(self, n, **campos):
+        """
+        Fim do passo n: chama os callbacks e imprime o progresso
+        """
+        self.n = n
+        if(n % INTERVALO == 0):
+            for callback in CALLBACKS:
+                callback(n, self, campos)
+        agora = time.perf_counter()
+        if(PROGRESSO and agora - self._impresso >= PERIODO):
+            self._impresso = agora
+            sys.stderr.write('\r' + self.progresso(agora))
+            sys.stderr.flush()
+        self._marca = time.perf_counter()
+
+    def fim(self):
+        """
+        Fim do laço: imprime o resumo do tempo por fase
+        """
+        if(PROGRESSO):
+            sys.stderr.write('\r' + self.progresso() + '\n' + self.resumo() + '\n')
+            sys.stderr.flush()
+
+    def feitos(self):
+        """
+        Número de passos já executados
+        """
+        return self.n - self.primeiro + 1
+
+    def progresso(self, agora=None):
+        """
+        Linha de progresso: passo, passos/s, Mcélulas/s e tempo restante
+        """
+        decorrido = (agora or time.perf_counter()) - self.comeco
+        feitos = self.feitos()
+        taxa = feitos/decorrido if decorrido > 0 else 0.0
+        restante = (self.ultimo - self.n)/taxa if taxa > 0 else float('inf')
+        linhaProgresso = "[%s] passo %d/%d (%.0f%%)  %.0f passos/s" % (
+            self.nome, self.n, self.ultimo, 100*feitos/max(self.ultimo - self.primeiro + 1, 1), taxa)
+        calculo = sum(self.tempos.values())
+        if(self.celulas and calculo > 0):
+            linhaProgresso += "  %.1f Mcel/s" % (self.celulas*feitos/calculo/1e6)
+        return linhaProgresso + "  restam %.1f s " % restante
+
+    def resumo(self):
+        """
+        Tempo acumulado em cada fase, em segundos e em porcentagem
+        """
+        calculo = sum(self.tempos.values())
+        resumoFases = "[%s] %d passos em %.3f s" % (self.nome, self.feitos(), time.perf_counter() - self.comeco)
+        if(calculo == 0):
+            return resumoFases + " (fases não separadas)"
+        partes = ["%s %.3f s (%.0f%%)" % (nome, tempo, 100*tempo/calculo)
+                  for nome, tempo in self.tempos.items() if tempo > 0]
+        return resumoFases + ", %.3f s de cálculo: %s" % (calculo, ', '.join(partes))
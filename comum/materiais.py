@@ -0,0 +1,140 @@
+"""
+Mapas de materiais: propriedades do meio por célula da grade, pintadas por
+regiões, e os coeficientes das atualizações calculados uma só vez a partir
+delas.
+
+Em vez de tratar cada interface no laço (uma fatia por meio, um ponto
+sobrescrito depois da linha inteira, constantes escalares), o meio vira um
+array por propriedade e os solvers recebem os coeficientes como arrays do
+tamanho dos campos. A atualização continua sendo uma única expressão
+vetorizada, com custo que não depende do número de interfaces. Com o mapa
+uniforme os coeficientes são iguais, bit a bit, às constantes escalares.
+
+    - equação de onda (Projeto02/onda.py): propriedade S (fator de Courant)
+      em cada ponto interno 1..LEN, convertida em S² por quadradoCourant()
+    - Yee (Projeto03/yee.py): EPSILON, MU, SIGMA e SIGMA_STAR em cada célula
+      ((LEN,) em 1D e (LEN, LEN) em 2D), convertidas por coeficientesYee()
+      em CA e CB nos pontos internos de Ez e DA e DB nos pontos de H, com a
+      média das células vizinhas de cada ponto
+
+coeficientesYee() passa pelo cache (ver comum/cache.py), de modo que
+execuções com a mesma geometria reaproveitam os mapas já calculados.
+"""
+
+import numpy as np
+from . import cache
+
+class Mapa:
+    """
+    Propriedades do meio por célula (ou ponto) da grade
+    """
+    def __init__(self, forma, **padroes):
+        """
+        entradas:
+        forma - número de células (1D) ou forma da grade
+        padroes - valor de cada propriedade no meio de fundo (EPSILON=..., S=...)
+        """
+        self.forma = tuple(np.atleast_1d(forma).tolist())
+        self.propriedades = {nome: np.full(self.forma, valor, dtype=np.float64)
+                             for nome, valor in padroes.items()}
+
+    def pintar(self, regiao, **valores):
+        """
+        Atribui valores às propriedades numa região
+        entradas:
+        regiao - índices do NumPy (fatias, máscara booleana) ou função dos
+                 índices das células (np.indices) que retorna uma máscara,
+                 por exemplo lambda i, j: (i - 50)**2 + (j - 50)**2 < 100
+        valores - novos valores das propriedades (NOME=valor)
+        saídas: o próprio mapa, para encadear pinturas
+        """
+        if(callable(regiao)):
+            regiao = regiao(*np.indices(self.forma))
+        for nome, valor in valores.items():
+            assert nome in self.propriedades, "Propriedade desconhecida: " + nome
+            self.propriedades[nome][regiao] = valor
+        return self
+
+    def __getitem__(self, nome):
+        return self.propriedades[nome]
+
+def quadradoCourant(mapa, dtype=np.float64):
+    """
+    Quadrado do fator de Courant em cada ponto interno, na precisão do campo
+    (ver onda.meioVariavel())
+    """
+    return np.asarray(mapa['S']**2, dtype=dtype)
+
+def _media(a, b):
+    """
+    Média de duas células, exata quando as duas são iguais
+    """
+    return (a + b)/2
+
+def _bordas(propriedade, eixo):
+    """
+    Repete a primeira e a última célula ao longo do eixo, para os pontos de
+    H sobre as paredes, que só têm uma célula vizinha
+    """
+    largura = [(0, 0)]*propriedade.ndim
+    largura[eixo] = (1, 1)
+    return np.pad(propriedade, largura, mode='edge')
+
+def _pontosE(propriedade):
+    """
+    Propriedade nos pontos internos de Ez (média das células vizinhas)
+    """
+    if(propriedade.ndim == 1):
+        return _media(propriedade[:-1], propriedade[1:])
+    return _media(_media(propriedade[:-1, :-1], propriedade[:-1, 1:]),
+                  _media(propriedade[1:, :-1], propriedade[1:, 1:]))
+
+def _pontosH(propriedade):
+    """
+    Propriedade nos pontos de Hy em 1D ou de (Hx, Hy) em 2D
+    """
+    if(propriedade.ndim == 1):
+        return propriedade
+    linhas = _bordas(propriedade, 0)
+    colunas = _bordas(propriedade, 1)
+    return (_media(linhas[:-1], linhas[1:]), _media(colunas[:, :-1], colunas[:, 1:]))
+
+def _perdas(perda, meio, dt, dx):
+    """
+    Coeficientes A e B da atualização com perdas (as mesmas expressões dos
+    scripts, que também valem com arrays)
+    """
+    A = (1-((perda*dt)/(2*meio)))/(1+(perda*dt)/(2*meio))
+    B = (dt/(meio*dx))/(1+(perda*dt)/(2*meio))
+    return A, B
+
+def _coeficientesYee(propriedades, dt, dx):
+    """
+    Calcula CA, CB, DA e DB a partir das propriedades por célula
+    """
+    CA, CB = _perdas(_pontosE(propriedades['SIGMA']), _pontosE(propriedades['EPSILON']), dt, dx)
+    SIGMA_STAR, MU = _pontosH(propriedades['SIGMA_STAR']), _pontosH(propriedades['MU'])
+    if(isinstance(MU, tuple)):
+        (DAx, DBx), (DAy, DBy) = [_perdas(s, m, dt, dx) for s, m in zip(SIGMA_STAR, MU)]
+        return CA, CB, (DAx, DAy), (DBx, DBy)
+    DA, DB = _perdas(SIGMA_STAR, MU, dt, dx)
+    return CA, CB, DA, DB
+
+def coeficientesYee(mapa, dt, dx, usarCache=True):
+    """
+    Função que calcula os mapas dos coeficientes de Yee
+    entradas:
+    mapa - Mapa com EPSILON, MU, SIGMA e SIGMA_STAR por célula
+    dt, dx - passos de tempo e espaço
+    usarCache - reaproveita mapas já calculados com a mesma geometria
+    saídas:
+    CA, CB - nos pontos internos de Ez ((LEN-1,) ou (LEN-1, LEN-1))
+    DA, DB - nos pontos de Hy ((LEN,)) ou pares com (Hx, Hy) em 2D
+    """
+    for nome in ('EPSILON', 'MU', 'SIGMA', 'SIGMA_STAR'):
+        assert nome in mapa.propriedades, "O mapa não tem " + nome
+    propriedades = {nome: mapa[nome] for nome in ('EPSILON', 'MU', 'SIGMA', 'SIGMA_STAR')}
+    if(usarCache):
+        return tuple(cache.memorizar(_coeficientesYee, (propriedades, dt, dx),
+                                     parametros={'auxiliares': (_media, _bordas, _pontosE, _pontosH, _perdas)}))
+    return _coeficientesYee(propriedades, dt, dx)
@@ -0,0 +1,60 @@
+"""
+Relatório de precisão das simulações em float32.
+
+Os solvers aceitam dtype=np.float32, o que reduz pela metade a memória e a
+banda usadas a cada passo. Para saber se a precisão basta, relatorio()
+refaz a simulação com a precisão de referência (float64) e mede o maior
+desvio entre os arrays dos dois resultados.
+"""
+
+import numpy as np
+
+def _arrays(resultado):
+    """
+    Lista os arrays de um resultado (arrays, tuplas, listas e dicionários
+    aninhados), na mesma ordem para resultados com a mesma estrutura
+    """
+    if(isinstance(resultado, np.ndarray)):
+        return [resultado]
+    if(isinstance(resultado, dict)):
+        return [a for k in sorted(resultado, key=repr) for a in _arrays(resultado[k])]
+    if(isinstance(resultado, (list, tuple))):
+        return [a for item in resultado for a in _arrays(item)]
+    return []
+
+def desvio(resultado, referencia):
+    """
+    Calcula o maior desvio entre os arrays de dois resultados
+    saídas:
+    absoluto - max |resultado - referencia|
+    relativo - absoluto dividido pelo maior valor absoluto da referência
+    """
+    absoluto = 0.0
+    maximo = 0.0
+    for a, b in zip(_arrays(resultado), _arrays(referencia)):
+        assert a.shape == b.shape, "Os resultados têm formas diferentes"
+        if(a.size == 0):
+            continue
+        b = np.asarray(b, dtype=np.float64)
+        absoluto = max(absoluto, float(np.max(np.abs(np.asarray(a, dtype=np.float64) - b))))
+        maximo = max(maximo, float(np.max(np.abs(b))))
+    relativo = absoluto/maximo if maximo > 0 else 0.0
+    return absoluto, relativo
+
+def relatorio(resultado, funcao, args=(), kwargs=None, referencia=np.float64):
+    """
+    Função que compara um resultado com o da mesma simulação na precisão
+    de referência e imprime o desvio
+    entradas:
+    resultado - resultado calculado com outro dtype
+    funcao, args, kwargs - simulação que gerou o resultado (deve aceitar dtype=)
+    referencia - precisão de referência
+    saídas:
+    dicionário com o dtype do resultado e os desvios absoluto e relativo
+    """
+    kwargs = dict(kwargs or {}, dtype=referencia)
+    absoluto, relativo = desvio(resultado, funcao(*args, **kwargs))
+    tipos = sorted({str(a.dtype) for a in _arrays(resultado)})
+    print("Precisão %s: desvio máximo %.3e (%.3e%% do valor máximo) em relação a %s"
+          % ('/'.join(tipos), absoluto, 100*relativo, np.dtype(referencia).name))
+    return {'dtype': tipos, 'absoluto': absoluto, 'relativo': relativo}
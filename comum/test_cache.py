@@ -0,0 +1,55 @@
+"""
+Testes do cache de resultados (cache.py): acerto na memória e no disco,
+invalidação quando a chave muda e escrita repetida da mesma chave.
+"""
+
+import os
+import numpy as np
+import pytest
+from comum import cache
+
+@pytest.fixture
+def diretorio(tmp_path, monkeypatch):
+    monkeypatch.setattr(cache, 'DIRETORIO', str(tmp_path))
+    monkeypatch.setattr(cache, '_memoria', type(cache._memoria)())
+    return tmp_path
+
+def _contador():
+    chamadas = []
+    def simulacao(n, escala=1.0):
+        chamadas.append(n)
+        return {'E': escala*np.arange(n, dtype=float), 'n': n}, (np.ones(2), 'ok')
+    return simulacao, chamadas
+
+def test_acerto_memoria_e_disco(diretorio):
+    simulacao, chamadas = _contador()
+    primeiro = cache.memorizar(simulacao, (5,), parametros={'T': 1.0})
+    segundo = cache.memorizar(simulacao, (5,), parametros={'T': 1.0})
+    cache._memoria.clear()
+    terceiro = cache.memorizar(simulacao, (5,), parametros={'T': 1.0})
+    assert chamadas == [5]
+    for resultado in (segundo, terceiro):
+        np.testing.assert_array_equal(resultado[0]['E'], primeiro[0]['E'])
+        assert resultado[0]['n'] == 5 and resultado[1][1] == 'ok'
+
+def test_invalidacao(diretorio):
+    simulacao, chamadas = _contador()
+    cache.memorizar(simulacao, (5,), parametros={'T': 1.0})
+    cache.memorizar(simulacao, (6,), parametros={'T': 1.0})
+    cache.memorizar(simulacao, (5,), {'escala': 2.0}, parametros={'T': 1.0})
+    cache.memorizar(simulacao, (5,), parametros={'T': 2.0})
+    cache.memorizar(simulacao, (5,), parametros={'T': 1.0, 'DX': np.array([1e-3])})
+    assert chamadas == [5, 6, 5, 5, 5]
+
+    # O código da função faz parte da chave
+    def outra(n, escala=1.0):
+        return {'E': -np.arange(n, dtype=float), 'n': n}, (np.ones(2), 'ok')
+    assert cache.chave(simulacao, (5,), {}, None) != cache.chave(outra, (5,), {}, None)
+
+def test_mesma_chave_duas_vezes(diretorio):
+    k = cache.chave('entrada', 1)
+    cache.guardar(k, np.arange(3.0))
+    cache.guardar(k, np.arange(3.0))
+    cache._memoria.clear()
+    np.testing.assert_array_equal(cache.carregar(k), np.arange(3.0))
+    assert not [nome for nome in os.listdir(diretorio) if nome.startswith(cache.TEMPORARIO)]
@@ -0,0 +1,283 @@
+"""
+Varredura de parâmetros dos scripts, com os pontos distribuídos entre
+processos (ProcessPoolExecutor) e os resultados guardados num formato
+colunar compacto.
+
+Cada ponto da grade (ver grade()) é um dicionário de parâmetros passado à
+simulacao() de um dos scripts (ver CASOS), por exemplo S, S_REFRAC e
+TRANSICAO em 'onda', Rl e carga em 'linha' ou SIGMA e SIGMA_STAR nos
+casos de Yee. No processo que simulou só são extraídas as saídas pedidas
+(sondas, campos finais e métricas, ver SAIDAS), que voltam ao processo
+principal e são gravadas assim que cada ponto termina:
+
+    destino/
+        indice.jsonl  - uma linha por ponto concluído, com o caso, os
+                        parâmetros, a chave do ponto e, para cada saída,
+                        [deslocamento, forma, dtype] no arquivo da saída
+        <saida>.bin   - arrays dessa saída de todos os pontos, um após o
+                        outro (lidos com np.memmap, sem carregar o resto)
+
+A linha do índice é escrita depois dos dados, então um ponto interrompido
+no meio fica fora do índice; varrer() com o mesmo destino pula os pontos
+já concluídos e refaz só os que faltam. A chave de cada ponto inclui o
+código do script e a sua configuração (ver chavePonto()), então mudar o
+script entre as execuções refaz os pontos em vez de reaproveitá-los.
+
+Uso pela linha de comando:
+    python -m comum.varredura onda resultados/ S=0.5,0.9,1 S_REFRAC=0.25,0.5
+                              [--saidas E_final,E_max] [--processos 4]
+"""
+
+import os
+import sys
+import ast
+import json
+import argparse
+import itertools
+import importlib.util
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import numpy as np
+from . import cache
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+INDICE = 'indice.jsonl'
+
+# caso: (diretório, script)
+CASOS = {'linha': ('Projeto01', 'codigo'),
+         'onda': ('Projeto02', 'codigo'),
+         'um_ponto': ('Projeto02', 'um_ponto'),
+         'yee1D': ('Projeto03', 'caso_1D'),
+         'yee1DHy': ('Projeto03', 'caso_1D_Hy'),
+         'yee2D': ('Projeto03', 'caso_2D')}
+
+_scripts = {}   # scripts já importados neste processo
+
+def grade(**valores):
+    """
+    Produto cartesiano dos valores de cada parâmetro
+    entradas: nome=lista de valores
+    saídas: lista de dicionários nome: valor (um por ponto)
+    """
+    nomes = list(valores)
+    return [dict(zip(nomes, combinacao)) for combinacao in itertools.product(*valores.values())]
+
+def _script(caso):
+    """
+    Importa o script do caso (sem simular nem importar o matplotlib) com o
+    cache desligado, para que os processos não escrevam no mesmo cache
+    """
+    if(caso not in _scripts):
+        diretorio, nome = CASOS[caso]
+        caminho = os.path.join(RAIZ, diretorio)
+        if(caminho not in sys.path):
+            sys.path.insert(0, caminho)
+        spec = importlib.util.spec_from_file_location('varredura_' + caso, os.path.join(caminho, nome + '.py'))
+        modulo = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(modulo)
+        modulo.usarCache = False
+        _scripts[caso] = modulo
+    return _scripts[caso]
+
+def _ultimo(campo):
+    """
+    Último passo guardado (arrays com o histórico ou dicionários passo: linha)
+    """
+    if(isinstance(campo, dict)):
+        return campo[max(campo)]
+    return campo[-1]
+
+def _saidasLinha(resultado):
+    i, v, sondas, _ = resultado
+    tensoes = np.array([sondas[nome][0] for nome in sondas])
+    correntes = np.array([sondas[nome][1] for nome in sondas])
+    return {'v_final': _ultimo(v), 'i_final': _ultimo(i),
+            'sondas_v': tensoes, 'sondas_i': correntes,
+            'v_max': np.max(np.abs(tensoes))}
+
+def _saidasOnda(resultado):
+    E, estado = resultado
+    return {'E_final': E[-1], 'E_max': np.max(np.abs(E))}
+
+def _saidasYee1D(resultado):
+    Ez, Hy = resultado
+    return {'Ez_final': Ez[-1], 'Hy_final': Hy[-1], 'Ez_max': np.max(np.abs(Ez))}
+
+def _saidasYee2D(resultado):
+    Ez, Hx, Hy = resultado
+    return {'Ez_final': Ez[-1], 'Hx_final': Hx[-1], 'Hy_final': Hy[-1], 'Ez_max': np.max(np.abs(Ez))}
+
+# caso: função que extrai as saídas (nome: array) do resultado de simulacao()
+SAIDAS = {'linha': _saidasLinha,
+          'onda': _saidasOnda,
+          'um_ponto': _saidasOnda,
+          'yee1D': _saidasYee1D,
+          'yee1DHy': _saidasYee1D,
+          'yee2D': _saidasYee2D}
+
+def executar(caso, ponto, saidas=None):
+    """
+    Função que simula um ponto e extrai as saídas pedidas (None = todas)
+    saídas: dicionário nome: array
+    """
+    valores = SAIDAS[caso](_script(caso).simulacao(**ponto))
+    if(saidas is not None):
+        faltando = set(saidas) - set(valores)
+        assert not faltando, "Saídas inexistentes para '%s': %s" % (caso, sorted(faltando))
+        valores = {nome: valores[nome] for nome in saidas}
+    return {nome: np.asarray(valor, order='C') for nome, valor in valores.items()}
+
+def _configuracao(caso):
+    """
+    Código do script do caso e os valores das suas globais (DX, T, LEN,
+    fonte, dtype, formas de onda, ...), que afetam o resultado sem serem
+    parâmetros dos pontos
+    """
+    modulo = _script(caso)
+    with open(modulo.__file__, 'rb') as arq:
+        codigo = arq.read().decode('utf-8')
+    simples = (bool, int, float, complex, str, type(None), np.generic, np.ndarray, np.dtype)
+    valores = {}
+    for nome, valor in vars(modulo).items():
+        if(nome.startswith('_')):
+            continue
+        if(isinstance(valor, simples) or (isinstance(valor, type) and issubclass(valor, np.generic))):
+            valores[nome] = valor
+        elif(isinstance(valor, (list, tuple)) and all(isinstance(v, simples) for v in valor)):
+            valores[nome] = valor
+    return codigo, valores
+
+def chavePonto(caso, ponto, saidas=None):
+    """
+    Chave de um ponto da varredura (caso, parâmetros, saídas pedidas e a
+    configuração do script, ver _configuracao())
+    """
+    return cache.chave(caso, ponto, sorted(saidas) if saidas is not None else None, _configuracao(caso))
+
+def _json(valor):
+    """
+    Converte escalares do numpy para gravar os parâmetros no índice
+    """
+    if(isinstance(valor, np.generic)):
+        return valor.item()
+    if(isinstance(valor, type) and issubclass(valor, np.generic)):
+        return np.dtype(valor).name
+    return repr(valor)
+
+def _gravar(destino, caso, k, ponto, valores):
+    """
+    Acrescenta as saídas de um ponto aos arquivos das saídas e, por último,
+    a linha do ponto ao índice
+    """
+    entrada = {'chave': k, 'caso': caso, 'parametros': ponto, 'saidas': {}}
+    for nome, valor in valores.items():
+        with open(os.path.join(destino, nome + '.bin'), 'ab') as arq:
+            deslocamento = arq.seek(0, os.SEEK_END)
+            arq.write(valor.tobytes())
+        entrada['saidas'][nome] = [deslocamento, list(valor.shape), valor.dtype.str]
+    with open(os.path.join(destino, INDICE), 'a') as arq:
+        arq.write(json.dumps(entrada, default=_json) + '\n')
+
+def indice(destino):
+    """
+    Lê o índice de uma varredura (lista de entradas dos pontos concluídos)
+    """
+    caminho = os.path.join(destino, INDICE)
+    if(not os.path.exists(caminho)):
+        return []
+    entradas = []
+    with open(caminho) as arq:
+        for linhaIndice in arq:
+            try:
+                entradas.append(json.loads(linhaIndice))
+            except json.JSONDecodeError:
+                pass    # última linha incompleta (varredura interrompida)
+    return entradas
+
+def varrer(caso, pontos, destino, saidas=None, processos=None):
+    """
+    Função que simula os pontos em paralelo e grava as saídas em 'destino',
+    pulando os pontos já concluídos numa execução anterior
+    entradas:
+    caso - nome do caso em CASOS
+    pontos - lista de dicionários de parâmetros (ver grade())
+    destino - diretório da varredura
+    saidas - nomes das saídas a guardar (None = todas as de SAIDAS[caso])
+    processos - número de processos (None = os.cpu_count(), 1 = neste processo)
+    saídas: número de pontos simulados nesta chamada
+    """
+    assert caso in CASOS, "Caso inválido: " + str(caso)
+    os.makedirs(destino, exist_ok=True)
+    feitos = {entrada['chave'] for entrada in indice(destino)}
+    pendentes = [(chavePonto(caso, ponto, saidas), ponto) for ponto in pontos]
+    pendentes = [(k, ponto) for k, ponto in pendentes if k not in feitos]
+    print("Varredura '%s': %d de %d pontos já concluídos" % (caso, len(pontos) - len(pendentes), len(pontos)))
+
+    if(processos == 1):
+        for k, ponto in pendentes:
+            _gravar(destino, caso, k, ponto, executar(caso, ponto, saidas))
+        return len(pendentes)
+
+    with ProcessPoolExecutor(processos) as pool:
+        futuros = {pool.submit(executar, caso, ponto, saidas): (k, ponto) for k, ponto in pendentes}
+        for feito, futuro in enumerate(as_completed(futuros), 1):
+            k, ponto = futuros[futuro]
+            _gravar(destino, caso, k, ponto, futuro.result())
+            print("Ponto %d/%d concluído: %s" % (feito, len(pendentes), ponto))
+    return len(pendentes)
+
+def pontos(destino, **filtro):
+    """
+    Entradas do índice cujos parâmetros têm os valores dados em 'filtro'
+    """
+    return [entrada for entrada in indice(destino)
+            if all(entrada['parametros'].get(nome) == valor for nome, valor in filtro.items())]
+
+def ler(destino, saida, **filtro):
+    """
+    Função que lê uma saída dos pontos que atendem ao filtro, sem carregar
+    os outros pontos nem as outras saídas
+    saídas:
+    parametros - lista dos parâmetros de cada ponto
+    valores - lista de arrays (np.memmap somente leitura) de cada ponto
+    """
+    parametros = []
+    valores = []
+    arquivo = os.path.join(destino, saida + '.bin')
+    for entrada in pontos(destino, **filtro):
+        if(saida not in entrada['saidas']):
+            continue
+        deslocamento, forma, tipo = entrada['saidas'][saida]
+        if(int(np.prod(forma)) == 0):
+            valor = np.empty(forma, dtype=tipo)     # np.memmap não aceita tamanho 0
+        else:
+            # forma () vira (1,) no np.memmap, o reshape devolve a original
+            valor = np.memmap(arquivo, dtype=tipo, mode='r', offset=deslocamento,
+                              shape=tuple(forma) or (1,)).reshape(forma)
+        parametros.append(entrada['parametros'])
+        valores.append(valor)
+    return parametros, valores
+
+def _valor(texto):
+    """
+    Converte um valor da linha de comando (números, None, True, inf...)
+    """
+    try:
+        return ast.literal_eval(texto)
+    except (ValueError, SyntaxError):
+        return float(texto)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Varredura de parâmetros de um dos casos")
+    parser.add_argument('caso', choices=sorted(CASOS))
+    parser.add_argument('destino', help="diretório da varredura (retomada se já existir)")
+    parser.add_argument('parametros', nargs='+', help="NOME=valor1,valor2,...")
+    parser.add_argument('--saidas', help="saídas a guardar, separadas por vírgulas (padrão todas)")
+    parser.add_argument('--processos', type=int, default=None)
+    argumentos = parser.parse_args()
+
+    valores = {}
+    for parametro in argumentos.parametros:
+        nome, lista = parametro.split('=', 1)
+        valores[nome] = [_valor(texto) for texto in lista.split(',')]
+    saidas = argumentos.saidas.split(',') if argumentos.saidas else None
+    varrer(argumentos.caso, grade(**valores), argumentos.destino, saidas, argumentos.processos)